@@ -0,0 +1,83 @@
+"""
+Adaptive admission control for AI chat.
+
+AdaptiveLimiter caps the number of chat requests in flight with a limit
+that adjusts itself AIMD-style (like TCP congestion control): every
+request that finishes within the latency target and without overload
+signs (Ollama queue full, timeouts, missed deadlines) raises the limit by
+1/limit, so roughly +1 per window of requests; a slow or overloaded one
+cuts it multiplicatively, at most once per cooldown so a single burst is
+not punished repeatedly. Streamed chats report their time to first token
+(the stream itself lasts as long as the generation), or no latency at
+all. Requests over the limit are shed: the caller answers them with the
+local rule-based reply without touching retrieval or Ollama, so AI load
+cannot tie up every worker.
+"""
+
+import threading
+import time
+
+from metrics import Counter, Histogram
+
+
+class AdaptiveLimiter:
+    """AIMD concurrency limit for one class of requests"""
+
+    def __init__(self, initial=8, min_limit=1, max_limit=32, target_ms=10000,
+                 increase=1.0, decrease=0.7, cooldown_ms=None):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.target_ms = target_ms
+        self.increase = increase
+        self.decrease = decrease
+        self.cooldown_ms = target_ms if cooldown_ms is None else cooldown_ms
+        self.limit = float(min(max(initial, min_limit), max_limit))
+        self.counters = Counter()
+        self.latency_ms = Histogram()
+        self._in_flight = 0
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+
+    def try_acquire(self):
+        """Admit the request (True) or shed it (False)"""
+        with self._lock:
+            if self._in_flight >= int(self.limit):
+                self.counters.inc('shed')
+                return False
+            self._in_flight += 1
+        self.counters.inc('admitted')
+        return True
+
+    def release(self, latency_ms, overloaded=False):
+        """An admitted request finished after `latency_ms`; None = no latency
+        sample (the limit then only reacts to overload)"""
+        if latency_ms is not None:
+            self.latency_ms.observe(latency_ms)
+        now = time.monotonic()
+        with self._lock:
+            self._in_flight -= 1
+            if overloaded or (latency_ms is not None and latency_ms > self.target_ms):
+                if (now - self._last_decrease) * 1000 >= self.cooldown_ms:
+                    self.limit = max(self.min_limit, self.limit * self.decrease)
+                    self._last_decrease = now
+                    self.counters.inc('decreases')
+            elif latency_ms is not None:
+                self.limit = min(self.max_limit, self.limit + self.increase / self.limit)
+        if overloaded:
+            self.counters.inc('overloaded')
+
+    def stats(self):
+        with self._lock:
+            limit, in_flight = self.limit, self._in_flight
+        counts = self.counters.snapshot()
+        handled = counts.get('admitted', 0) + counts.get('shed', 0)
+        return {
+            'limit': round(limit, 2),
+            'in_flight': in_flight,
+            'min_limit': self.min_limit,
+            'max_limit': self.max_limit,
+            'target_ms': self.target_ms,
+            'shed_ratio': round(counts.get('shed', 0) / handled, 4) if handled else 0.0,
+            'counts': counts,
+            'latency_ms': self.latency_ms.snapshot(),
+        }
@@ -1,4 +1,4 @@
-from flask import Flask, render_template, request, jsonify, url_for, session, redirect, flash
+from flask import Flask, render_template, request, jsonify, url_for, session, redirect, flash, Response, stream_with_context, g
 import requests
 from datetime import datetime
 import requests
@@ -10,10 +10,39 @@ import hashlib
 import secrets
 from datetime import datetime, timedelta
 import json
+import time
 from functools import wraps
+from contextlib import closing
 import numpy as np
+from jinja2 import FileSystemBytecodeCache
 from dotenv import load_dotenv
 from pathlib import Path
+from catalog import Catalog
+from background_tasks import at_worker_start
+from review_aggregates import (
+    init_review_aggregates, fetch_review_aggregates,
+    apply_review_aggregate, start_reconciliation_job
+)
+from fragment_cache import FragmentCache
+from embedding_model import LazyEmbeddingModel, UNAVAILABLE
+from metrics import Histogram, HistogramFamily, StageMetrics, StageTimer
+from ollama_client import OllamaGateway, sse_event, SSE_HEADERS
+from model_lifecycle import ModelLifecycle
+from semantic_cache import SemanticCache
+from conversation_context import build_chat_messages, warm_encoding
+from assistant_pipeline import TravelRetriever, build_system_prompt, fallback_reason_for, missing_model_retry
+from intent_router import IntentRouter
+from bot_transport import create_transport
+from model_router import ModelRouter
+from deadlines import Deadline, DeadlineExceeded, HOP_RESERVE_MS, MIN_GENERATION_MS, chat_deadline_ms
+from admission import AdaptiveLimiter
+from static_assets import init_static_assets
+from rate_limit import RateLimiter, client_address, init_rate_limiting
+from health import embedding_check, lifecycle_check, liveness, readiness
+from upstream_apis import (
+    FORECAST_URL, GOOGLE_SEARCH_URL, UPSTREAM_TIMEOUT, WEATHER_URL,
+    search_params, shape_forecast, shape_search, shape_weather, weather_params
+)
 
 # Create Flask app instance
 app = Flask(__name__, 
@@ -25,6 +54,15 @@ CORS(app)
 
 # Load environment variables
 load_dotenv()
+
+# Compiled templates are cached on disk so new workers skip Jinja compilation
+JINJA_CACHE_DIR = os.getenv('JINJA_CACHE_DIR', os.path.join(app.root_path, '.jinja_cache'))
+os.makedirs(JINJA_CACHE_DIR, exist_ok=True)
+app.jinja_env.bytecode_cache = FileSystemBytecodeCache(JINJA_CACHE_DIR)
+
+# Content-hashed copies of static/ served from /assets/ as immutable, with
+# gzip/brotli variants; templates link them through asset_url()
+init_static_assets(app, build=os.getenv('ASSETS_BUILD', '1') != '0')
 GOOGLE_MAPS_API_KEY = os.getenv('GOOGLE_MAPS_API_KEY', '')
 GOOGLE_SEARCH_API_KEY = os.getenv('GOOGLE_SEARCH_API_KEY', '')
 GOOGLE_SEARCH_CX = os.getenv('GOOGLE_SEARCH_CX', '')
@@ -33,46 +71,17 @@ GOOGLE_SEARCH_CX = os.getenv('GOOGLE_SEARCH_CX', '')
 DATABASE = 'atithiverse.db'
 
 # ===== WEATHER API INTEGRATION =====
-WEATHER_API_KEY = "f3892078c6b88350c7dca2235e640010"  # Your actual API key
+# Request parameters and response shaping live in upstream_apis.py, shared
+# with the async server (async_app.py) that can serve these routes instead
 
 @app.route('/api/weather/<city>')
 def get_weather(city):
     """Get current weather data for a city"""
     try:
-        # OpenWeatherMap API endpoint
-        url = f"http://api.openweathermap.org/data/2.5/weather"
-        params = {
-            'q': city,
-            'appid': WEATHER_API_KEY,
-            'units': 'metric'  # for Celsius
-        }
-        
-        response = requests.get(url, params=params, timeout=10)
+        response = requests.get(WEATHER_URL, params=weather_params(city), timeout=UPSTREAM_TIMEOUT)
         
         if response.status_code == 200:
-            data = response.json()
-            
-            # Extract relevant weather data
-            weather_data = {
-                'success': True,
-                'city': data['name'],
-                'country': data['sys']['country'],
-                'temperature': round(data['main']['temp']),
-                'feels_like': round(data['main']['feels_like']),
-                'humidity': data['main']['humidity'],
-                'pressure': data['main']['pressure'],
-                'visibility': data.get('visibility', 0) // 1000,  # Convert to km
-                'wind_speed': data['wind']['speed'],
-                'wind_direction': data['wind'].get('deg', 0),
-                'weather_main': data['weather'][0]['main'],
-                'weather_description': data['weather'][0]['description'].title(),
-                'weather_icon': data['weather'][0]['icon'],
-                'sunrise': datetime.fromtimestamp(data['sys']['sunrise']).strftime('%H:%M'),
-                'sunset': datetime.fromtimestamp(data['sys']['sunset']).strftime('%H:%M'),
-                'timestamp': datetime.now().strftime('%H:%M, %B %d')
-            }
-            
-            return jsonify(weather_data)
+            return jsonify(shape_weather(response.json()))
         else:
             return jsonify({
                 'success': False,
@@ -94,86 +103,10 @@ def get_weather(city):
 def get_weather_forecast(city):
     """Get 5-day weather forecast for a city"""
     try:
-        # OpenWeatherMap API endpoint for 5-day forecast
-        url = f"http://api.openweathermap.org/data/2.5/forecast"
-        params = {
-            'q': city,
-            'appid': WEATHER_API_KEY,
-            'units': 'metric'  # for Celsius
-        }
-        
-        response = requests.get(url, params=params, timeout=10)
+        response = requests.get(FORECAST_URL, params=weather_params(city), timeout=UPSTREAM_TIMEOUT)
         
         if response.status_code == 200:
-            data = response.json()
-            
-            # Process forecast data - group by day and get daily summaries
-            daily_forecasts = {}
-            
-            for item in data['list']:
-                date = datetime.fromtimestamp(item['dt']).strftime('%Y-%m-%d')
-                time = datetime.fromtimestamp(item['dt']).strftime('%H:%M')
-                
-                if date not in daily_forecasts:
-                    daily_forecasts[date] = {
-                        'date': date,
-                        'day_name': datetime.fromtimestamp(item['dt']).strftime('%A'),
-                        'temps': [],
-                        'weather_conditions': [],
-                        'humidity': [],
-                        'wind_speed': [],
-                        'times': []
-                    }
-                
-                daily_forecasts[date]['temps'].append(item['main']['temp'])
-                daily_forecasts[date]['weather_conditions'].append({
-                    'main': item['weather'][0]['main'],
-                    'description': item['weather'][0]['description'],
-                    'icon': item['weather'][0]['icon']
-                })
-                daily_forecasts[date]['humidity'].append(item['main']['humidity'])
-                daily_forecasts[date]['wind_speed'].append(item['wind']['speed'])
-                daily_forecasts[date]['times'].append(time)
-            
-            # Convert to list and calculate daily summaries
-            forecast_list = []
-            for date, day_data in list(daily_forecasts.items())[:5]:  # Limit to 5 days
-                # Calculate min/max temperatures
-                min_temp = round(min(day_data['temps']))
-                max_temp = round(max(day_data['temps']))
-                
-                # Get most common weather condition for the day
-                weather_counts = {}
-                for condition in day_data['weather_conditions']:
-                    key = condition['main']
-                    if key not in weather_counts:
-                        weather_counts[key] = {'count': 0, 'data': condition}
-                    weather_counts[key]['count'] += 1
-                
-                most_common_weather = max(weather_counts.items(), key=lambda x: x[1]['count'])[1]['data']
-                
-                # Calculate averages
-                avg_humidity = round(sum(day_data['humidity']) / len(day_data['humidity']))
-                avg_wind_speed = round(sum(day_data['wind_speed']) / len(day_data['wind_speed']), 1)
-                
-                forecast_list.append({
-                    'date': date,
-                    'day_name': day_data['day_name'],
-                    'min_temp': min_temp,
-                    'max_temp': max_temp,
-                    'weather_main': most_common_weather['main'],
-                    'weather_description': most_common_weather['description'].title(),
-                    'weather_icon': most_common_weather['icon'],
-                    'humidity': avg_humidity,
-                    'wind_speed': avg_wind_speed
-                })
-            
-            return jsonify({
-                'success': True,
-                'city': data['city']['name'],
-                'country': data['city']['country'],
-                'forecast': forecast_list
-            })
+            return jsonify(shape_forecast(response.json()))
         else:
             return jsonify({
                 'success': False,
@@ -207,32 +140,9 @@ def google_search():
         return jsonify({'success': False, 'error': 'Missing query'}), 400
 
     try:
-        url = 'https://www.googleapis.com/customsearch/v1'
-        params = {
-            'key': GOOGLE_SEARCH_API_KEY,
-            'cx': GOOGLE_SEARCH_CX,
-            'q': query,
-            'num': max(1, min(num, 10))
-        }
-        resp = requests.get(url, params=params, timeout=10)
-        data = resp.json()
-
-        results = []
-        for item in data.get('items', [])[:num]:
-            img = None
-            try:
-                img = item.get('pagemap', {}).get('cse_image', [{}])[0].get('src')
-            except Exception:
-                img = None
-            results.append({
-                'title': item.get('title'),
-                'link': item.get('link'),
-                'snippet': item.get('snippet'),
-                'displayLink': item.get('displayLink'),
-                'image': img
-            })
-
-        return jsonify({'success': True, 'query': query, 'results': results})
+        params = search_params(GOOGLE_SEARCH_API_KEY, GOOGLE_SEARCH_CX, query, num)
+        resp = requests.get(GOOGLE_SEARCH_URL, params=params, timeout=UPSTREAM_TIMEOUT)
+        return jsonify(shape_search(resp.json(), query, num))
     except Exception as e:
         return jsonify({'success': False, 'error': 'Search failed'}), 500
 
@@ -305,6 +215,10 @@ def init_db():
             rating INTEGER NOT NULL CHECK(rating >= 1 AND rating <= 5),
             title TEXT,
             comment TEXT NOT NULL,
+            service_rating INTEGER,
+            value_rating INTEGER,
+            location_rating INTEGER,
+            cleanliness_rating INTEGER,
             is_verified BOOLEAN DEFAULT 0,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             FOREIGN KEY (user_id) REFERENCES users (id)
@@ -335,6 +249,9 @@ def init_db():
         )
     ''')
     
+    # Review aggregates table + triggers keeping it in sync with reviews
+    init_review_aggregates(conn)
+    
     conn.commit()
     conn.close()
 
@@ -483,6 +400,32 @@ destinations = [
     }
 ]
 
+def rated_destinations(conn, breakdown=False):
+    """Destinations with live review aggregates folded into rating/reviews"""
+    aggregates = fetch_review_aggregates(conn)
+    return [apply_review_aggregate(d, aggregates.get(d['id']), breakdown) for d in destinations]
+
+# Facet snapshot of the catalog; call refresh_catalog() after editing destinations
+catalog = Catalog()
+
+def refresh_catalog():
+    """Re-sync the catalog snapshot, updating facets only for changed destinations"""
+    conn = get_db_connection()
+    try:
+        return catalog.reload(rated_destinations(conn))
+    finally:
+        conn.close()
+
+refresh_catalog()
+
+# Periodically repair review aggregate drift and re-sync every destination's facets.
+# The destination page and API fold the live rating into the catalog as they are
+# viewed; other new reviews reach the facets after at most this many seconds.
+REVIEW_RECONCILE_INTERVAL = int(os.getenv('REVIEW_RECONCILE_INTERVAL', '3600'))
+if REVIEW_RECONCILE_INTERVAL > 0:
+    at_worker_start(start_reconciliation_job, get_db_connection, REVIEW_RECONCILE_INTERVAL,
+                    on_reconciled=refresh_catalog)
+
 # ===== AUTHENTICATION ROUTES =====
 
 @app.route('/api/register', methods=['POST'])
@@ -646,7 +589,8 @@ def get_destinations():
         max_price = request.args.get('max_price', type=float)
         rating = request.args.get('rating', type=float)
         
-        filtered_destinations = destinations.copy()
+        with closing(get_db_connection()) as conn:
+            filtered_destinations = rated_destinations(conn)
         
         # Apply filters
         if category != 'all':
@@ -670,12 +614,11 @@ def get_destinations():
         
         # Add wishlist status if user is logged in
         if 'user_id' in session:
-            conn = get_db_connection()
-            user_wishlist = conn.execute(
-                'SELECT destination_id FROM wishlist WHERE user_id = ?',
-                (session['user_id'],)
-            ).fetchall()
-            conn.close()
+            with closing(get_db_connection()) as conn:
+                user_wishlist = conn.execute(
+                    'SELECT destination_id FROM wishlist WHERE user_id = ?',
+                    (session['user_id'],)
+                ).fetchall()
             
             wishlist_ids = {row['destination_id'] for row in user_wishlist}
             
@@ -697,6 +640,31 @@ def get_destinations():
             'message': 'Error fetching destinations'
         }), 500
 
+@app.route('/api/destinations/facets')
+def get_destination_facets():
+    """Counts per category, price band and rating band for the filter sidebar.
+    Accepts the same filters as /api/destinations.
+    """
+    try:
+        result = catalog.facet_counts(
+            category=request.args.get('category', 'all'),
+            search=request.args.get('search', ''),
+            min_price=request.args.get('min_price', type=float),
+            max_price=request.args.get('max_price', type=float),
+            rating=request.args.get('rating', type=float)
+        )
+        
+        return jsonify({
+            'success': True,
+            **result
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': 'Error fetching destination facets'
+        }), 500
+
 @app.route('/api/destinations/<int:dest_id>')
 def get_destination(dest_id):
     try:
@@ -708,11 +676,14 @@ def get_destination(dest_id):
                 'message': 'Destination not found'
             }), 404
         
-        dest_copy = destination.copy()
+        conn = get_db_connection()
+        aggregates = fetch_review_aggregates(conn, [dest_id])
+        dest_copy = apply_review_aggregate(destination, aggregates.get(dest_id), breakdown=True)
+        catalog.update(dest_copy)
+        dest_copy['total_reviews'] = dest_copy['reviews']  # 'reviews' is replaced by the review list below
         
         # Check if user has this in wishlist
         if 'user_id' in session:
-            conn = get_db_connection()
             wishlist_item = conn.execute(
                 'SELECT id FROM wishlist WHERE user_id = ? AND destination_id = ?',
                 (session['user_id'], dest_id)
@@ -731,6 +702,7 @@ def get_destination(dest_id):
             dest_copy['in_wishlist'] = wishlist_item is not None
             dest_copy['reviews'] = [dict(review) for review in reviews]
         else:
+            conn.close()
             dest_copy['in_wishlist'] = False
             dest_copy['reviews'] = []
         
@@ -819,130 +791,222 @@ def toggle_wishlist():
 import numpy as np
 from dotenv import load_dotenv
 
-# Try to import SentenceTransformer
-try:
-    from sentence_transformers import SentenceTransformer
-    USE_EMBEDDINGS = True
-    print("✅ SentenceTransformer available")
-except ImportError:
-    USE_EMBEDDINGS = False
+# The SentenceTransformer model loads on a background thread (see embedding_model.py)
+# so startup never waits for sentence-transformers/torch; chat uses keyword search
+# until the model is ready
+EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+embedding_model = LazyEmbeddingModel(EMBEDDING_MODEL_NAME, device='cpu')
+if embedding_model.state == UNAVAILABLE:
     print("⚠️ SentenceTransformer not available, using keyword search")
 
 # Load environment variables
 load_dotenv()
 
-# Ollama configuration
-OLLAMA_SERVER = os.getenv("OLLAMA_SERVER", "http://127.0.0.1:11434")
-OLLAMA_CHAT_MODEL = os.getenv("OLLAMA_CHAT_MODEL", "llama2")
-
-# Initialize embedding model
-embedder = None
-if USE_EMBEDDINGS:
+def load_app_config():
+    """Load data/config/app_config.json (empty dict if missing)"""
     try:
-        print("📥 Loading SentenceTransformer model...")
-        embedder = SentenceTransformer("all-MiniLM-L6-v2", device='cpu')
-        print("✅ SentenceTransformer loaded successfully!")
-    except Exception as e:
-        print(f"❌ Error loading SentenceTransformer: {e}")
-        embedder = None
+        with open("data/config/app_config.json", "r", encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError) as e:
+        print(f"⚠️ Could not load app config: {e}")
+        return {}
+
+app_config = load_app_config()
+ollama_config = app_config.get('ai', {}).get('ollama', {})
+
+# Token-bucket limits per client and route (api.rate_limiting in app_config.json)
+rate_limiter = RateLimiter.from_config(app_config.get('api', {}).get('rate_limiting'))
+# Proxies in front of the app whose X-Forwarded-For entries are trusted
+RATE_LIMIT_TRUST_PROXY = int(os.getenv('RATE_LIMIT_TRUST_PROXY', '0'))
 
-# Load travel data
-def read_travel_data():
-    """Load travel data from JSON file"""
+def rate_limit_client():
+    """Bucket owner: the logged-in user, else the client's IP"""
+    if 'user_id' in session:
+        return f"user:{session['user_id']}"
+    return client_address(request.remote_addr, request.headers.get('X-Forwarded-For'), RATE_LIMIT_TRUST_PROXY)
+
+init_rate_limiting(app, rate_limiter, rate_limit_client)
+if rate_limiter.enabled:
+    print(f"🚦 Rate limiting on: {rate_limiter.default.requests_per_minute:.0f}/min per client "
+          f"({rate_limiter.backend.name} backend, {len(rate_limiter.routes)} route policies)")
+
+# Ollama configuration
+OLLAMA_SERVER = os.getenv("OLLAMA_SERVER", "http://127.0.0.1:11434")
+OLLAMA_CHAT_MODEL = os.getenv("OLLAMA_CHAT_MODEL", ollama_config.get('models', {}).get('default', 'llama2'))
+
+# Short questions go to the small model, planning and long requests to
+# OLLAMA_CHAT_MODEL, within each request's latency budget (ai.ollama.routing)
+model_router = ModelRouter.from_config(ollama_config, OLLAMA_CHAT_MODEL, os.getenv('OLLAMA_SMALL_MODEL'))
+
+# At most OLLAMA_MAX_CONCURRENCY generations run at once; the rest wait in a FIFO queue
+# Preload the chat model at start, keep it resident between chats
+# (OLLAMA_KEEP_ALIVE) and pin it during OLLAMA_PIN_HOURS, e.g. "9-21"
+ollama_model = ModelLifecycle(
+    OLLAMA_SERVER,
+    OLLAMA_CHAT_MODEL,
+    keep_alive=os.getenv('OLLAMA_KEEP_ALIVE', '30m'),
+    pin_hours=os.getenv('OLLAMA_PIN_HOURS', ''),
+    refresh_interval=int(os.getenv('OLLAMA_KEEPALIVE_REFRESH', '300'))
+)
+if os.getenv('OLLAMA_PRELOAD', '1') != '0':
+    at_worker_start(ollama_model.start)
+
+ollama_gateway = OllamaGateway(
+    OLLAMA_SERVER,
+    max_concurrency=int(os.getenv('OLLAMA_MAX_CONCURRENCY', '2')),
+    max_queue=int(os.getenv('OLLAMA_MAX_QUEUE', '32')),
+    lifecycle=ollama_model
+)
+
+# The routed small model is preloaded and kept warm the same way; if Ollama
+# does not have it, routing is switched off (every request goes to OLLAMA_CHAT_MODEL)
+small_ollama_model = None
+if model_router.enabled:
+    small_ollama_model = ModelLifecycle(
+        OLLAMA_SERVER,
+        model_router.tiers['small'],
+        keep_alive=os.getenv('OLLAMA_KEEP_ALIVE', '30m'),
+        pin_hours=os.getenv('OLLAMA_PIN_HOURS', ''),
+        refresh_interval=int(os.getenv('OLLAMA_KEEPALIVE_REFRESH', '300')),
+        on_missing=model_router.mark_missing
+    )
+    ollama_gateway.add_lifecycle(small_ollama_model)
+    if os.getenv('OLLAMA_PRELOAD', '1') != '0':
+        at_worker_start(small_ollama_model.start)
+
+# Concurrent query embeddings are queued and encoded together in small batches
+EMBED_MAX_BATCH_SIZE = int(os.getenv('EMBED_MAX_BATCH_SIZE', '32'))
+EMBED_MAX_WAIT_MS = float(os.getenv('EMBED_MAX_WAIT_MS', '5'))
+
+# Travel documents, BM25 index and embedding search for the assistant chat
+# (see assistant_pipeline.py, shared with async_app.py). Corpus embeddings
+# come prebuilt with the corpus, or are computed once per data.json version;
+# either way they are memory-mapped from disk. VECTOR_INDEX_BACKEND: 'exact',
+# 'ivf' or 'auto' (IVF once the corpus is large); HYBRID_SEARCH=0 turns off
+# fusing BM25 with the embedding ranking.
+VECTOR_INDEX_BACKEND = os.getenv('VECTOR_INDEX_BACKEND', 'auto')
+HYBRID_SEARCH = os.getenv('HYBRID_SEARCH', '1') != '0'
+retriever = TravelRetriever(embedding_model, VECTOR_INDEX_BACKEND, HYBRID_SEARCH,
+                            EMBED_MAX_BATCH_SIZE, EMBED_MAX_WAIT_MS)
+
+# EMBEDDINGS_PRELOAD=0 defers loading until the first chat message needs it
+EMBEDDINGS_PRELOAD = os.getenv('EMBEDDINGS_PRELOAD', '1') != '0'
+if EMBEDDINGS_PRELOAD:
+    at_worker_start(embedding_model.start)
+
+# Prompt token counting: load tiktoken in the background instead of on the first chat
+at_worker_start(warm_encoding)
+
+def load_chatbot_config():
+    """Load data/config/chatbot_config.json (empty dict if missing)"""
     try:
-        with open("data.json", "r", encoding='utf-8') as f:
+        with open("data/config/chatbot_config.json", "r", encoding='utf-8') as f:
             return json.load(f)
-    except FileNotFoundError:
-        print("⚠️ data.json not found, using built-in travel data")
-        return [
-            {
-                "name": "Taj Mahal",
-                "location": "Agra, India",
-                "description": "Iconic white marble mausoleum, symbol of love",
-                "price": "₹500 for Indians, ₹1100 for foreigners",
-                "best_time": "October to March",
-                "tips": "Visit at sunrise for best experience, closed on Fridays"
-            },
-            {
-                "name": "Goa Beaches",
-                "location": "Goa, India", 
-                "description": "Pristine beaches with vibrant nightlife",
-                "price": "₹2000-5000 per day",
-                "best_time": "November to March",
-                "tips": "North Goa for parties, South Goa for peace"
-            },
-            {
-                "name": "Kerala Backwaters",
-                "location": "Kerala, India",
-                "description": "Serene houseboat experience in God's Own Country",
-                "price": "₹4000-12000 per night",
-                "best_time": "September to March", 
-                "tips": "Book houseboat in advance, try local cuisine"
-            }
-        ]
-    except Exception as e:
-        print(f"Error reading travel data: {e}")
-        return []
-
-# Load travel documents
-travel_data = read_travel_data()
-travel_documents = []
-for item in travel_data:
-    doc = f"Name: {item.get('name', '')}\nLocation: {item.get('location', '')}\nDescription: {item.get('description', '')}\nPrice: {item.get('price', '')}\nBest Time: {item.get('best_time', '')}\nTips: {item.get('tips', '')}"
-    travel_documents.append(doc)
-
-print(f"📚 Loaded {len(travel_documents)} travel documents")
-
-# Search functions
-def get_embedding(text: str):
-    if embedder:
-        return embedder.encode(text, convert_to_tensor=False).tolist()
-    return None
-
-def keyword_search(query, docs, top_k=3):
-    """Fallback keyword-based search"""
-    if not docs:
-        return []
-    
-    query_words = set(query.lower().split())
-    scores = []
-    
-    for doc in docs:
-        doc_words = set(doc.lower().split())
-        exact_matches = len(query_words.intersection(doc_words))
-        partial_matches = sum(1 for qw in query_words 
-                            if any(qw in dw for dw in doc_words))
-        total_score = exact_matches + (partial_matches * 0.5)
-        scores.append((doc, total_score))
-    
-    scored_docs = sorted(scores, key=lambda x: x[1], reverse=True)
-    return [doc for doc, score in scored_docs[:top_k] if score > 0]
-
-def search_travel_docs(query, top_k=3):
-    """Search travel documents using embeddings or keywords"""
-    if embedder and travel_documents:
-        try:
-            query_emb = get_embedding(query)
-            if query_emb:
-                doc_embeddings = [get_embedding(doc) for doc in travel_documents]
-                scores = []
-                for doc_emb in doc_embeddings:
-                    if doc_emb:
-                        similarity = np.dot(query_emb, doc_emb) / (np.linalg.norm(query_emb) * np.linalg.norm(doc_emb))
-                        scores.append(similarity)
-                    else:
-                        scores.append(0)
-                
-                ranked = sorted(zip(travel_documents, scores), key=lambda x: x[1], reverse=True)
-                return [doc for doc, _ in ranked[:top_k]]
-        except Exception as e:
-            print(f"Embedding search failed: {e}")
-    
-    # Fallback to keyword search
-    return keyword_search(query, travel_documents, top_k)
+    except (FileNotFoundError, json.JSONDecodeError) as e:
+        print(f"⚠️ Could not load chatbot config: {e}")
+        return {}
+
+chatbot_config = load_chatbot_config()
+
+# Rule-based fallback answers and suggestions ("intent_router" in chatbot_config.json)
+intent_router = IntentRouter(chatbot_config.get('intent_router', {}))
+
+# Semantic cache of AI answers (performance.enable_caching / cache_duration in chatbot_config.json)
+performance_config = chatbot_config.get('performance', {})
+semantic_cache = None
+if performance_config.get('enable_caching', True):
+    semantic_cache = SemanticCache(
+        threshold=float(os.getenv('SEMANTIC_CACHE_THRESHOLD', '0.92')),
+        ttl=performance_config.get('cache_duration', 3600),
+        max_entries=int(os.getenv('SEMANTIC_CACHE_SIZE', '512'))
+    )
+
+# Total time for one chat answer, shared by retrieval, the Ollama queue and
+# generation (or the travel_bot hop); forwarded as X-Request-Deadline-Ms
+CHAT_DEADLINE_MS = chat_deadline_ms()
+
+# Prompt size cap (system prompt + documents + history + question), in tokens
+CHAT_PROMPT_TOKEN_BUDGET = int(os.getenv('CHAT_PROMPT_TOKEN_BUDGET', '1536'))
+chat_prompt_tokens = Histogram([128, 256, 512, 768, 1024, 1536, 2048, 3072, 4096])
+
+# Per-stage chat timings (retrieval with its embed step, prompt, cache_lookup,
+# queue, generation, ttft), aggregated per model and per search method.
+# A request with "debug": true gets its own breakdown in a 'debug' field.
+chat_stage_metrics = StageMetrics(['model', 'search_method'])
+
+# Admission control for the AI chat endpoints: an AIMD limit on requests in
+# flight that backs off when chats get slow or Ollama is overloaded. Requests
+# over the limit get the local rule-based answer at once (see admission.py).
+chat_limiter = AdaptiveLimiter(
+    initial=int(os.getenv('CHAT_LIMIT_INITIAL', '8')),
+    max_limit=int(os.getenv('CHAT_LIMIT_MAX', '32')),
+    target_ms=float(os.getenv('CHAT_LIMIT_TARGET_MS', '10000'))
+)
+
+# Fallback reasons that mean the AI path is overloaded
+OVERLOAD_REASONS = {'ollama_busy', 'timeout', 'deadline'}
+
+def note_fallback(reason):
+    """Tell the admission limiter when a chat fell back because of overload"""
+    if reason in OVERLOAD_REASONS and 'chat_admission' in g:
+        g.chat_admission['overloaded'] = True
+
+def note_first_token(ttft_ms):
+    """Streaming chats: the first token's latency is the admission limiter's sample"""
+    if 'chat_admission' in g:
+        g.chat_admission.setdefault('ttft_ms', ttft_ms)
+
+def shed_chat_response(user_input, stream=False):
+    """Immediate local answer for a chat request over the admission limit"""
+    route = intent_router.route('local', user_input)
+    body = {
+        'success': True,
+        'response': route.response,
+        'suggestions': route.suggestions,
+        'timestamp': datetime.now().isoformat(),
+        'ai_powered': False,
+        'shed': True
+    }
+    if not stream:
+        return jsonify(body)
+    events = sse_event('token', {'content': route.response}) + sse_event('done', body)
+    return Response(events, mimetype='text/event-stream', headers=SSE_HEADERS)
+
+def admission_controlled(stream=False):
+    """Run the chat view only if chat_limiter admits the request; release the
+    slot when the response (or its stream) is finished"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            data = request.get_json(silent=True) or {}
+            user_input = str(data.get('user_input', '')).strip()
+            if not user_input:
+                return view(*args, **kwargs)   # validation error, nothing to admit
+            if not chat_limiter.try_acquire():
+                return shed_chat_response(user_input, stream)
+
+            state = g.chat_admission = {'overloaded': False}
+            started = time.perf_counter()
+            release = lambda: chat_limiter.release((time.perf_counter() - started) * 1000, state['overloaded'])
+            try:
+                response = app.make_response(view(*args, **kwargs))
+            except Exception:
+                state['overloaded'] = True
+                release()
+                raise
+            if response.is_streamed:
+                # A stream lasts as long as the generation, so it is judged by its
+                # time to first token (no sample if no token was sent)
+                response.call_on_close(lambda: chat_limiter.release(state.get('ttft_ms'), state['overloaded']))
+            else:
+                release()
+            return response
+        return wrapper
+    return decorator
 
 # Replace your existing /api/chat route with this enhanced version
 @app.route('/api/chat', methods=['POST'])
+@admission_controlled()
 def enhanced_ai_chat():
     """Enhanced AI Chat with Ollama integration and travel context"""
     try:
@@ -956,66 +1020,103 @@ def enhanced_ai_chat():
             }), 400
         
         print(f"🤖 Enhanced AI Chat request: {user_input}")
+        timer = StageTimer()
+        deadline = Deadline.from_headers(request.headers, CHAT_DEADLINE_MS, CHAT_DEADLINE_MS)
         
         # Search for relevant travel documents
-        relevant_docs = search_travel_docs(user_input)
+        with timer.stage('retrieval'):
+            query_vec = retriever.embed_query(user_input, timer, deadline)
+            relevant_docs = retriever.search(user_input, query_vec, timer=timer)
         context = "\n".join(relevant_docs) if relevant_docs else ""
-        
-        # Enhanced system prompt for travel assistance
-        system_prompt = f"""You are AtithiBot, an expert Indian travel assistant for AtithiVerse platform.
-
-CONTEXT INFORMATION:
-{context}
-
-INSTRUCTIONS:
-- Provide specific, actionable travel advice for India
-- Include approximate costs in Indian Rupees (₹) when relevant
-- Mention best times to visit and practical tips
-- Be enthusiastic about Indian culture and destinations
-- Keep responses under 250 words for better readability
-- Use emojis to make responses engaging
-- Always end with a helpful question to continue the conversation
-
-If the user asks about destinations, provide specific details about costs, timing, and insider tips.
-If no context is available, provide general travel advice for India."""
+        with timer.stage('prompt'):
+            route = intent_router.route('assistant', user_input, context, relevant_docs)
+            messages, prompt_info = build_chat_messages(
+                build_system_prompt, user_input, relevant_docs,
+                data.get('conversation_history', []), CHAT_PROMPT_TOKEN_BUDGET
+            )
+        chat_prompt_tokens.observe(prompt_info['prompt_tokens'])
+        timer.set(prompt_tokens=prompt_info['prompt_tokens'])
+        # Follow-up questions depend on the conversation, so only standalone ones are cached
+        use_cache = semantic_cache and not (prompt_info['history_turns'] or prompt_info['summarized_turns'])
+
+        # Near-duplicate question with the same context: reuse the stored answer
+        with timer.stage('cache_lookup'):
+            cached = semantic_cache.lookup(user_input, relevant_docs, query_vec) if use_cache else None
+        if cached:
+            timer.set(model='cache', cached=True)
+            chat_stage_metrics.observe(timer)
+            return jsonify({
+                'success': True,
+                'response': cached['response'],
+                'suggestions': route.suggestions,
+                'timestamp': datetime.now().isoformat(),
+                'ai_powered': True,
+                'cached': True,
+                'context_used': len(relevant_docs) > 0,
+                'context_docs': prompt_info['context_docs'],
+                'search_method': timer.fields['search_method'],
+                **debug_field(data, timer)
+            })
 
         # Try Ollama AI first
         ai_response = None
-        try:
-            payload = {
-                "model": OLLAMA_CHAT_MODEL,
-                "messages": [
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_input}
-                ],
-                "stream": False
-            }
-            
-            print(f"🔗 Calling Ollama at {OLLAMA_SERVER}")
-            response = requests.post(f"{OLLAMA_SERVER}/api/chat", json=payload, timeout=25)
-            
-            if response.status_code == 200:
-                completion = response.json()
-                ai_response = completion["message"]["content"]
+        choice = model_router.choose(user_input, intent_router.intents_in(user_input),
+                                     data.get('latency_budget_ms'), deadline.remaining_ms())
+        timer.set(model=choice.model)
+        fallback_reason = None
+        generation_started = time.perf_counter()
+        if not deadline.can_afford(MIN_GENERATION_MS + HOP_RESERVE_MS):
+            # Not enough of the request's budget left for a generation: answer locally now
+            fallback_reason = 'deadline'
+            print(f"⏰ {deadline.remaining_ms():.0f}ms left, skipping Ollama")
+        else:
+            try:
+                print(f"🔗 Calling Ollama {choice.model} ({choice.reason}) at {OLLAMA_SERVER} "
+                      f"({prompt_info['prompt_tokens']} prompt tokens)")
+                try:
+                    ai_response = ollama_gateway.chat(choice.model, messages, timeout=deadline.timeout(),
+                                                      deadline=deadline.child(), timer=timer)
+                except requests.exceptions.RequestException as e:
+                    retry = missing_model_retry(model_router, choice, e, deadline)
+                    if retry is None:
+                        raise
+                    choice = retry
+                    timer.set(model=choice.model)
+                    generation_started = time.perf_counter()
+                    ai_response = ollama_gateway.chat(choice.model, messages, timeout=deadline.timeout(),
+                                                      deadline=deadline.child(), timer=timer)
+                generation_ms = (time.perf_counter() - generation_started) * 1000
+                model_router.record(choice, generation_ms, ai_response)
                 print(f"✅ Ollama response received: {len(ai_response)} chars")
-            else:
-                print(f"❌ Ollama error: {response.status_code}")
+                if use_cache and ai_response:
+                    semantic_cache.store(user_input, relevant_docs, ai_response, generation_ms, query_vec)
+                if not ai_response:
+                    fallback_reason = 'empty_response'
                 
-        except requests.exceptions.RequestException as e:
-            print(f"⚠️ Ollama connection failed: {e}")
-        except Exception as e:
-            print(f"❌ Ollama error: {e}")
+            except requests.exceptions.RequestException as e:
+                model_router.record(choice, 0, error=True)
+                fallback_reason = fallback_reason_for(e)
+                if fallback_reason == 'model_missing':
+                    model_router.mark_missing(choice.model)
+                print(f"⚠️ Ollama connection failed: {e}")
+            except Exception as e:
+                model_router.record(choice, 0, error=True)
+                fallback_reason = fallback_reason_for(e)
+                print(f"❌ Ollama error: {e}")
         
         # Use AI response or enhanced fallback
         if ai_response:
             final_response = ai_response
             ai_powered = True
         else:
-            final_response = get_smart_travel_fallback(user_input, context)
+            final_response = route.response
             ai_powered = False
+            timer.set(fallback_reason=fallback_reason)
+            note_fallback(fallback_reason)
+        chat_stage_metrics.observe(timer)
         
         # Generate smart suggestions
-        suggestions = get_contextual_suggestions(user_input, relevant_docs)
+        suggestions = route.suggestions
         
         return jsonify({
             'success': True,
@@ -1023,8 +1124,13 @@ If no context is available, provide general travel advice for India."""
             'suggestions': suggestions,
             'timestamp': datetime.now().isoformat(),
             'ai_powered': ai_powered,
+            'cached': False,
             'context_used': len(relevant_docs) > 0,
-            'search_method': 'embeddings' if embedder else 'keyword'
+            'context_docs': prompt_info['context_docs'],
+            'prompt_tokens': prompt_info['prompt_tokens'],
+            'model': choice.model if ai_powered else None,
+            'search_method': timer.fields['search_method'],
+            **debug_field(data, timer)
         })
         
     except Exception as e:
@@ -1034,117 +1140,150 @@ If no context is available, provide general travel advice for India."""
             'error': 'AI chat service temporarily unavailable'
         }), 500
 
-def get_smart_travel_fallback(user_input, context):
-    """Enhanced fallback responses with travel context"""
-    input_lower = user_input.lower()
+def routed_stream_chat(choice, messages, deadline, timer):
+    """ollama_gateway.stream_chat() with missing_model_retry(): on a retry,
+    yields {"rerouted": <new choice>} before the large model's chunks"""
+    try:
+        yield from ollama_gateway.stream_chat(choice.model, messages, timeout=deadline.timeout(),
+                                              deadline=deadline.child(), timer=timer)
+    except requests.exceptions.RequestException as e:
+        retry = missing_model_retry(model_router, choice, e, deadline)
+        if retry is None:
+            raise
+        yield {'rerouted': retry}
+        yield from ollama_gateway.stream_chat(retry.model, messages, timeout=deadline.timeout(),
+                                              deadline=deadline.child(), timer=timer)
+
+def debug_field(data, timer):
+    """{'debug': per-stage timings} when the request asked for it ("debug": true)"""
+    return {'debug': timer.report()} if data.get('debug') else {}
+
+# Time-to-first-token per streaming path ('direct' = Ollama, 'bot_proxy' = via travel_bot)
+chat_ttft_ms = HistogramFamily()
+
+@app.route('/api/chat/stream', methods=['POST'])
+@admission_controlled(stream=True)
+def stream_ai_chat():
+    """Streaming version of /api/chat, forwarding Ollama's tokens as Server-Sent Events.
+    Emits 'queued' ({queue_position, estimated_wait_ms}) while waiting for an
+    Ollama slot, 'token' events ({content}) and a final 'done' event with the
+    full response, suggestions and metadata.
+    """
+    data = request.get_json(silent=True) or {}
+    user_input = data.get('user_input', '').strip()
     
-    # Use context if available
-    if context and any(word in input_lower for word in ['taj mahal', 'goa', 'kerala']):
-        return f"🏛️ Based on our travel database:\n\n{context[:400]}...\n\nWould you like more specific information about visiting times or costs? 🤔"
+    if not user_input:
+        return jsonify({
+            'success': False,
+            'error': 'Please enter a message'
+        }), 400
     
-    # Context-aware responses
-    if 'popular' in input_lower and 'destination' in input_lower:
-        return """🏛️ **India's Most Popular Destinations:**
-
-✨ **Golden Triangle**:
-• **Delhi**: Red Fort, India Gate (₹30-500)
-• **Agra**: Taj Mahal (₹500 Indians, ₹1100 foreigners)  
-• **Jaipur**: City Palace, Amber Fort (₹400-500)
-
-🏖️ **Beach Paradise**:
-• **Goa**: ₹2,000-5,000/day (Nov-Mar best)
-• **Kerala**: Backwaters ₹4,000-12,000/night
-• **Andaman**: Crystal waters, diving
-
-🏔️ **Mountain Escapes**:
-• **Himachal**: Shimla, Manali (Apr-Jun)
-• **Kashmir**: Dal Lake, houseboats
-• **Uttarakhand**: Rishikesh yoga retreats
-
-Which type excites you most? 🗺️"""
-
-    elif any(word in input_lower for word in ['hello', 'hi', 'namaste']):
-        return """👋 **Namaste! I'm AtithiBot, your AI travel guide!**
-
-🇮🇳 I specialize in **Indian travel** with real-time insights and personalized recommendations!
-
-🎯 **I can help with**:
-• 🏛️ **Destination guides** with costs & timing
-• ✈️ **Trip planning** & custom itineraries
-• 💰 **Budget optimization** & money-saving tips
-• 📅 **Seasonal advice** & weather insights
-• 🍛 **Cultural experiences** & local secrets
-
-✨ **Try asking**:
-• "Show me popular destinations"
-• "Plan a 7-day North India trip"
-• "Best time to visit Kerala?"
-
-What adventure can I help you plan? 🗺️"""
-
-    elif any(word in input_lower for word in ['plan', 'trip', 'itinerary']):
-        return """✈️ **Let's Create Your Perfect Indian Journey!**
-
-🎯 **Tell me about**:
-
-📅 **Duration**: How many days?
-• 3-5 days: Single city/region
-• 7-10 days: Golden Triangle or regional tour
-• 2+ weeks: Multi-region exploration
-
-🎨 **Interests**:
-• 🏛️ **Heritage**: Palaces, forts, temples
-• 🏖️ **Relaxation**: Beaches, backwaters
-• 🏔️ **Adventure**: Trekking, mountains
-• 🕉️ **Spirituality**: Varanasi, Rishikesh
-
-💰 **Budget**: 
-• Budget: ₹2,000-4,000/day
-• Comfort: ₹5,000-10,000/day
-• Luxury: ₹15,000+/day
-
-Share your preferences for a personalized itinerary! 🌟"""
-
-    else:
-        return """🇮🇳 **Welcome to Incredible India with AtithiBot!**
-
-I'm your **AI-powered travel expert** with access to real travel data and current insights! 🤖✨
-
-🎯 **Instant Help With**:
-• 📍 **Destination Info**: Costs, timing, tips
-• 🗓️ **Trip Planning**: Custom itineraries
-• 💰 **Budget Advice**: Money-saving strategies
-• 🌤️ **Weather Guidance**: Best travel times
-• 🍛 **Cultural Tips**: Local experiences
-
-**🎪 Popular Queries**:
-• "Popular destinations in India"
-• "Plan a ₹50,000 budget trip"
-• "Best time for Kerala backwaters"
-
-What aspect of India would you like to explore? 🗺️🎉"""
-
-def get_contextual_suggestions(user_input, docs):
-    """Generate smart suggestions based on input and context"""
-    input_lower = user_input.lower()
+    started = time.perf_counter()
+    timer = StageTimer()
+    deadline = Deadline.from_headers(request.headers, CHAT_DEADLINE_MS, CHAT_DEADLINE_MS)
+    with timer.stage('retrieval'):
+        query_vec = retriever.embed_query(user_input, timer, deadline)
+        relevant_docs = retriever.search(user_input, query_vec, timer=timer)
+    context = "\n".join(relevant_docs) if relevant_docs else ""
+    with timer.stage('prompt'):
+        route = intent_router.route('assistant', user_input, context, relevant_docs)
+        messages, prompt_info = build_chat_messages(
+            build_system_prompt, user_input, relevant_docs,
+            data.get('conversation_history', []), CHAT_PROMPT_TOKEN_BUDGET
+        )
+    chat_prompt_tokens.observe(prompt_info['prompt_tokens'])
+    timer.set(prompt_tokens=prompt_info['prompt_tokens'])
+    use_cache = semantic_cache and not (prompt_info['history_turns'] or prompt_info['summarized_turns'])
     
-    # Context-based suggestions
-    if docs and any('taj mahal' in doc.lower() for doc in docs):
-        return ["2-day Agra itinerary", "Best Taj Mahal timings", "Agra Fort combo", "Photography tips"]
-    elif docs and any('goa' in doc.lower() for doc in docs):
-        return ["North vs South Goa", "Beach activities", "Nightlife spots", "Monsoon travel"]
-    elif docs and any('kerala' in doc.lower() for doc in docs):
-        return ["Houseboat booking", "Hill stations", "Ayurveda spas", "Cuisine guide"]
+    with timer.stage('cache_lookup'):
+        cached = semantic_cache.lookup(user_input, relevant_docs, query_vec) if use_cache else None
+    choice = None if cached else model_router.choose(
+        user_input, intent_router.intents_in(user_input), data.get('latency_budget_ms'), deadline.remaining_ms())
+    timer.set(model=choice.model if choice else 'cache', cached=bool(cached))
     
-    # Input-based suggestions
-    if 'popular' in input_lower:
-        return ["Golden Triangle tour", "Beach destinations", "Mountain retreats", "Cultural circuits"]
-    elif any(word in input_lower for word in ['plan', 'trip']):
-        return ["7-day itineraries", "Budget planning", "Best seasons", "Transportation"]
-    elif any(word in input_lower for word in ['budget', 'cost']):
-        return ["Money-saving tips", "Budget destinations", "Free attractions", "Local transport"]
-    else:
-        return ["Popular destinations", "Trip planning", "Best travel time", "Cultural experiences"]
+    def generate():
+        nonlocal choice
+        parts = []
+        ttft_ms = None
+        ai_powered = True
+        truncated = False
+        generation_started = time.perf_counter()
+        try:
+            if cached:
+                parts.append(cached['response'])
+                ttft_ms = round((time.perf_counter() - started) * 1000, 1)
+                note_first_token(ttft_ms)
+                yield sse_event('token', {'content': cached['response']})
+                chunks = []
+            elif not deadline.can_afford(MIN_GENERATION_MS + HOP_RESERVE_MS):
+                raise DeadlineExceeded(f"{deadline.remaining_ms():.0f}ms left, skipping Ollama")
+            else:
+                chunks = routed_stream_chat(choice, messages, deadline, timer)
+            for chunk in chunks:
+                if chunk.get('rerouted'):
+                    choice = chunk['rerouted']
+                    timer.set(model=choice.model)
+                    generation_started = time.perf_counter()
+                    continue
+                if chunk.get('queued'):
+                    yield sse_event('queued', {
+                        'queue_position': chunk['queue_position'],
+                        'estimated_wait_ms': chunk['estimated_wait_ms']
+                    })
+                    continue
+                content = chunk.get('message', {}).get('content', '')
+                if not content:
+                    continue
+                if ttft_ms is None:
+                    ttft_ms = round((time.perf_counter() - started) * 1000, 1)
+                    chat_ttft_ms.observe('direct', ttft_ms)
+                    note_first_token(ttft_ms)
+                    timer.add('ttft', ttft_ms)
+                parts.append(content)
+                yield sse_event('token', {'content': content})
+        except Exception as e:
+            print(f"⚠️ Ollama stream failed: {e}")
+            reason = fallback_reason_for(e)
+            note_fallback(reason)
+            if choice and reason == 'model_missing':
+                model_router.mark_missing(choice.model)
+            if parts:
+                truncated = True
+                timer.set(truncated_reason=reason)
+            else:
+                ai_powered = False
+                timer.set(fallback_reason=reason)
+                fallback = route.response
+                parts.append(fallback)
+                yield sse_event('token', {'content': fallback})
+        
+        if choice and timer.fields.get('fallback_reason') != 'deadline':
+            model_router.record(choice, (time.perf_counter() - generation_started) * 1000,
+                                ''.join(parts), error=not ai_powered, truncated=truncated)
+        if use_cache and ai_powered and not truncated and not cached and parts:
+            semantic_cache.store(user_input, relevant_docs, ''.join(parts),
+                                 (time.perf_counter() - started) * 1000, query_vec)
+        chat_stage_metrics.observe(timer)
+        
+        yield sse_event('done', {
+            'success': True,
+            'response': ''.join(parts),
+            'suggestions': route.suggestions,
+            'timestamp': datetime.now().isoformat(),
+            'ai_powered': ai_powered,
+            'truncated': truncated,
+            'cached': bool(cached),
+            'context_used': len(relevant_docs) > 0,
+            'context_docs': prompt_info['context_docs'],
+            'prompt_tokens': prompt_info['prompt_tokens'],
+            'model': choice.model if choice and ai_powered else None,
+            'search_method': timer.fields['search_method'],
+            'ttft_ms': ttft_ms,
+            'total_ms': round((time.perf_counter() - started) * 1000, 1),
+            **debug_field(data, timer)
+        })
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers=SSE_HEADERS)
 
 # ===== CONTACT & NEWSLETTER =====
 
@@ -1243,131 +1382,116 @@ def subscribe_newsletter():
 
 # ===== AI CHATBOT ROUTES =====
 
-@app.route('/api/chat', methods=['POST'])
-def api_chat():
-    """AI Chatbot endpoint - integrates with travel_bot.py service"""
-    try:
-        data = request.get_json()
-        
-        if not data or 'user_input' not in data:
-            return jsonify({
-                'success': False,
-                'error': 'Missing user_input in request'
-            }), 400
-        
-        user_input = data['user_input']
-        conversation_history = data.get('conversation_history', [])
-        user_id = data.get('user_id')
-        
-        # Try to connect to the AI service (travel_bot.py on port 5001)
-        try:
-            ai_response = requests.post(
-                'http://127.0.0.1:5001/travel-chat',
-                json={
-                    'user_input': user_input,
-                    'context': {
-                        'user_id': user_id,
-                        'conversation_history': conversation_history
-                    }
-                },
-                timeout=30
-            )
-            
-            if ai_response.status_code == 200:
-                ai_data = ai_response.json()
-                return jsonify({
-                    'success': True,
-                    'response': ai_data.get('response', 'Sorry, I could not generate a response.'),
-                    'ai_powered': ai_data.get('ai_powered', True),
-                    'suggestions': ai_data.get('suggestions', [])
-                })
-            else:
-                raise Exception(f"AI service returned status {ai_response.status_code}")
-                
-        except requests.exceptions.RequestException as e:
-            print(f"⚠️ AI service connection failed: {e}")
-            # Fallback to local responses
-            fallback_response = get_local_fallback_response(user_input)
-            return jsonify({
-                'success': True,
-                'response': fallback_response,
-                'ai_powered': False,
-                'suggestions': get_local_suggestions(user_input)
-            })
-        
-    except Exception as e:
-        print(f"❌ Error in /api/chat endpoint: {e}")
+# How /api/chat/bot-stream reaches travel_bot.py: BOT_TRANSPORT=http (keep-alive),
+# unix or inprocess (which reuses this process's embedder and Ollama gateway)
+bot_transport = create_transport(
+    embedding_model=embedding_model,
+    ollama_model=ollama_model,
+    ollama_gateway=ollama_gateway
+)
+
+@app.route('/api/chat/bot-stream', methods=['POST'])
+@admission_controlled(stream=True)
+def stream_bot_chat():
+    """Streaming chat through the travel_bot.py service, relaying its SSE stream"""
+    data = request.get_json(silent=True) or {}
+    
+    if 'user_input' not in data:
         return jsonify({
             'success': False,
-            'error': 'Internal server error'
-        }), 500
-
-def get_local_fallback_response(user_input):
-    """Local fallback responses when AI service is unavailable"""
-    input_lower = user_input.lower()
-    
-    if any(word in input_lower for word in ['hello', 'hi', 'hey']):
-        return "👋 Hello! I'm AtithiBot, your travel assistant for Incredible India! I can help you with destinations, travel tips, and planning your perfect trip. What would you like to explore today?"
-    
-    elif any(word in input_lower for word in ['taj mahal', 'agra']):
-        return "🏛️ The Taj Mahal is absolutely stunning! Entry costs ₹500 for Indians, ₹1100 for foreigners. Best visited at sunrise (6 AM) or sunset. Don't miss the Agra Fort nearby! Planning a visit?"
+            'error': 'Missing user_input in request'
+        }), 400
     
-    elif any(word in input_lower for word in ['goa', 'beach']):
-        return "🏖️ Goa is perfect year-round! North Goa (Baga, Calangute) for nightlife, South Goa (Palolem, Arambol) for peace. November-March is ideal weather. Budget ₹2,000-4,000/day. What interests you most?"
-    
-    elif any(word in input_lower for word in ['kerala', 'backwater']):
-        return "🌴 Kerala backwaters are magical! Alleppey houseboats cost ₹3,000-12,000/night. October-March is perfect. Must-try: Ayurvedic massage, appam with curry, coconut water fresh from trees!"
-    
-    elif any(word in input_lower for word in ['rajasthan', 'jaipur', 'udaipur']):
-        return "🏰 Royal Rajasthan awaits! Jaipur (Pink City), Udaipur (Lake Palace), Jodhpur (Blue City). Palace hotels from ₹5,000/night. October-March best. Camel safaris, folk dances, incredible architecture!"
-    
-    elif any(word in input_lower for word in ['budget', 'cheap', 'cost']):
-        return "💰 India is incredibly budget-friendly! Daily costs: Hostels ₹500-1,500, Food ₹200-800, Transport ₹100-500, Attractions ₹50-500. Total ₹1,500-3,000/day comfortably!"
-    
-    elif any(word in input_lower for word in ['plan', 'trip', 'itinerary']):
-        return "✈️ I'd love to help plan your trip! Tell me: How many days? What interests you (history, beaches, mountains, culture)? Your budget range? Then I can suggest the perfect itinerary!"
-    
-    elif any(word in input_lower for word in ['book', 'booking', 'reserve']):
-        return "📅 You can book amazing experiences right here on AtithiVerse! We offer destination tours, hotel bookings, and complete travel packages. What would you like to book?"
+    user_input = data['user_input']
+    payload = {
+        'user_input': user_input,
+        'context': {
+            'user_id': data.get('user_id'),
+            'conversation_history': data.get('conversation_history', [])
+        }
+    }
+    started = time.perf_counter()
+    deadline = Deadline.from_headers(request.headers, CHAT_DEADLINE_MS, CHAT_DEADLINE_MS)
     
-    elif any(word in input_lower for word in ['best time', 'when', 'weather']):
-        return "🌤️ India's best travel times:\n• Oct-Mar: Pleasant weather, perfect for most places\n• Apr-Jun: Hot, ideal for hill stations\n• Jul-Sep: Monsoon, great for Kerala backwaters\nWhere are you planning to go?"
+    def generate():
+        relayed = False
+        first_token = False
+        try:
+            if not deadline.can_afford(MIN_GENERATION_MS + HOP_RESERVE_MS):
+                raise DeadlineExceeded(f"{deadline.remaining_ms():.0f}ms left, skipping AI service")
+            for chunk in bot_transport.stream(payload, timeout=deadline.timeout(), headers=deadline.headers()):
+                relayed = True
+                if not first_token and b'event: token' in chunk:
+                    ttft_ms = (time.perf_counter() - started) * 1000
+                    chat_ttft_ms.observe('bot_proxy', ttft_ms)
+                    note_first_token(ttft_ms)
+                    first_token = True
+                yield chunk
+        except requests.exceptions.RequestException as e:
+            print(f"⚠️ AI service stream failed: {e}")
+            note_fallback(fallback_reason_for(e))
+            if not relayed:
+                # Fallback to local responses
+                route = intent_router.route('local', user_input)
+                yield sse_event('token', {'content': route.response})
+                yield sse_event('done', {
+                    'success': True,
+                    'response': route.response,
+                    'ai_powered': False,
+                    'suggestions': route.suggestions
+                })
     
-    else:
-        return "🇮🇳 India offers incredible diversity! From the iconic Taj Mahal to serene Kerala backwaters, vibrant Goa beaches to royal Rajasthan palaces. What type of experience calls to you?"
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers=SSE_HEADERS)
 
-def get_local_suggestions(user_input):
-    """Generate local suggestions when AI service is unavailable"""
-    input_lower = user_input.lower()
-    
-    if any(word in input_lower for word in ['taj mahal', 'agra']):
-        return [
-            "Best time to visit Taj Mahal",
-            "Agra itinerary for 2 days",
-            "Hotels near Taj Mahal",
-            "Book Taj Mahal tour"
-        ]
-    elif any(word in input_lower for word in ['goa', 'beach']):
-        return [
-            "Best beaches in Goa",
-            "Goa nightlife guide",
-            "Water sports in Goa",
-            "Book Goa package"
-        ]
-    elif any(word in input_lower for word in ['budget']):
-        return [
-            "Budget India itinerary",
-            "Cheap places to stay",
-            "Free attractions in India",
-            "Budget food options"
-        ]
-    else:
-        return [
-            "Popular destinations",
-            "Best time to visit India",
-            "Budget travel tips",
-            "Plan my trip"
-        ]
+# ===== METRICS =====
+
+@app.route('/api/metrics')
+def get_metrics():
+    """Operational metrics for the chat pipeline"""
+    return jsonify({
+        'success': True,
+        'embedding_model': embedding_model.status(),
+        'embedding_service': retriever.stats(),
+        'chat_ttft_ms': chat_ttft_ms.snapshot(),
+        'semantic_cache': semantic_cache.stats() if semantic_cache else None,
+        'ollama_gateway': ollama_gateway.stats(),
+        'chat_prompt_tokens': chat_prompt_tokens.snapshot(),
+        'ollama_model': ollama_model.status(),
+        'ollama_small_model': small_ollama_model.status() if small_ollama_model else None,
+        'model_router': model_router.stats(),
+        'chat_stages': chat_stage_metrics.snapshot(),
+        'chat_admission': chat_limiter.stats(),
+        'rate_limiting': rate_limiter.stats(),
+        'bot_transport': bot_transport.name
+    })
+
+# ===== PROBES =====
+
+def database_check():
+    try:
+        conn = get_db_connection()
+        try:
+            conn.execute('SELECT 1 FROM users LIMIT 1')
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        return False, True, str(e)
+    return True, False, 'ok'
+
+@app.route('/healthz')
+def healthz():
+    """Liveness: the process is serving requests"""
+    return jsonify(liveness())
+
+@app.route('/readyz')
+def readyz():
+    """Readiness: database reachable, background model loading settled (503 while starting)"""
+    body, status = readiness({
+        'database': database_check(),
+        'embedding_model': embedding_check(embedding_model),
+        'ollama_model': lifecycle_check(ollama_model),
+    })
+    return jsonify(body), status
 
 # ===== TEMPLATE ROUTES =====
 
@@ -1391,12 +1515,16 @@ def register_page():
 def contact():
     return render_template('contact.html')
 
+# Rendered destination pages, keyed by destination, catalog version and review stats.
+# The page carries no per-user state: login/wishlist UI in base.html is filled in
+# client-side from /api/user, so one rendering can be shared by every visitor.
+DESTINATION_PAGE_CACHE_SIZE = int(os.getenv('DESTINATION_PAGE_CACHE_SIZE', '256'))
+destination_page_cache = FragmentCache(DESTINATION_PAGE_CACHE_SIZE)
+
 @app.route('/destination/<int:dest_id>')
 def destination_detail(dest_id):
     """Show detailed destination page with weather widget"""
     try:
-        print(f"🔍 Requesting destination ID: {dest_id}")
-        
         # Find destination in your hardcoded data
         destination = next((d for d in destinations if d.get('id') == dest_id), None)
         
@@ -1405,10 +1533,17 @@ def destination_detail(dest_id):
             flash('Destination not found', 'error')
             return redirect(url_for('index'))
         
-        print(f"✅ Found destination: {destination['name']}")
-        print(f"📊 Destination data keys: {list(destination.keys())}")
+        conn = get_db_connection()
+        aggregates = fetch_review_aggregates(conn, [dest_id])
+        conn.close()
+        destination = apply_review_aggregate(destination, aggregates.get(dest_id))
+        catalog.update(destination)
         
-        return render_template('destination_detail.html', destination=destination)
+        cache_key = (dest_id, catalog.version, destination['rating'], destination['reviews'])
+        return destination_page_cache.get_or_render(
+            cache_key,
+            lambda: render_template('destination_detail.html', destination=destination)
+        )
         
     except Exception as e:
         print(f"❌ ERROR in destination_detail: {e}")
@@ -0,0 +1,269 @@
+"""
+The assistant chat pipeline shared by app.py (WSGI) and async_app.py.
+
+Both servers answer /api/chat and /api/chat/stream. They retrieve from the
+same documents, build the same prompt and label fallbacks the same way
+through this module, so a question gets the same answer from either:
+
+    TravelRetriever      the travel documents (the corpus prebuilt by
+                         build_corpus.py, else data.json), their BM25 index
+                         and, once the embedding model has loaded, the
+                         memory-mapped embeddings behind a vector index
+    build_system_prompt  the assistant's system prompt around the context
+    fallback_reason_for  why an Ollama call ended in the rule-based answer
+    missing_model_retry  the large model to retry on when Ollama lacks the
+                         routed small one
+
+Query embeddings go through a BatchingEmbedder: embed_query() blocks for at
+most what the request's deadline allows, embed_query_async() awaits the
+same batched future from an event loop.
+"""
+
+import asyncio
+import json
+import os
+from concurrent.futures import TimeoutError as FutureTimeout
+
+import requests
+
+from corpus_embeddings import EMBEDDINGS_DIR, corpus_fingerprint, load_document_matrix, normalize_rows
+from deadlines import DeadlineExceeded, MIN_GENERATION_MS
+from embedding_service import BatchingEmbedder
+from lexical_index import BM25Index, reciprocal_rank_fusion
+from metrics import StageTimer
+from ollama_client import OllamaBusy
+from travel_corpus import load_corpus
+from vector_index import load_or_build_index
+
+# Longest wait for a query embedding when the request has no deadline
+EMBED_TIMEOUT = 10
+
+BUILTIN_TRAVEL_DATA = [
+    {
+        "name": "Taj Mahal",
+        "location": "Agra, India",
+        "description": "Iconic white marble mausoleum, symbol of love",
+        "price": "₹500 for Indians, ₹1100 for foreigners",
+        "best_time": "October to March",
+        "tips": "Visit at sunrise for best experience, closed on Fridays"
+    },
+    {
+        "name": "Goa Beaches",
+        "location": "Goa, India",
+        "description": "Pristine beaches with vibrant nightlife",
+        "price": "₹2000-5000 per day",
+        "best_time": "November to March",
+        "tips": "North Goa for parties, South Goa for peace"
+    },
+    {
+        "name": "Kerala Backwaters",
+        "location": "Kerala, India",
+        "description": "Serene houseboat experience in God's Own Country",
+        "price": "₹4000-12000 per night",
+        "best_time": "September to March",
+        "tips": "Book houseboat in advance, try local cuisine"
+    }
+]
+
+
+def read_travel_data(path="data.json"):
+    """Load travel data from JSON file"""
+    try:
+        with open(path, "r", encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        print("⚠️ data.json not found, using built-in travel data")
+        return BUILTIN_TRAVEL_DATA
+    except Exception as e:
+        print(f"Error reading travel data: {e}")
+        return []
+
+
+def travel_document(item):
+    return (f"Name: {item.get('name', '')}\nLocation: {item.get('location', '')}\n"
+            f"Description: {item.get('description', '')}\nPrice: {item.get('price', '')}\n"
+            f"Best Time: {item.get('best_time', '')}\nTips: {item.get('tips', '')}")
+
+
+class TravelRetriever:
+    """Documents, keyword index and (once the model is loaded) embedding search"""
+
+    def __init__(self, embedding_model, index_backend='auto', hybrid=True, max_batch_size=32, max_wait_ms=5):
+        self.embedding_model = embedding_model
+        self.model_name = embedding_model.model_name
+        self.index_backend = index_backend      # 'exact', 'ivf' or 'auto' (IVF once the corpus is large)
+        self.hybrid = hybrid                    # fuse BM25 and embedding rankings
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.matrix = None
+        self.index = None
+        self.embedding_service = None           # set once the embedding model is ready
+
+        # The corpus prebuilt by build_corpus.py (destinations, packages and
+        # data.json, chunked, with embeddings), else data.json as is
+        self.corpus = load_corpus()
+        if self.corpus is not None:
+            self.documents = self.corpus.texts
+            print(f"📚 Loaded corpus {self.corpus.version}: {len(self.documents)} passages")
+        else:
+            self.documents = [travel_document(item) for item in read_travel_data()]
+            print(f"📚 Loaded {len(self.documents)} travel documents (run build_corpus.py for the full corpus)")
+        self.lexical_index = BM25Index(self.documents)
+
+        # A prebuilt corpus needs no model for its index: load it now, so under
+        # the pre-fork server the master holds it and the workers share it copy-on-write
+        if self.documents and self.corpus and self.corpus.embeddings_for(self.model_name) is not None:
+            self.load_index()
+        embedding_model.on_ready(self._prepare)
+
+    def load_index(self, encode=None):
+        """Corpus embedding matrix and vector index: prebuilt with the corpus, else encoded with `encode`"""
+        try:
+            prebuilt = self.corpus.embeddings_for(self.model_name) if self.corpus else None
+            if prebuilt is not None:
+                self.matrix = prebuilt
+            else:
+                self.matrix = load_document_matrix(self.documents, encode, self.model_name)
+            print(f"✅ Document embeddings ready: {self.matrix.shape}")
+
+            index_path = os.path.join(
+                EMBEDDINGS_DIR,
+                f"{corpus_fingerprint(self.documents, self.model_name)}.{self.index_backend}.npz"
+            )
+            self.index = load_or_build_index(self.matrix, index_path, backend=self.index_backend)
+            print(f"✅ Vector index ready: {type(self.index).__name__} ({len(self.index)} vectors)")
+        except Exception as e:
+            print(f"❌ Error preparing document embeddings: {e}")
+            self.matrix = None
+            self.index = None
+
+    def _prepare(self, model):
+        """Runs on the loader thread once the model is loaded: build the corpus index if needed, then enable embeddings"""
+        if self.documents and self.index is None:
+            self.load_index(lambda docs: model.encode(docs, convert_to_numpy=True, batch_size=32))
+        self.embedding_service = BatchingEmbedder(model, self.max_batch_size, self.max_wait_ms)
+
+    def _embed_timeout(self, deadline):
+        """Seconds a query embedding may take, or None if embedding search is not available"""
+        # Lazy mode: kick off loading on first use (no-op if already started)
+        self.embedding_model.start()
+        if not (self.embedding_model.is_ready and self.index is not None and self.embedding_service):
+            return None
+        timeout = deadline.timeout(cap=EMBED_TIMEOUT) if deadline else EMBED_TIMEOUT
+        return timeout if timeout > 0 else None
+
+    def embed_query(self, query, timer=None, deadline=None):
+        """Normalized query embedding, or None while embeddings are unavailable.
+        `timer` gets the 'embed' time; the wait is bounded by `deadline`.
+        """
+        timeout = self._embed_timeout(deadline)
+        if timeout is None:
+            return None
+        try:
+            with (timer or StageTimer()).stage('embed'):
+                query_emb = self.embedding_service.encode(query, timeout=timeout)
+            return normalize_rows(query_emb)[0]
+        except FutureTimeout:
+            print(f"⏰ Query embedding took over {timeout:.1f}s, searching by keywords")
+        except Exception as e:
+            print(f"Query embedding failed: {e}")
+        return None
+
+    async def embed_query_async(self, query, timer=None, deadline=None):
+        """embed_query() for coroutines: awaits the batched encode instead of blocking"""
+        timeout = self._embed_timeout(deadline)
+        if timeout is None:
+            return None
+        future = self.embedding_service.submit(query)
+        try:
+            with (timer or StageTimer()).stage('embed'):
+                query_emb = await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+            return normalize_rows(query_emb)[0]
+        except asyncio.TimeoutError:
+            future.cancel()   # drop it from the next batch if it has not started yet
+            print(f"⏰ Query embedding took over {timeout:.1f}s, searching by keywords")
+        except Exception as e:
+            print(f"Query embedding failed: {e}")
+        return None
+
+    def keyword_search(self, query, top_k=3):
+        """Keyword search (BM25 with partial matches)"""
+        return [self.documents[doc_no] for doc_no, _ in self.lexical_index.search(query, top_k)]
+
+    def search(self, query, query_vec=None, top_k=3, timer=None):
+        """Documents for `query`: embeddings fused with BM25 when there is a
+        query embedding (see embed_query), else BM25 alone. `timer` gets the
+        search_method used.
+        """
+        timer = timer or StageTimer()
+        if not self.documents:
+            timer.set(search_method='keyword')
+            return []
+        if query_vec is not None and self.index is not None:
+            try:
+                candidates = top_k * 3 if self.hybrid else top_k
+                semantic = [i for i, _ in self.index.search(query_vec, candidates)]
+                if self.hybrid:
+                    lexical = [i for i, _ in self.lexical_index.search(query, candidates)]
+                    ranked = reciprocal_rank_fusion([semantic, lexical], top_k)
+                else:
+                    ranked = semantic
+                timer.set(search_method='hybrid' if self.hybrid else 'embeddings')
+                return [self.documents[i] for i in ranked]
+            except Exception as e:
+                print(f"Embedding search failed: {e}")
+
+        # Fallback to keyword search
+        timer.set(search_method='keyword')
+        return self.keyword_search(query, top_k)
+
+    def stats(self):
+        return self.embedding_service.stats() if self.embedding_service else None
+
+
+def build_system_prompt(context):
+    """Enhanced system prompt for travel assistance"""
+    return f"""You are AtithiBot, an expert Indian travel assistant for AtithiVerse platform.
+
+CONTEXT INFORMATION:
+{context}
+
+INSTRUCTIONS:
+- Provide specific, actionable travel advice for India
+- Include approximate costs in Indian Rupees (₹) when relevant
+- Mention best times to visit and practical tips
+- Be enthusiastic about Indian culture and destinations
+- Keep responses under 250 words for better readability
+- Use emojis to make responses engaging
+- Always end with a helpful question to continue the conversation
+
+If the user asks about destinations, provide specific details about costs, timing, and insider tips.
+If no context is available, provide general travel advice for India."""
+
+
+def fallback_reason_for(error):
+    """Why an Ollama call ended in the rule-based fallback (requests or aiohttp errors)"""
+    if isinstance(error, DeadlineExceeded):
+        return 'deadline'
+    if isinstance(error, OllamaBusy):
+        return 'ollama_busy'
+    if isinstance(error, (requests.exceptions.Timeout, asyncio.TimeoutError)):
+        return 'timeout'
+    status = getattr(getattr(error, 'response', None), 'status_code', None) or getattr(error, 'status', None)
+    if status == 404:
+        return 'model_missing'
+    return 'ollama_error'
+
+
+def missing_model_retry(model_router, choice, error, deadline):
+    """The large-model choice to retry with when Ollama does not have the
+    routed small model (which is then taken out of rotation), else None"""
+    if fallback_reason_for(error) != 'model_missing':
+        return None
+    model_router.mark_missing(choice.model)
+    retry = model_router.fallback_choice(choice)
+    if retry is None or not deadline.can_afford(MIN_GENERATION_MS):
+        return None
+    model_router.record(choice, 0, error=True)
+    print(f"🔁 Retrying on {retry.model}")
+    return retry
@@ -0,0 +1,789 @@
+"""
+Async serving mode (aiohttp) for the I/O-bound endpoints.
+
+The weather, forecast and Google search routes and the chat routes spend
+nearly all their time waiting on another HTTP service. Under the WSGI
+servers each wait holds a worker thread; here they are coroutines on one
+event loop, so a single process holds thousands of concurrent upstream
+waits. URLs and JSON bodies match app.py:
+
+    /api/weather/..., /api/google-search   shaping shared through upstream_apis.py
+    /api/chat, /api/chat/stream            app.py's retrieval + Ollama pipeline
+                                           (assistant_pipeline.py), with Ollama
+                                           called through AsyncOllamaGateway
+    /api/chat/bot-stream                   relayed to travel_bot.py
+
+The chat routes keep app.py's deadline header, admission control, semantic
+cache, model routing and local fallback answers. This process has its own
+Ollama gateway: when both servers take chats, OLLAMA_MAX_CONCURRENCY is
+per server.
+
+Every other path is forwarded to the WSGI app (ASYNC_FORWARD_URL, default
+http://127.0.0.1:5000; empty disables), so this server can be the front
+door on its own:
+
+    python async_app.py               # http://0.0.0.0:8000
+    gunicorn async_app:app --bind 0.0.0.0:8000 --worker-class aiohttp.GunicornWebWorker
+
+bench_async_proxy.py compares both serving modes against a slow upstream.
+"""
+
+import asyncio
+import json
+import os
+import time
+from contextlib import aclosing
+from datetime import datetime
+
+import aiohttp
+from aiohttp import web
+from dotenv import load_dotenv
+from multidict import CIMultiDict
+
+from admission import AdaptiveLimiter
+from assistant_pipeline import TravelRetriever, build_system_prompt, fallback_reason_for, missing_model_retry
+from async_ollama import AsyncOllamaGateway
+from bot_transport import DEFAULT_BOT_SOCKET, DEFAULT_BOT_URL
+from conversation_context import build_chat_messages, warm_encoding
+from deadlines import Deadline, DeadlineExceeded, HOP_RESERVE_MS, MIN_GENERATION_MS, chat_deadline_ms
+from embedding_model import LazyEmbeddingModel
+from health import embedding_check, lifecycle_check, liveness, readiness
+from intent_router import IntentRouter
+from metrics import Counter, Histogram, HistogramFamily, StageMetrics, StageTimer
+from model_lifecycle import ModelLifecycle
+from model_router import ModelRouter
+from ollama_client import OllamaBusy, sse_event, SSE_HEADERS
+from rate_limit import RateLimiter, client_address, limit_headers, too_many_requests_body
+from semantic_cache import SemanticCache
+from upstream_apis import (
+    FORECAST_URL, GOOGLE_SEARCH_URL, UPSTREAM_TIMEOUT, WEATHER_URL,
+    search_params, shape_forecast, shape_search, shape_weather, weather_params
+)
+
+load_dotenv()
+
+ASYNC_PORT = int(os.getenv('ASYNC_PORT', '8000'))
+GOOGLE_SEARCH_API_KEY = os.getenv('GOOGLE_SEARCH_API_KEY', '')
+GOOGLE_SEARCH_CX = os.getenv('GOOGLE_SEARCH_CX', '')
+CHAT_DEADLINE_MS = chat_deadline_ms()
+FORWARD_URL = os.getenv('ASYNC_FORWARD_URL', 'http://127.0.0.1:5000').rstrip('/')
+FORWARD_TIMEOUT = float(os.getenv('ASYNC_FORWARD_TIMEOUT', '120'))
+
+# Open connections per upstream pool (the waits themselves are not limited)
+UPSTREAM_CONNECTIONS = int(os.getenv('ASYNC_UPSTREAM_CONNECTIONS', '1000'))
+
+# Not forwarded in either direction
+HOP_BY_HOP = {'connection', 'keep-alive', 'proxy-authenticate', 'proxy-authorization',
+              'te', 'trailer', 'trailers', 'transfer-encoding', 'upgrade', 'host', 'content-length'}
+
+
+def load_config(path):
+    try:
+        with open(path, "r", encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError) as e:
+        print(f"⚠️ Could not load {path}: {e}")
+        return {}
+
+
+app_config = load_config("data/config/app_config.json")
+chatbot_config = load_config("data/config/chatbot_config.json")
+
+# Rule-based fallback answers, as in app.py
+intent_router = IntentRouter(chatbot_config.get('intent_router', {}))
+
+# Same per-client limits as app.py (api.rate_limiting in app_config.json).
+# Only routes served here are checked; forwarded requests are limited by
+# the WSGI app, which gets the client resolved here in X-Forwarded-For.
+rate_limiter = RateLimiter.from_config(app_config.get('api', {}).get('rate_limiting'))
+# Proxies in front of the app whose X-Forwarded-For entries are trusted
+RATE_LIMIT_TRUST_PROXY = int(os.getenv('RATE_LIMIT_TRUST_PROXY', '0'))
+
+chat_limiter = AdaptiveLimiter(
+    initial=int(os.getenv('CHAT_LIMIT_INITIAL', '8')),
+    max_limit=int(os.getenv('CHAT_LIMIT_MAX', '32')),
+    target_ms=float(os.getenv('CHAT_LIMIT_TARGET_MS', '10000'))
+)
+
+# Fallback reasons that mean the AI path is overloaded
+OVERLOAD_REASONS = {'ollama_busy', 'timeout', 'deadline'}
+
+# The assistant chat pipeline, configured from the same settings as app.py
+ollama_config = app_config.get('ai', {}).get('ollama', {})
+OLLAMA_SERVER = os.getenv("OLLAMA_SERVER", "http://127.0.0.1:11434")
+OLLAMA_CHAT_MODEL = os.getenv("OLLAMA_CHAT_MODEL", ollama_config.get('models', {}).get('default', 'llama2'))
+OLLAMA_PRELOAD = os.getenv('OLLAMA_PRELOAD', '1') != '0'
+model_router = ModelRouter.from_config(ollama_config, OLLAMA_CHAT_MODEL, os.getenv('OLLAMA_SMALL_MODEL'))
+
+
+def model_lifecycle(model, **extra):
+    return ModelLifecycle(
+        OLLAMA_SERVER,
+        model,
+        keep_alive=os.getenv('OLLAMA_KEEP_ALIVE', '30m'),
+        pin_hours=os.getenv('OLLAMA_PIN_HOURS', ''),
+        refresh_interval=int(os.getenv('OLLAMA_KEEPALIVE_REFRESH', '300')),
+        **extra
+    )
+
+
+ollama_model = model_lifecycle(OLLAMA_CHAT_MODEL)
+ollama_gateway = AsyncOllamaGateway(
+    OLLAMA_SERVER,
+    max_concurrency=int(os.getenv('OLLAMA_MAX_CONCURRENCY', '2')),
+    max_queue=int(os.getenv('OLLAMA_MAX_QUEUE', '32')),
+    lifecycle=ollama_model
+)
+small_ollama_model = None
+if model_router.enabled:
+    small_ollama_model = model_lifecycle(model_router.tiers['small'], on_missing=model_router.mark_missing)
+    ollama_gateway.add_lifecycle(small_ollama_model)
+
+embedding_model = LazyEmbeddingModel("all-MiniLM-L6-v2", device='cpu')
+EMBEDDINGS_PRELOAD = os.getenv('EMBEDDINGS_PRELOAD', '1') != '0'
+retriever = TravelRetriever(
+    embedding_model,
+    os.getenv('VECTOR_INDEX_BACKEND', 'auto'),
+    os.getenv('HYBRID_SEARCH', '1') != '0',
+    int(os.getenv('EMBED_MAX_BATCH_SIZE', '32')),
+    float(os.getenv('EMBED_MAX_WAIT_MS', '5'))
+)
+
+performance_config = chatbot_config.get('performance', {})
+semantic_cache = None
+if performance_config.get('enable_caching', True):
+    semantic_cache = SemanticCache(
+        threshold=float(os.getenv('SEMANTIC_CACHE_THRESHOLD', '0.92')),
+        ttl=performance_config.get('cache_duration', 3600),
+        max_entries=int(os.getenv('SEMANTIC_CACHE_SIZE', '512'))
+    )
+
+CHAT_PROMPT_TOKEN_BUDGET = int(os.getenv('CHAT_PROMPT_TOKEN_BUDGET', '1536'))
+chat_prompt_tokens = Histogram([128, 256, 512, 768, 1024, 1536, 2048, 3072, 4096])
+chat_stage_metrics = StageMetrics(['model', 'search_method'])
+
+upstream_ms = HistogramFamily()
+chat_ttft_ms = HistogramFamily()
+counters = Counter()
+in_flight = {'current': 0, 'peak': 0}
+
+
+class upstream_wait:
+    """Time one upstream call under `label` and count it as in flight"""
+
+    def __init__(self, label):
+        self.label = label
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        in_flight['current'] += 1
+        in_flight['peak'] = max(in_flight['peak'], in_flight['current'])
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        in_flight['current'] -= 1
+        upstream_ms.observe(self.label, (time.perf_counter() - self.started) * 1000)
+        if exc_type is not None:
+            counters.inc(f'{self.label}_errors')
+
+
+def is_overload(error):
+    """Fallbacks that should make the admission limit back off"""
+    return isinstance(error, (asyncio.TimeoutError, DeadlineExceeded))
+
+
+# ===== CLIENT SESSIONS =====
+
+def bot_connector():
+    """Connection to travel_bot.py chosen by BOT_TRANSPORT, as in bot_transport.py"""
+    if os.getenv('BOT_TRANSPORT', 'http').lower() == 'unix':
+        return aiohttp.UnixConnector(os.getenv('BOT_SOCKET', DEFAULT_BOT_SOCKET), limit=UPSTREAM_CONNECTIONS), \
+            'http://localhost'
+    return aiohttp.TCPConnector(limit=UPSTREAM_CONNECTIONS), os.getenv('BOT_URL', DEFAULT_BOT_URL).rstrip('/')
+
+
+async def client_sessions(app):
+    app['http'] = aiohttp.ClientSession(
+        timeout=aiohttp.ClientTimeout(total=UPSTREAM_TIMEOUT),
+        connector=aiohttp.TCPConnector(limit=UPSTREAM_CONNECTIONS, ttl_dns_cache=300)
+    )
+    connector, app['bot_url'] = bot_connector()
+    app['bot'] = aiohttp.ClientSession(connector=connector)
+    # Forwarded responses keep their encoding (the browser decompresses)
+    app['forward'] = aiohttp.ClientSession(
+        auto_decompress=False,
+        timeout=aiohttp.ClientTimeout(total=None, sock_connect=10, sock_read=FORWARD_TIMEOUT),
+        connector=aiohttp.TCPConnector(limit=UPSTREAM_CONNECTIONS)
+    )
+    ollama_gateway.open(UPSTREAM_CONNECTIONS)
+    yield
+    for name in ('http', 'bot', 'forward'):
+        await app[name].close()
+    await ollama_gateway.close()
+
+
+async def start_background_work(app):
+    """Model preloads and tokenizer loading on daemon threads, as app.py does at worker start"""
+    if EMBEDDINGS_PRELOAD:
+        embedding_model.start()
+    if OLLAMA_PRELOAD:
+        ollama_model.start()
+        if small_ollama_model:
+            small_ollama_model.start()
+    warm_encoding()
+
+
+# ===== WEATHER API INTEGRATION =====
+
+async def get_weather(request):
+    """Get current weather data for a city"""
+    city = request.match_info['city']
+    try:
+        with upstream_wait('weather'):
+            async with request.app['http'].get(WEATHER_URL, params=weather_params(city)) as response:
+                if response.status != 200:
+                    return web.json_response({
+                        'success': False,
+                        'error': 'Weather data not available'
+                    }, status=404)
+                data = await response.json(content_type=None)
+        return web.json_response(shape_weather(data))
+    except (aiohttp.ClientError, asyncio.TimeoutError):
+        return web.json_response({'success': False, 'error': 'Failed to fetch weather data'}, status=500)
+    except Exception:
+        return web.json_response({'success': False, 'error': 'Internal server error'}, status=500)
+
+
+async def get_weather_forecast(request):
+    """Get 5-day weather forecast for a city"""
+    city = request.match_info['city']
+    try:
+        with upstream_wait('forecast'):
+            async with request.app['http'].get(FORECAST_URL, params=weather_params(city)) as response:
+                if response.status != 200:
+                    return web.json_response({
+                        'success': False,
+                        'error': 'Forecast data not available'
+                    }, status=404)
+                data = await response.json(content_type=None)
+        return web.json_response(shape_forecast(data))
+    except (aiohttp.ClientError, asyncio.TimeoutError):
+        return web.json_response({'success': False, 'error': 'Failed to fetch forecast data'}, status=500)
+    except Exception:
+        return web.json_response({'success': False, 'error': 'Internal server error'}, status=500)
+
+
+# ===== GOOGLE CUSTOM SEARCH (Programmable Search) =====
+
+async def google_search(request):
+    """Proxy to Google Custom Search JSON API (q required, num optional, default 5)"""
+    if not GOOGLE_SEARCH_API_KEY or not GOOGLE_SEARCH_CX:
+        return web.json_response({'success': False, 'error': 'Search API not configured'}, status=500)
+
+    query = request.query.get('q', '').strip()
+    num = int(request.query.get('num', '5'))
+    if not query:
+        return web.json_response({'success': False, 'error': 'Missing query'}, status=400)
+
+    try:
+        params = search_params(GOOGLE_SEARCH_API_KEY, GOOGLE_SEARCH_CX, query, num)
+        with upstream_wait('google_search'):
+            async with request.app['http'].get(GOOGLE_SEARCH_URL, params=params) as response:
+                data = await response.json(content_type=None)
+        return web.json_response(shape_search(data, query, num))
+    except Exception:
+        return web.json_response({'success': False, 'error': 'Search failed'}, status=500)
+
+
+# ===== AI CHATBOT ROUTES =====
+
+async def read_chat_request(request):
+    try:
+        data = await request.json()
+    except (ValueError, UnicodeDecodeError):
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def chat_payload(data):
+    return {
+        'user_input': data['user_input'],
+        'context': {
+            'user_id': data.get('user_id'),
+            'conversation_history': data.get('conversation_history', [])
+        }
+    }
+
+
+def local_reply(user_input, **extra):
+    """Rule-based answer used when the AI service is unavailable (or the request is shed)"""
+    route = intent_router.route('local', user_input)
+    return {
+        'success': True,
+        'response': route.response,
+        'ai_powered': False,
+        'suggestions': route.suggestions,
+        **extra
+    }
+
+
+def sse_response():
+    return web.StreamResponse(headers={'Content-Type': 'text/event-stream; charset=utf-8', **SSE_HEADERS})
+
+
+async def send_reply(request, response, body):
+    """Send a whole answer as one 'token' event plus the 'done' event"""
+    await response.prepare(request)
+    await response.write((sse_event('token', {'content': body['response']}) + sse_event('done', body)).encode())
+    await response.write_eof()
+    return response
+
+
+def debug_field(data, timer):
+    """{'debug': per-stage timings} when the request asked for it ("debug": true)"""
+    return {'debug': timer.report()} if data.get('debug') else {}
+
+
+class ChatTurn:
+    """One assistant chat up to the Ollama call: retrieval, prompt, cache
+    lookup and model choice, as in app.py's enhanced_ai_chat"""
+
+    def __init__(self, request, data, user_input):
+        self.data = data
+        self.user_input = user_input
+        self.timer = StageTimer()
+        self.deadline = Deadline.from_headers(request.headers, CHAT_DEADLINE_MS, CHAT_DEADLINE_MS)
+
+    async def prepare(self):
+        timer = self.timer
+        with timer.stage('retrieval'):
+            self.query_vec = await retriever.embed_query_async(self.user_input, timer, self.deadline)
+            self.relevant_docs = retriever.search(self.user_input, self.query_vec, timer=timer)
+        context = "\n".join(self.relevant_docs) if self.relevant_docs else ""
+        with timer.stage('prompt'):
+            self.route = intent_router.route('assistant', self.user_input, context, self.relevant_docs)
+            self.messages, self.prompt_info = build_chat_messages(
+                build_system_prompt, self.user_input, self.relevant_docs,
+                self.data.get('conversation_history', []), CHAT_PROMPT_TOKEN_BUDGET
+            )
+        chat_prompt_tokens.observe(self.prompt_info['prompt_tokens'])
+        timer.set(prompt_tokens=self.prompt_info['prompt_tokens'])
+        # Follow-up questions depend on the conversation, so only standalone ones are cached
+        self.use_cache = semantic_cache and not (self.prompt_info['history_turns'] or
+                                                 self.prompt_info['summarized_turns'])
+        with timer.stage('cache_lookup'):
+            self.cached = semantic_cache.lookup(self.user_input, self.relevant_docs, self.query_vec) \
+                if self.use_cache else None
+        self.choice = None if self.cached else model_router.choose(
+            self.user_input, intent_router.intents_in(self.user_input),
+            self.data.get('latency_budget_ms'), self.deadline.remaining_ms())
+        timer.set(model=self.choice.model if self.choice else 'cache', cached=bool(self.cached))
+
+    def store(self, response, generation_ms):
+        if self.use_cache and response:
+            semantic_cache.store(self.user_input, self.relevant_docs, response, generation_ms, self.query_vec)
+
+    def body(self, response, ai_powered, **fields):
+        """Response fields shared by /api/chat and the stream's 'done' event"""
+        return {
+            'success': True,
+            'response': response,
+            'suggestions': self.route.suggestions,
+            'timestamp': datetime.now().isoformat(),
+            'ai_powered': ai_powered,
+            **fields,
+            'cached': bool(self.cached),
+            'context_used': len(self.relevant_docs) > 0,
+            'context_docs': self.prompt_info['context_docs'],
+            'search_method': self.timer.fields['search_method'],
+        }
+
+
+async def ollama_reply(turn, state):
+    """Ollama's answer for the turn, or None after a fallback (marks overload in `state`)"""
+    choice, timer, deadline = turn.choice, turn.timer, turn.deadline
+    fallback_reason = None
+    ai_response = None
+    if not deadline.can_afford(MIN_GENERATION_MS + HOP_RESERVE_MS):
+        # Not enough of the request's budget left for a generation: answer locally now
+        fallback_reason = 'deadline'
+        print(f"⏰ {deadline.remaining_ms():.0f}ms left, skipping Ollama")
+    else:
+        generation_started = time.perf_counter()
+        try:
+            print(f"🔗 Calling Ollama {choice.model} ({choice.reason}) at {OLLAMA_SERVER} "
+                  f"({turn.prompt_info['prompt_tokens']} prompt tokens)")
+            try:
+                ai_response = await ollama_gateway.chat(choice.model, turn.messages, timeout=deadline.timeout(),
+                                                        deadline=deadline.child(), timer=timer)
+            except aiohttp.ClientError as e:
+                retry = missing_model_retry(model_router, choice, e, deadline)
+                if retry is None:
+                    raise
+                choice = turn.choice = retry
+                timer.set(model=choice.model)
+                generation_started = time.perf_counter()
+                ai_response = await ollama_gateway.chat(choice.model, turn.messages, timeout=deadline.timeout(),
+                                                        deadline=deadline.child(), timer=timer)
+            generation_ms = (time.perf_counter() - generation_started) * 1000
+            model_router.record(choice, generation_ms, ai_response)
+            print(f"✅ Ollama response received: {len(ai_response)} chars")
+            turn.store(ai_response, generation_ms)
+            if not ai_response:
+                fallback_reason = 'empty_response'
+        except (aiohttp.ClientError, asyncio.TimeoutError, OllamaBusy) as e:
+            model_router.record(choice, 0, error=True)
+            fallback_reason = fallback_reason_for(e)
+            if fallback_reason == 'model_missing':
+                model_router.mark_missing(choice.model)
+            print(f"⚠️ Ollama connection failed: {e}")
+        except Exception as e:
+            model_router.record(choice, 0, error=True)
+            fallback_reason = fallback_reason_for(e)
+            print(f"❌ Ollama error: {e}")
+    if not ai_response:
+        timer.set(fallback_reason=fallback_reason)
+        state['overloaded'] = fallback_reason in OVERLOAD_REASONS
+    return ai_response or None
+
+
+async def enhanced_ai_chat(request):
+    """Enhanced AI Chat with Ollama integration and travel context"""
+    data = await read_chat_request(request) or {}
+    user_input = str(data.get('user_input', '')).strip()
+    if not user_input:
+        return web.json_response({'success': False, 'error': 'Please enter a message'}, status=400)
+    if not chat_limiter.try_acquire():
+        return web.json_response(local_reply(user_input, timestamp=datetime.now().isoformat(), shed=True))
+
+    started = time.perf_counter()
+    state = {'overloaded': False}
+    try:
+        print(f"🤖 Enhanced AI Chat request: {user_input}")
+        turn = ChatTurn(request, data, user_input)
+        await turn.prepare()
+        if turn.cached:
+            chat_stage_metrics.observe(turn.timer)
+            return web.json_response(turn.body(turn.cached['response'], True, **debug_field(data, turn.timer)))
+
+        ai_response = await ollama_reply(turn, state)
+        chat_stage_metrics.observe(turn.timer)
+        return web.json_response(turn.body(
+            ai_response or turn.route.response,
+            bool(ai_response),
+            prompt_tokens=turn.prompt_info['prompt_tokens'],
+            model=turn.choice.model if ai_response else None,
+            **debug_field(data, turn.timer)
+        ))
+    except Exception as e:
+        state['overloaded'] = True
+        print(f"❌ Enhanced chat error: {e}")
+        return web.json_response({
+            'success': False,
+            'error': 'AI chat service temporarily unavailable'
+        }, status=500)
+    finally:
+        chat_limiter.release((time.perf_counter() - started) * 1000, state['overloaded'])
+
+
+def ollama_stream(model, messages, deadline, timer):
+    return aclosing(ollama_gateway.stream_chat(model, messages, timeout=deadline.timeout(),
+                                               deadline=deadline.child(), timer=timer))
+
+
+async def routed_stream_chat(choice, messages, deadline, timer):
+    """ollama_gateway.stream_chat() with missing_model_retry(): on a retry,
+    yields {"rerouted": <new choice>} before the large model's chunks"""
+    try:
+        async with ollama_stream(choice.model, messages, deadline, timer) as chunks:
+            async for chunk in chunks:
+                yield chunk
+    except aiohttp.ClientError as e:
+        retry = missing_model_retry(model_router, choice, e, deadline)
+        if retry is None:
+            raise
+        yield {'rerouted': retry}
+        async with ollama_stream(retry.model, messages, deadline, timer) as chunks:
+            async for chunk in chunks:
+                yield chunk
+
+
+async def chat_events(turn, started, state):
+    """SSE events for /api/chat/stream: 'queued', 'token' and the final 'done'"""
+    timer = turn.timer
+    parts = []
+    ttft_ms = None
+    ai_powered = True
+    truncated = False
+    generation_started = time.perf_counter()
+    try:
+        if turn.cached:
+            parts.append(turn.cached['response'])
+            ttft_ms = state['ttft_ms'] = round((time.perf_counter() - started) * 1000, 1)
+            yield sse_event('token', {'content': turn.cached['response']})
+        elif not turn.deadline.can_afford(MIN_GENERATION_MS + HOP_RESERVE_MS):
+            raise DeadlineExceeded(f"{turn.deadline.remaining_ms():.0f}ms left, skipping Ollama")
+        else:
+            async with aclosing(routed_stream_chat(turn.choice, turn.messages, turn.deadline, timer)) as chunks:
+                async for chunk in chunks:
+                    if chunk.get('rerouted'):
+                        turn.choice = chunk['rerouted']
+                        timer.set(model=turn.choice.model)
+                        generation_started = time.perf_counter()
+                        continue
+                    if chunk.get('queued'):
+                        yield sse_event('queued', {
+                            'queue_position': chunk['queue_position'],
+                            'estimated_wait_ms': chunk['estimated_wait_ms']
+                        })
+                        continue
+                    content = chunk.get('message', {}).get('content', '')
+                    if not content:
+                        continue
+                    if ttft_ms is None:
+                        ttft_ms = state['ttft_ms'] = round((time.perf_counter() - started) * 1000, 1)
+                        chat_ttft_ms.observe('direct', ttft_ms)
+                        timer.add('ttft', ttft_ms)
+                    parts.append(content)
+                    yield sse_event('token', {'content': content})
+    except Exception as e:
+        print(f"⚠️ Ollama stream failed: {e}")
+        reason = fallback_reason_for(e)
+        state['overloaded'] = reason in OVERLOAD_REASONS
+        if turn.choice and reason == 'model_missing':
+            model_router.mark_missing(turn.choice.model)
+        if parts:
+            truncated = True
+            timer.set(truncated_reason=reason)
+        else:
+            ai_powered = False
+            timer.set(fallback_reason=reason)
+            parts.append(turn.route.response)
+            yield sse_event('token', {'content': turn.route.response})
+
+    if turn.choice and timer.fields.get('fallback_reason') != 'deadline':
+        model_router.record(turn.choice, (time.perf_counter() - generation_started) * 1000,
+                            ''.join(parts), error=not ai_powered, truncated=truncated)
+    if ai_powered and not truncated and not turn.cached:
+        turn.store(''.join(parts), (time.perf_counter() - started) * 1000)
+    chat_stage_metrics.observe(timer)
+
+    yield sse_event('done', turn.body(
+        ''.join(parts),
+        ai_powered,
+        truncated=truncated,
+        prompt_tokens=turn.prompt_info['prompt_tokens'],
+        model=turn.choice.model if turn.choice and ai_powered else None,
+        ttft_ms=ttft_ms,
+        total_ms=round((time.perf_counter() - started) * 1000, 1),
+        **debug_field(turn.data, timer)
+    ))
+
+
+async def stream_ai_chat(request):
+    """Streaming version of /api/chat, forwarding Ollama's tokens as Server-Sent Events.
+    Emits 'queued' ({queue_position, estimated_wait_ms}) while waiting for an
+    Ollama slot, 'token' events ({content}) and a final 'done' event with the
+    full response, suggestions and metadata.
+    """
+    data = await read_chat_request(request) or {}
+    user_input = str(data.get('user_input', '')).strip()
+    if not user_input:
+        return web.json_response({'success': False, 'error': 'Please enter a message'}, status=400)
+    response = sse_response()
+    if not chat_limiter.try_acquire():
+        return await send_reply(request, response, local_reply(user_input, timestamp=datetime.now().isoformat(),
+                                                                shed=True))
+
+    started = time.perf_counter()
+    state = {'overloaded': False}
+    try:
+        turn = ChatTurn(request, data, user_input)
+        await turn.prepare()
+        await response.prepare(request)
+        async with aclosing(chat_events(turn, started, state)) as events:
+            async for event in events:
+                await response.write(event.encode())
+    except ConnectionResetError:
+        counters.inc('client_disconnects')
+        return response
+    except Exception:
+        state['overloaded'] = True
+        raise
+    finally:
+        # A stream is judged by its time to first token (see admission.py)
+        chat_limiter.release(state.get('ttft_ms'), state['overloaded'])
+    await response.write_eof()
+    return response
+
+
+async def stream_bot_chat(request):
+    """Streaming chat through the travel_bot.py service, relaying its SSE stream"""
+    data = await read_chat_request(request) or {}
+    if 'user_input' not in data:
+        return web.json_response({'success': False, 'error': 'Missing user_input in request'}, status=400)
+
+    user_input = data['user_input']
+    response = sse_response()
+    if not chat_limiter.try_acquire():
+        return await send_reply(request, response, local_reply(user_input, timestamp=datetime.now().isoformat(),
+                                                                shed=True))
+
+    started = time.perf_counter()
+    overloaded = False
+    relayed = False
+    ttft_ms = None
+    deadline = Deadline.from_headers(request.headers, CHAT_DEADLINE_MS, CHAT_DEADLINE_MS)
+    await response.prepare(request)
+    try:
+        if not deadline.can_afford(MIN_GENERATION_MS + HOP_RESERVE_MS):
+            raise DeadlineExceeded(f"{deadline.remaining_ms():.0f}ms left, skipping AI service")
+        # Like requests' timeout: bounds connecting and each read, not the whole stream
+        hop_timeout = deadline.timeout()
+        with upstream_wait('bot_stream'):
+            async with request.app['bot'].post(
+                    f"{request.app['bot_url']}/travel-chat/stream", json=chat_payload(data),
+                    headers=deadline.headers(),
+                    timeout=aiohttp.ClientTimeout(total=None, sock_connect=hop_timeout, sock_read=hop_timeout)
+            ) as upstream:
+                upstream.raise_for_status()
+                async for chunk in upstream.content.iter_any():
+                    if ttft_ms is None and b'event: token' in chunk:
+                        ttft_ms = (time.perf_counter() - started) * 1000
+                        chat_ttft_ms.observe('bot_proxy', ttft_ms)
+                    relayed = True
+                    await response.write(chunk)
+    except (aiohttp.ClientError, asyncio.TimeoutError, DeadlineExceeded) as e:
+        print(f"⚠️ AI service stream failed: {e}")
+        overloaded = is_overload(e)
+        if not relayed:
+            body = local_reply(user_input)
+            await response.write((sse_event('token', {'content': body['response']}) +
+                                  sse_event('done', body)).encode())
+    except ConnectionResetError:
+        counters.inc('client_disconnects')
+        return response
+    finally:
+        # Judged by time to first token, like app.py's streams (see admission.py)
+        chat_limiter.release(ttft_ms, overloaded)
+    await response.write_eof()
+    return response
+
+
+# ===== FORWARDING TO THE WSGI APP =====
+
+async def forward(request):
+    """Relay any other request to app.py unchanged, streaming the answer back"""
+    if not FORWARD_URL:
+        raise web.HTTPNotFound()
+    headers = {name: value for name, value in request.headers.items() if name.lower() not in HOP_BY_HOP}
+    # The client as resolved here, so app.py limits it rather than this proxy
+    headers['X-Forwarded-For'] = client_address(request.remote, request.headers.get('X-Forwarded-For'),
+                                                RATE_LIMIT_TRUST_PROXY)
+    headers['X-Forwarded-Host'] = request.host
+    headers['X-Forwarded-Proto'] = request.scheme
+    response = None
+    try:
+        with upstream_wait('forward'):
+            async with request.app['forward'].request(
+                    request.method, f"{FORWARD_URL}{request.rel_url}", headers=headers,
+                    data=await request.read() if request.body_exists else None, allow_redirects=False
+            ) as upstream:
+                response_headers = CIMultiDict(
+                    (name, value) for name, value in upstream.headers.items() if name.lower() not in HOP_BY_HOP
+                )
+                response = web.StreamResponse(status=upstream.status, reason=upstream.reason, headers=response_headers)
+                await response.prepare(request)
+                async for chunk in upstream.content.iter_any():
+                    await response.write(chunk)
+                await response.write_eof()
+                return response
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        print(f"⚠️ Forwarding {request.method} {request.rel_url} failed: {e}")
+        if response is not None and response.prepared:
+            return response   # already streaming, the client sees a truncated body
+        return web.json_response({'success': False, 'error': 'Service unavailable'}, status=502)
+
+
+# ===== RATE LIMITING =====
+
+@web.middleware
+async def enforce_rate_limit(request, handler):
+    if request.method == 'OPTIONS' or request.match_info.route.handler is forward:
+        return await handler(request)
+    client = client_address(request.remote, request.headers.get('X-Forwarded-For'), RATE_LIMIT_TRUST_PROXY)
+    allowed, policy, remaining, retry_after = rate_limiter.check(request.path, client)
+    if policy is None:
+        return await handler(request)
+    if not allowed:
+        return web.json_response(too_many_requests_body(retry_after), status=429,
+                                 headers=limit_headers(policy, remaining, retry_after))
+    response = await handler(request)
+    if not response.prepared:   # streamed responses have sent their headers already
+        response.headers.update(limit_headers(policy, remaining))
+    return response
+
+
+# ===== METRICS / PROBES =====
+
+async def get_metrics(request):
+    """Upstream wait times, concurrency and chat pipeline of this async server"""
+    return web.json_response({
+        'success': True,
+        'in_flight': dict(in_flight),
+        'upstream_ms': upstream_ms.snapshot(),
+        'embedding_model': embedding_model.status(),
+        'embedding_service': retriever.stats(),
+        'chat_ttft_ms': chat_ttft_ms.snapshot(),
+        'semantic_cache': semantic_cache.stats() if semantic_cache else None,
+        'ollama_gateway': ollama_gateway.stats(),
+        'chat_prompt_tokens': chat_prompt_tokens.snapshot(),
+        'ollama_model': ollama_model.status(),
+        'ollama_small_model': small_ollama_model.status() if small_ollama_model else None,
+        'model_router': model_router.stats(),
+        'chat_stages': chat_stage_metrics.snapshot(),
+        'chat_admission': chat_limiter.stats(),
+        'rate_limiting': rate_limiter.stats(),
+        'counts': counters.snapshot()
+    })
+
+
+async def healthz(request):
+    return web.json_response(liveness())
+
+
+async def readyz(request):
+    body, status = readiness({
+        'forwarding': (True, False, FORWARD_URL or 'disabled'),
+        'embedding_model': embedding_check(embedding_model),
+        'ollama_model': lifecycle_check(ollama_model),
+    })
+    return web.json_response(body, status=status)
+
+
+def create_app():
+    app = web.Application(client_max_size=16 * 1024 * 1024, middlewares=[enforce_rate_limit])
+    app.cleanup_ctx.append(client_sessions)
+    app.on_startup.append(start_background_work)
+    app.router.add_get('/api/weather/forecast/{city}', get_weather_forecast)
+    app.router.add_get('/api/weather/{city}', get_weather)
+    app.router.add_get('/api/google-search', google_search)
+    app.router.add_post('/api/chat', enhanced_ai_chat)
+    app.router.add_post('/api/chat/stream', stream_ai_chat)
+    app.router.add_post('/api/chat/bot-stream', stream_bot_chat)
+    app.router.add_get('/api/metrics/async', get_metrics)
+    app.router.add_get('/healthz', healthz)
+    app.router.add_get('/readyz', readyz)
+    app.router.add_route('*', '/{tail:.*}', forward)
+    return app
+
+
+app = create_app()
+
+if __name__ == '__main__':
+    print("=" * 50)
+    print("⚡ Starting AtithiVerse async API server")
+    print(f"📍 Port: {ASYNC_PORT}")
+    print(f"🔀 Other paths forwarded to: {FORWARD_URL or 'disabled'}")
+    print("=" * 50)
+    web.run_app(app, host='0.0.0.0', port=ASYNC_PORT)
@@ -0,0 +1,229 @@
+"""
+asyncio counterpart of ollama_client.OllamaGateway, used by async_app.py.
+
+Same contract: at most max_concurrency generations at once, the rest in a
+FIFO queue of at most max_queue, and OllamaBusy as soon as a request's
+projected wait would run past its deadline (or the deadline passes while
+it waits). Waiters are coroutines instead of threads and Ollama is called
+through an aiohttp session, so one event loop holds every queued and
+streaming chat. Ollama's errors surface as aiohttp.ClientError (HTTP
+errors as ClientResponseError, whose .status fallback_reason_for() reads).
+
+The session is opened by async_app.py's cleanup context (open()/close()).
+"""
+
+import asyncio
+import json
+import math
+import time
+from collections import deque
+
+import aiohttp
+
+from metrics import Counter, Histogram
+from ollama_client import MIN_CALL_TIMEOUT, OllamaBusy, chat_payload
+
+
+class AsyncOllamaGateway:
+    """Bounded-concurrency, FIFO-queued access to one Ollama server from an event loop"""
+
+    # Weight of the newest sample in the moving average of generation time
+    EWMA_ALPHA = 0.2
+
+    def __init__(self, server, max_concurrency=2, max_queue=32, lifecycle=None):
+        self.server = server.rstrip('/')
+        self.lifecycle = lifecycle      # ModelLifecycle: keep_alive values + load tracking
+        self._lifecycles = {lifecycle.model: lifecycle} if lifecycle else {}
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max_queue
+        self.counters = Counter()
+        self.queue_ms = Histogram()
+        self.service_ms = Histogram()
+        self.session = None
+        self._active = 0
+        self._waiting = deque()         # futures, resolved in order as slots free up
+        self._avg_service_ms = None
+
+    def open(self, connections=100):
+        self.session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=connections))
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+
+    def _estimate_wait_ms(self, position):
+        """Expected queue wait for the request at 1-based `position`"""
+        if not self._avg_service_ms:
+            return 0.0
+        return math.ceil(position / self.max_concurrency) * self._avg_service_ms
+
+    def _enqueue(self, deadline):
+        """Take a slot or a place in line; returns (ticket, position, estimated_wait_ms)"""
+        if self._active < self.max_concurrency and not self._waiting:
+            self._active += 1
+            self.counters.inc('admitted')
+            return None, 0, 0.0
+
+        position = len(self._waiting) + 1
+        estimated = self._estimate_wait_ms(position)
+        if len(self._waiting) >= self.max_queue:
+            self.counters.inc('rejected_queue_full')
+            raise OllamaBusy(f"Ollama queue full ({self.max_queue} waiting)", position, estimated)
+        # Projected finish = wait in line + one generation
+        finish_ms = estimated + (self._avg_service_ms or 0.0)
+        if deadline is not None and time.monotonic() + finish_ms / 1000 > deadline:
+            self.counters.inc('rejected_deadline')
+            raise OllamaBusy(f"Ollama busy: ~{estimated:.0f}ms wait at position {position}", position, estimated)
+
+        ticket = asyncio.get_running_loop().create_future()
+        self._waiting.append(ticket)
+        self.counters.inc('queued')
+        return ticket, position, estimated
+
+    def _hand_off(self):
+        """Give free slots to the waiters at the head of the line"""
+        while self._waiting and self._active < self.max_concurrency:
+            ticket = self._waiting.popleft()
+            if ticket.done():       # its request gave up (cancelled)
+                continue
+            self._active += 1
+            self.counters.inc('admitted')
+            ticket.set_result(None)
+
+    def _leave(self, ticket):
+        if ticket in self._waiting:
+            self._waiting.remove(ticket)
+
+    async def _wait(self, ticket, position, deadline):
+        """Wait until `ticket` is handed a slot, or fail with OllamaBusy at the deadline"""
+        queued_at = time.monotonic()
+        remaining = None if deadline is None else deadline - time.monotonic()
+        try:
+            await asyncio.wait_for(ticket, remaining)
+        except asyncio.TimeoutError:
+            self._leave(ticket)
+            self.counters.inc('expired_in_queue')
+            raise OllamaBusy(f"Deadline passed in Ollama queue (position {position})", position)
+        except asyncio.CancelledError:
+            # The request went away; give back the slot if it was handed one meanwhile
+            if ticket.done() and not ticket.cancelled():
+                self._active -= 1
+                self._hand_off()
+            else:
+                self._leave(ticket)
+            raise
+        self.queue_ms.observe((time.monotonic() - queued_at) * 1000)
+
+    def _release(self, held_ms):
+        self._active -= 1
+        if self._avg_service_ms is None:
+            self._avg_service_ms = held_ms
+        else:
+            self._avg_service_ms += self.EWMA_ALPHA * (held_ms - self._avg_service_ms)
+        self.service_ms.observe(held_ms)
+        self._hand_off()
+
+    def add_lifecycle(self, lifecycle):
+        """Track another model (e.g. the routed small model) with its own lifecycle"""
+        self._lifecycles[lifecycle.model] = lifecycle
+
+    def _keep_alive(self, model):
+        lifecycle = self._lifecycles.get(model, self.lifecycle)
+        return lifecycle.keep_alive_value() if lifecycle else None
+
+    def _observe(self, model, completion, source):
+        # Each lifecycle counts loads of its own model only
+        lifecycle = self._lifecycles.get(model)
+        if lifecycle:
+            lifecycle.observe(completion, source)
+
+    async def chat(self, model, messages, timeout=30, deadline=None, timer=None):
+        """Queued non-streaming chat; returns the reply text. `timeout` also
+        bounds the time spent in line. `timer` (metrics.StageTimer) receives
+        the 'queue' and 'generation' times.
+        """
+        if deadline is None:
+            deadline = time.monotonic() + timeout
+        queued_at = time.monotonic()
+        ticket, position, _ = self._enqueue(deadline)
+        if ticket is not None:
+            await self._wait(ticket, position, deadline)
+        started = time.monotonic()
+        if timer:
+            timer.add('queue', (started - queued_at) * 1000)
+        remaining = max(MIN_CALL_TIMEOUT, deadline - time.monotonic())
+        try:
+            async with self.session.post(
+                    f"{self.server}/api/chat", json=chat_payload(model, messages, keep_alive=self._keep_alive(model)),
+                    timeout=aiohttp.ClientTimeout(total=remaining)
+            ) as response:
+                response.raise_for_status()
+                completion = await response.json(content_type=None)
+        finally:
+            held_ms = (time.monotonic() - started) * 1000
+            if timer:
+                timer.add('generation', held_ms)
+            self._release(held_ms)
+        self._observe(model, completion, 'chat')
+        return completion.get("message", {}).get("content", "")
+
+    async def stream_chat(self, model, messages, timeout=30, deadline=None, timer=None):
+        """Queued streaming chat, an async generator. When the request has to
+        wait, first yields {"queued": True, "queue_position": n,
+        "estimated_wait_ms": ms}; then Ollama's JSON chunks as dicts (the last
+        with done=True). The slot is held until the generator finishes or is
+        closed (aclose()). Like requests' timeout, `timeout` bounds connecting
+        and each gap between chunks, not the whole generation.
+        """
+        if deadline is None:
+            deadline = time.monotonic() + timeout
+        queued_at = time.monotonic()
+        ticket, position, estimated = self._enqueue(deadline)
+        try:
+            if ticket is not None:
+                yield {"queued": True, "queue_position": position, "estimated_wait_ms": round(estimated, 1)}
+                await self._wait(ticket, position, deadline)
+        except GeneratorExit:
+            self._leave(ticket)
+            raise
+        started = time.monotonic()
+        if timer:
+            timer.add('queue', (started - queued_at) * 1000)
+        remaining = max(MIN_CALL_TIMEOUT, deadline - time.monotonic())
+        try:
+            async with self.session.post(
+                    f"{self.server}/api/chat",
+                    json=chat_payload(model, messages, True, self._keep_alive(model)),
+                    timeout=aiohttp.ClientTimeout(total=None, sock_connect=remaining, sock_read=remaining)
+            ) as response:
+                response.raise_for_status()
+                async for line in response.content:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    if chunk.get("error"):
+                        raise aiohttp.ClientPayloadError(chunk["error"])
+                    if chunk.get("done"):
+                        self._observe(model, chunk, 'stream')
+                    yield chunk
+                    if chunk.get("done"):
+                        break
+        finally:
+            held_ms = (time.monotonic() - started) * 1000
+            if timer:
+                timer.add('generation', held_ms)
+            self._release(held_ms)
+
+    def stats(self):
+        avg = self._avg_service_ms
+        return {
+            'max_concurrency': self.max_concurrency,
+            'max_queue': self.max_queue,
+            'active': self._active,
+            'queue_depth': len(self._waiting),
+            'avg_generation_ms': round(avg, 1) if avg is not None else None,
+            'counts': self.counters.snapshot(),
+            'queue_ms': self.queue_ms.snapshot(),
+            'generation_ms': self.service_ms.snapshot(),
+        }
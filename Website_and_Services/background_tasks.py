@@ -0,0 +1,41 @@
+"""
+Background threads that must start in the serving process.
+
+Threads do not survive fork(). Under the pre-forking production server
+(gunicorn.conf.py) the application is imported once in the master and the
+workers are forked from it, so whatever an import would start on a thread
+(model loading, keep-alive refreshes, reconciliation jobs) has to wait
+until the worker exists. Modules hand such starters to at_worker_start():
+in a normal single-process run they run right away; under the pre-fork
+server (PREFORK_ENV set by gunicorn.conf.py) they are queued and each
+worker runs them from the post_worker_init hook.
+"""
+
+import os
+
+PREFORK_ENV = 'ATITHIVERSE_PREFORK'
+
+_starters = []
+
+
+def prefork():
+    """Running under the pre-forking server?"""
+    return os.getenv(PREFORK_ENV) == '1'
+
+
+def at_worker_start(fn, *args, **kwargs):
+    """Call fn(*args, **kwargs) now, or in every worker once it has been forked"""
+    if prefork():
+        _starters.append((fn, args, kwargs))
+    else:
+        fn(*args, **kwargs)
+
+
+def start_worker_tasks():
+    """Run the queued starters (called in each forked worker)"""
+    for fn, args, kwargs in _starters:
+        try:
+            fn(*args, **kwargs)
+        except Exception as e:
+            print(f"❌ Background task {getattr(fn, '__qualname__', fn)} failed to start: {e}")
+    return len(_starters)
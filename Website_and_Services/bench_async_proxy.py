@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Async Proxy Benchmark
+Compares the WSGI server (gunicorn, threads) with the async server
+(async_app.py) on /api/weather/<city>, /api/chat and /api/chat/stream
+while the weather API and Ollama are slow: every thread-bound request
+holds a thread for the whole upstream wait, the async server holds a
+coroutine. Ollama's concurrency cap and the chat admission limit are
+raised to the highest concurrency level so the servers themselves are
+compared; chat answers that fell back to the local reply count as errors.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import aiohttp
+from aiohttp import web
+
+WEATHER_PAYLOAD = {
+    'name': 'Goa', 'sys': {'country': 'IN', 'sunrise': 1700000000, 'sunset': 1700040000},
+    'main': {'temp': 31.2, 'feels_like': 35.0, 'humidity': 70, 'pressure': 1008},
+    'visibility': 8000, 'wind': {'speed': 3.1, 'deg': 240},
+    'weather': [{'main': 'Clouds', 'description': 'scattered clouds', 'icon': '03d'}],
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+CHAT_TOKENS = ['Goa', ' is', ' best', ' from', ' November', ' to', ' March', ' 🌴', ' Shall', ' I', ' plan', ' it?']
+
+
+def start_mock_upstream(port, delay):
+    """OpenWeatherMap and Ollama stand-in answering every request after `delay`
+    seconds (a streamed chat spreads its tokens over the delay)"""
+    async def weather(request):
+        await asyncio.sleep(delay)
+        return web.json_response(WEATHER_PAYLOAD)
+
+    async def ollama_chat(request):
+        body = await request.json()
+        if not body.get('stream'):
+            await asyncio.sleep(delay)
+            return web.json_response({'message': {'role': 'assistant', 'content': ''.join(CHAT_TOKENS)}, 'done': True})
+        response = web.StreamResponse(headers={'Content-Type': 'application/x-ndjson'})
+        await response.prepare(request)
+        for token in CHAT_TOKENS:
+            await asyncio.sleep(delay / len(CHAT_TOKENS))
+            await response.write((json.dumps({'message': {'role': 'assistant', 'content': token},
+                                              'done': False}) + '\n').encode())
+        await response.write((json.dumps({'message': {'role': 'assistant', 'content': ''}, 'done': True}) + '\n').encode())
+        await response.write_eof()
+        return response
+
+    def run():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        mock = web.Application()
+        mock.router.add_get('/weather', weather)
+        mock.router.add_post('/api/chat', ollama_chat)
+        runner = web.AppRunner(mock, access_log=None)
+        loop.run_until_complete(runner.setup())
+        loop.run_until_complete(web.TCPSite(runner, '127.0.0.1', port, backlog=4096).start())
+        loop.run_forever()
+
+    threading.Thread(target=run, daemon=True).start()
+
+
+def start_server(command, env):
+    return subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+async def wait_until_up(url, timeout=60):
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while time.monotonic() < deadline:
+            try:
+                async with session.get(url) as response:
+                    if response.status == 200:
+                        return True
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.25)
+    return False
+
+
+question_numbers = itertools.count()
+
+
+def chat_body(n):
+    # A different question every time in the run, so no answer comes from the semantic cache
+    return {'user_input': f"When is the best time to visit Goa? (#{next(question_numbers)})"}
+
+
+def chat_answered(content):
+    return json.loads(content).get('ai_powered') is True
+
+
+def stream_answered(content):
+    done = content.rsplit(b'event: done\ndata: ', 1)
+    return len(done) == 2 and json.loads(done[1]).get('ai_powered') is True
+
+
+# name: (method, path, request body factory, check on the response body)
+ROUTES = {
+    'weather': ('GET', '/api/weather/Goa', None, None),
+    'chat': ('POST', '/api/chat', chat_body, chat_answered),
+    'chat_stream': ('POST', '/api/chat/stream', chat_body, stream_answered),
+}
+
+
+async def load(url, concurrency, total, method='GET', body=None, check=None):
+    """`total` requests, `concurrency` at a time; (seconds, latencies_ms, errors).
+    `body(n)` gives the JSON body of request n; `check(content)` is False for a failed answer.
+    """
+    latencies = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+    connector = aiohttp.TCPConnector(limit=0)
+    async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=120)) as session:
+        async def one(n):
+            nonlocal errors
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    async with session.request(method, url, json=body(n) if body else None) as response:
+                        content = await response.read()
+                        if response.status != 200 or (check and not check(content)):
+                            errors += 1
+                            return
+                except (aiohttp.ClientError, asyncio.TimeoutError):
+                    errors += 1
+                    return
+                latencies.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(n) for n in range(total)))
+        return time.perf_counter() - started, sorted(latencies), errors
+
+
+def percentile(values, p):
+    return values[min(len(values) - 1, int(len(values) * p))] if values else float('nan')
+
+
+async def run_benchmark(levels, delay, workers, threads, routes):
+    here = os.path.dirname(os.path.abspath(__file__))
+    upstream_port, wsgi_port, async_port = free_port(), free_port(), free_port()
+    start_mock_upstream(upstream_port, delay)
+
+    most = str(max(levels))
+    env = dict(os.environ, WEATHER_API_BASE=f"http://127.0.0.1:{upstream_port}",
+               OLLAMA_SERVER=f"http://127.0.0.1:{upstream_port}", OLLAMA_MAX_CONCURRENCY=most,
+               OLLAMA_MAX_QUEUE=most, CHAT_LIMIT_INITIAL=most, CHAT_LIMIT_MAX=most, RATE_LIMIT_ENABLED='0',
+               EMBEDDINGS_PRELOAD='0', OLLAMA_PRELOAD='0', PYTHONPATH=here,
+               ASYNC_PORT=str(async_port), ASYNC_FORWARD_URL='')
+    servers = {
+        f"WSGI ({workers}x{threads} threads)": (
+            [sys.executable, '-m', 'gunicorn', '-c', os.path.join(here, 'gunicorn.conf.py'), '--chdir', here,
+             '--bind', f"127.0.0.1:{wsgi_port}", '-w', str(workers), '--threads', str(threads),
+             '--backlog', '4096', 'app:app'],
+            wsgi_port),
+        "Async (1 process)": ([sys.executable, os.path.join(here, 'async_app.py')], async_port),
+    }
+
+    print(f"🐢 Upstream delay: {delay * 1000:.0f} ms per call")
+    print("=" * 50)
+    for label, (command, port) in servers.items():
+        process = start_server(command, env)
+        try:
+            base = f"http://127.0.0.1:{port}"
+            if not await wait_until_up(f"{base}/healthz"):
+                print(f"❌ {label}: server did not start")
+                continue
+            print(f"\n🖥️ {label}")
+            for route in routes:
+                method, path, body, check = ROUTES[route]
+                print(f"   {method} {path}")
+                for concurrency in levels:
+                    seconds, latencies, errors = await load(f"{base}{path}", concurrency, concurrency * 2,
+                                                            method, body, check)
+                    print(f"   {concurrency:>5} concurrent: {len(latencies) / seconds:8.1f} req/s  "
+                          f"p50 {percentile(latencies, 0.5):7.0f} ms  p95 {percentile(latencies, 0.95):7.0f} ms"
+                          f"{f'  errors {errors}' if errors else ''}")
+        finally:
+            process.terminate()
+            process.wait()
+
+    print("\n" + "=" * 50)
+    print("🎉 Async proxy benchmark completed!")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[16, 128, 1024])
+    parser.add_argument('--delay', type=float, default=0.3, help="upstream latency in seconds")
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--routes', nargs='+', choices=list(ROUTES), default=list(ROUTES))
+    args = parser.parse_args()
+    asyncio.run(run_benchmark(args.concurrency, args.delay, args.workers, args.threads, args.routes))
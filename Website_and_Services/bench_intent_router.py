@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Intent Router Benchmark
+Routing throughput of the compiled intent router against the old per-function
+`any(word in input_lower ...)` chains, using the same rules
+"""
+
+import argparse
+import random
+import time
+
+from intent_router import CONTEXT_PREVIEW_CHARS, IntentRouter
+
+SAMPLE_QUERIES = [
+    "Hello! Can you help me plan a trip?",
+    "What is the best time to visit the Taj Mahal in Agra?",
+    "Cheap beach holidays in Goa for a family of four",
+    "Kerala backwaters houseboat cost per night",
+    "Royal palace hotels in Jaipur and Udaipur",
+    "I want to book a 7 day itinerary across Rajasthan",
+    "Show me popular destinations in India",
+    "What's the weather like in the Himalayas in May?",
+    "Namaste, suggest some spiritual places",
+    "Is street food safe for tourists?",
+]
+
+
+def chain_route(router, profile, user_input, context='', docs=None):
+    """What the old helper functions did: one keyword scan per rule, per function"""
+    input_lower = user_input.lower()
+    docs_lower = [doc.lower() for doc in docs or []]
+    results = []
+    for kind in ('fallback', 'suggestions'):
+        for rule in router.profiles[profile][kind]:
+            if rule['requires_context'] and not context:
+                continue
+            if rule['source'] == 'documents':
+                matches = lambda word: any(word in doc for doc in docs_lower)
+            else:
+                matches = lambda word: word in input_lower
+            if rule['any'] and not any(matches(word) for word in rule['any']):
+                continue
+            if rule['all'] and not all(matches(word) for word in rule['all']):
+                continue
+            value = rule['value']
+            if kind == 'fallback' and '{context}' in value:
+                value = value.replace('{context}', context[:CONTEXT_PREVIEW_CHARS])
+            results.append(value)
+            break
+    return results
+
+
+def time_routes(fn, queries, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for profile, query, context, docs in queries:
+            fn(profile, query, context, docs)
+    elapsed = time.perf_counter() - start
+    return repeat * len(queries) / elapsed
+
+
+def run_benchmark(repeat, long_inputs):
+    router = IntentRouter.from_file()
+    profiles = list(router.profiles)
+    docs = ["Goa: beaches, nightlife and seafood", "Kerala backwaters and Ayurveda"]
+
+    rng = random.Random(0)
+    queries = []
+    for query in SAMPLE_QUERIES:
+        if long_inputs:
+            query = " ".join(rng.choice(SAMPLE_QUERIES) for _ in range(8))
+        for profile in profiles:
+            queries.append((profile, query, "\n".join(docs), docs))
+
+    print(f"🧭 Profiles: {', '.join(profiles)}  |  {len(router.matcher.keywords)} compiled keywords")
+    print(f"📝 {len(queries)} routes x {repeat} rounds, {'long' if long_inputs else 'chat-sized'} inputs")
+    print("=" * 50)
+
+    # Same answers from both paths
+    for profile, query, context, docs_ in queries:
+        route = router.route(profile, query, context, docs_)
+        assert chain_route(router, profile, query, context, docs_) == [route.response, route.suggestions]
+
+    chain_rate = time_routes(lambda *args: chain_route(router, *args), queries, repeat)
+    print(f"🐢 Keyword chains:  {chain_rate:,.0f} routes/s")
+
+    compiled_rate = time_routes(router.route, queries, repeat)
+    print(f"⚡ Compiled router: {compiled_rate:,.0f} routes/s  ({compiled_rate / chain_rate:.1f}x)")
+
+    print("\n" + "=" * 50)
+    print("🎉 Intent router benchmark completed!")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=2000)
+    parser.add_argument('--long', action='store_true', help='use ~8x longer inputs')
+    args = parser.parse_args()
+    run_benchmark(args.repeat, args.long)
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Startup Time Benchmark
+Measures how long the services take to import, and how much of that the
+background-loaded SentenceTransformer model used to add to the critical path
+"""
+
+import subprocess
+import sys
+import time
+
+EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+
+
+def time_python(code, env_overrides=None, runs=3):
+    """Best-of-N wall time (seconds) for running a snippet in a fresh interpreter"""
+    import os
+    env = dict(os.environ, **(env_overrides or {}))
+    best = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, '-c', code], env=env,
+                                stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        elapsed = time.perf_counter() - start
+        if result.returncode != 0:
+            return None, result.stderr.strip().splitlines()[-1] if result.stderr else 'failed'
+        best = elapsed if best is None else min(best, elapsed)
+    return best, None
+
+
+def report(label, seconds, error):
+    if error:
+        print(f"❌ {label}: {error}")
+    else:
+        print(f"⏱️ {label}: {seconds * 1000:.0f} ms")
+
+
+def run_benchmark():
+    print("🚀 Measuring service startup time...")
+    print("=" * 50)
+
+    baseline, error = time_python("pass")
+    report("Bare interpreter", baseline, error)
+
+    # What used to sit on the critical path at import time
+    eager, error = time_python(
+        "from sentence_transformers import SentenceTransformer\n"
+        f"SentenceTransformer('{EMBEDDING_MODEL_NAME}', device='cpu')",
+        runs=1
+    )
+    report("Eager SentenceTransformer import + load (old critical path)", eager, error)
+
+    # Time until the module is importable, i.e. the service can start serving
+    for module in ('app', 'travel_bot'):
+        seconds, error = time_python(f"import {module}", {'EMBEDDINGS_PRELOAD': '0'})
+        report(f"import {module} (model deferred)", seconds, error)
+
+        seconds, error = time_python(f"import {module}", {'EMBEDDINGS_PRELOAD': '1'})
+        report(f"import {module} (model loading in background)", seconds, error)
+
+    # Time until embeddings are actually ready in the background
+    ready, error = time_python(
+        "import app\n"
+        "app.embedding_model.wait()\n",
+        runs=1
+    )
+    report("import app + background model ready", ready, error)
+
+    print("\n" + "=" * 50)
+    print("🎉 Startup benchmark completed!")
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Vector Index Benchmark
+Compares recall and query latency of the IVF (ANN) index against exact search
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from corpus_embeddings import normalize_rows
+from vector_index import build_index
+
+
+def make_corpus(n_docs, dim, n_topics, seed=0):
+    """Clustered synthetic embeddings, roughly shaped like sentence embeddings"""
+    rng = np.random.default_rng(seed)
+    topics = normalize_rows(rng.normal(size=(n_topics, dim)))
+    labels = rng.integers(n_topics, size=n_docs)
+    docs = normalize_rows(topics[labels] + 0.35 * rng.normal(size=(n_docs, dim)) / np.sqrt(dim) * 4)
+    queries = normalize_rows(docs[rng.choice(n_docs, 200)] + 0.1 * rng.normal(size=(200, dim)) / np.sqrt(dim) * 4)
+    return docs, queries
+
+
+def time_queries(index, queries, top_k, **search_kwargs):
+    results = []
+    start = time.perf_counter()
+    for query in queries:
+        results.append([item_id for item_id, _ in index.search(query, top_k, **search_kwargs)])
+    elapsed = time.perf_counter() - start
+    return results, elapsed / len(queries) * 1000
+
+
+def recall(approx, exact):
+    hits = sum(len(set(a) & set(e)) for a, e in zip(approx, exact))
+    return hits / sum(len(e) for e in exact)
+
+
+def run_benchmark(n_docs, dim, top_k):
+    print(f"📐 Corpus: {n_docs} vectors x {dim} dims, top_k={top_k}")
+    print("=" * 50)
+
+    docs, queries = make_corpus(n_docs, dim, n_topics=max(8, n_docs // 200))
+
+    start = time.perf_counter()
+    exact = build_index(docs, backend='exact')
+    print(f"🔨 Exact build: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    start = time.perf_counter()
+    ivf = build_index(docs, backend='ivf')
+    print(f"🔨 IVF build:   {(time.perf_counter() - start) * 1000:.1f} ms ({ivf.n_lists} lists)")
+
+    exact_results, exact_ms = time_queries(exact, queries, top_k)
+    print(f"\n🎯 Exact: {exact_ms:.3f} ms/query")
+
+    for n_probe in (1, 4, 8, 16, 32):
+        if n_probe > ivf.n_lists:
+            break
+        ivf_results, ivf_ms = time_queries(ivf, queries, top_k, n_probe=n_probe)
+        print(f"⚡ IVF n_probe={n_probe:<3} {ivf_ms:.3f} ms/query  "
+              f"recall@{top_k}={recall(ivf_results, exact_results):.3f}  "
+              f"speedup={exact_ms / ivf_ms:.1f}x")
+
+    print("\n" + "=" * 50)
+    print("🎉 Vector index benchmark completed!")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--docs', type=int, default=20000)
+    parser.add_argument('--dim', type=int, default=384)
+    parser.add_argument('--top-k', type=int, default=10)
+    args = parser.parse_args()
+    run_benchmark(args.docs, args.dim, args.top_k)
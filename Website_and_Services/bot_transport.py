@@ -0,0 +1,137 @@
+"""
+Transports for the app.py -> travel_bot.py chat hop.
+
+    http       persistent keep-alive session to BOT_URL (default)
+    unix       the same over travel_bot's Unix domain socket (BOT_SOCKET)
+    inprocess  import travel_bot and call its chat handlers directly,
+               sharing the caller's embedding model and Ollama gateway
+
+Every transport exposes stream(payload, timeout, headers) -> iterator of
+SSE bytes from /travel-chat/stream (headers carry the request deadline, see
+deadlines.py), and raises requests.exceptions.RequestException subclasses
+on failure so callers keep their existing fallback handling.
+"""
+
+import os
+import socket
+from urllib.parse import quote
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+from urllib3.connectionpool import HTTPConnectionPool
+
+from deadlines import Deadline
+
+DEFAULT_BOT_URL = "http://127.0.0.1:5001"
+DEFAULT_BOT_SOCKET = "/tmp/atithiverse-bot.sock"
+
+# Resources travel_bot uses instead of building its own when imported
+# in-process: embedding_model, ollama_model, ollama_gateway
+SHARED_RESOURCES = {}
+
+
+class HTTPTransport:
+    """Keep-alive HTTP session to the bot service"""
+
+    name = 'http'
+
+    def __init__(self, base_url=DEFAULT_BOT_URL, session=None, pool_size=16):
+        self.base_url = base_url.rstrip('/')
+        self.session = session or requests.Session()
+        if session is None:
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+            self.session.mount('http://', adapter)
+            self.session.mount('https://', adapter)
+
+    def stream(self, payload, timeout=30, headers=None):
+        with self.session.post(f"{self.base_url}/travel-chat/stream", json=payload,
+                               timeout=timeout, headers=headers, stream=True) as response:
+            response.raise_for_status()
+            yield from response.iter_content(chunk_size=None)
+
+
+class _UnixHTTPConnection(HTTPConnection):
+    def __init__(self, *args, socket_path=None, **kwargs):
+        self.socket_path = socket_path
+        super().__init__(*args, **kwargs)
+
+    def _new_conn(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if isinstance(self.timeout, (int, float)):
+            sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+        except OSError:
+            sock.close()
+            raise   # urllib3 turns this into a requests ConnectionError
+        return sock
+
+
+class _UnixConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _UnixHTTPConnection
+
+
+class _UnixAdapter(HTTPAdapter):
+    """Send http+unix://<quoted socket path>/... requests over a Unix socket"""
+
+    def __init__(self, socket_path, pool_size=16):
+        self.socket_path = socket_path
+        self._pool = _UnixConnectionPool('localhost', maxsize=pool_size, socket_path=socket_path)
+        super().__init__()
+
+    def get_connection_with_tls_context(self, request, verify, proxies=None, cert=None):
+        return self._pool
+
+    def get_connection(self, url, proxies=None):
+        return self._pool
+
+    def request_url(self, request, proxies):
+        return request.path_url
+
+    def close(self):
+        self._pool.close()
+        super().close()
+
+
+class UnixSocketTransport(HTTPTransport):
+    """Keep-alive HTTP over travel_bot's Unix domain socket"""
+
+    name = 'unix'
+
+    def __init__(self, socket_path=DEFAULT_BOT_SOCKET, pool_size=16):
+        session = requests.Session()
+        session.mount('http+unix://', _UnixAdapter(socket_path, pool_size))
+        super().__init__(f"http+unix://{quote(socket_path, safe='')}", session)
+        self.socket_path = socket_path
+
+
+class InProcessTransport:
+    """Call travel_bot's handlers directly (no socket, no JSON round trip)"""
+
+    name = 'inprocess'
+
+    def __init__(self, bot=None, **shared):
+        if bot is None:
+            SHARED_RESOURCES.update(shared)   # must be in place before travel_bot is imported
+            import travel_bot as bot
+        self.bot = bot
+
+    def stream(self, payload, timeout=30, headers=None):
+        deadline = Deadline.from_headers(headers, timeout * 1000)
+        for event in self.bot.travel_chat_events(payload['user_input'], payload.get('context'), deadline):
+            yield event.encode('utf-8')
+
+
+def create_transport(kind=None, **shared):
+    """Transport chosen by BOT_TRANSPORT (http | unix | inprocess).
+    `shared` resources are only used by the inprocess transport.
+    """
+    kind = (kind or os.getenv('BOT_TRANSPORT', 'http')).lower()
+    if kind == 'unix':
+        return UnixSocketTransport(os.getenv('BOT_SOCKET', DEFAULT_BOT_SOCKET))
+    if kind == 'inprocess':
+        return InProcessTransport(**shared)
+    if kind != 'http':
+        print(f"⚠️ Unknown BOT_TRANSPORT {kind!r}, using http")
+    return HTTPTransport(os.getenv('BOT_URL', DEFAULT_BOT_URL))
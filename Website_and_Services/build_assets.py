@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Static Asset Builder
+Writes content-hashed copies of static/ (plus .gz / .br variants) to
+static/dist/ and their manifest (see static_assets.py). app.py also does
+this at startup unless ASSETS_BUILD=0, so running it is only needed for
+deploys that build once and start many servers
+
+    python build_assets.py          # build
+    python build_assets.py --prune  # build and delete files of older builds
+"""
+
+import argparse
+import os
+import time
+
+from static_assets import DIST_DIR, brotli, build_assets, prune_assets
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--static', default=STATIC_DIR, help='static directory (default: %(default)s)')
+    parser.add_argument('--prune', action='store_true', help='remove files not in the new manifest')
+    args = parser.parse_args()
+
+    print("🗜️ Building static assets...")
+    print("=" * 50)
+    started = time.perf_counter()
+    manifest = build_assets(args.static)
+    dist_dir = os.path.join(args.static, DIST_DIR)
+    for filename, target in sorted(manifest.items()):
+        sizes = [f"{os.path.getsize(os.path.join(args.static, filename)) / 1024:.1f} KB"]
+        for suffix in ('.gz', '.br'):
+            variant = os.path.join(dist_dir, target + suffix)
+            if os.path.exists(variant):
+                sizes.append(f"{suffix[1:]} {os.path.getsize(variant) / 1024:.1f} KB")
+        print(f"   {filename} -> {target}  ({', '.join(sizes)})")
+    if not brotli:
+        print("⚠️ brotli not installed, only gzip variants written")
+    if args.prune:
+        print(f"🧹 Removed {prune_assets(args.static, manifest)} files of older builds")
+    print(f"✅ {len(manifest)} assets built in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Corpus Builder
+Chunks the travel data files into retrieval passages, embeds them in batches
+and publishes a versioned, memory-mappable corpus that app.py and
+travel_bot.py load at startup (see travel_corpus.py)
+
+    python build_corpus.py                  # passages + embeddings
+    python build_corpus.py --no-embeddings  # passages only (BM25 retrieval)
+"""
+
+import argparse
+import time
+
+from travel_corpus import CORPUS_DIR, build_corpus, load_corpus
+
+EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--out', default=CORPUS_DIR, help='corpus directory (default: %(default)s)')
+    parser.add_argument('--model', default=EMBEDDING_MODEL_NAME, help='SentenceTransformer model')
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--no-embeddings', action='store_true', help='skip embeddings')
+    args = parser.parse_args()
+
+    print("📦 Building travel corpus...")
+    print("=" * 50)
+
+    encode = None
+    model_name = None
+    if not args.no_embeddings:
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError:
+            print("⚠️ sentence-transformers not installed, building without embeddings")
+        else:
+            started = time.perf_counter()
+            model = SentenceTransformer(args.model, device='cpu')
+            print(f"🧠 Loaded {args.model} in {time.perf_counter() - started:.1f}s")
+            encode = lambda texts: model.encode(texts, convert_to_numpy=True, batch_size=args.batch_size)
+            model_name = args.model
+
+    manifest = build_corpus(encode, model_name, out_dir=args.out, batch_size=args.batch_size)
+    embedded = f", {manifest['dim']}-d embeddings" if manifest['dim'] else ""
+    print(f"✅ Corpus {manifest['version']}: {manifest['passages']} passages{embedded}"
+          f" in {manifest['build_seconds']:.2f}s")
+
+    started = time.perf_counter()
+    corpus = load_corpus(args.out)
+    print(f"⚡ Load check: {len(corpus)} passages in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    print("\n" + "=" * 50)
+    print("🎉 Corpus build completed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""
+Catalog snapshot with precomputed facet bitsets.
+
+Every destination gets a slot number; for every facet value we keep one
+Python int whose bit N is set when slot N carries that value. Facet counts
+for any filtered subset are then a handful of AND + popcount operations.
+Updates and queries run under one lock: request threads update single
+destinations while others count facets and the reconciliation job reloads.
+"""
+
+import threading
+
+# Price bands are disjoint: (key, low inclusive, high exclusive)
+PRICE_BANDS = [
+    ('under_500', 0, 500),
+    ('500_1000', 500, 1000),
+    ('1000_5000', 1000, 5000),
+    ('5000_plus', 5000, None),
+]
+
+# Rating bands are cumulative ("4.5 & up") to match the ?rating= filter
+RATING_BANDS = [
+    ('4.5_plus', 4.5),
+    ('4_plus', 4.0),
+    ('3_plus', 3.0),
+]
+
+
+def price_band(price):
+    """Return the price band key for a price"""
+    for key, low, high in PRICE_BANDS:
+        if price >= low and (high is None or price < high):
+            return key
+    return None
+
+
+def rating_bands(rating):
+    """Return every cumulative rating band a rating falls into"""
+    return [key for key, threshold in RATING_BANDS if rating >= threshold]
+
+
+class Catalog:
+    """Destination snapshot with facet bitsets, updated incrementally on reload"""
+
+    def __init__(self, records=None):
+        self.version = 0
+        self._slots = {}        # destination id -> slot
+        self._records = []      # slot -> facet-relevant copy of the record
+        self._free_slots = []
+        self._live = 0          # bitmask of occupied slots
+        self._bits = {'category': {}, 'price': {}, 'rating': {}}
+        self._lock = threading.RLock()
+        if records:
+            self.reload(records)
+
+    # ----- building -----
+
+    @staticmethod
+    def _snapshot(record):
+        """Copy only the fields the facets and filters depend on"""
+        return {
+            'id': record['id'],
+            'category': record.get('category'),
+            'price': record.get('price') or 0,
+            'rating': record.get('rating') or 0,
+            'name': (record.get('name') or '').lower(),
+            'location': (record.get('location') or '').lower(),
+            'description': (record.get('description') or '').lower(),
+        }
+
+    def _facet_values(self, snap):
+        yield 'category', snap['category']
+        yield 'price', price_band(snap['price'])
+        for band in rating_bands(snap['rating']):
+            yield 'rating', band
+
+    def _set_bits(self, slot, snap):
+        bit = 1 << slot
+        for facet, value in self._facet_values(snap):
+            if value is None:
+                continue
+            values = self._bits[facet]
+            values[value] = values.get(value, 0) | bit
+        self._live |= bit
+
+    def _clear_bits(self, slot, snap):
+        bit = 1 << slot
+        for facet, value in self._facet_values(snap):
+            values = self._bits[facet]
+            if value in values:
+                values[value] &= ~bit
+                if not values[value]:
+                    del values[value]
+        self._live &= ~bit
+
+    def _apply(self, record):
+        """Slot one record in, re-setting its bits only if it changed; returns its id and whether it did"""
+        snap = self._snapshot(record)
+        dest_id = snap['id']
+        slot = self._slots.get(dest_id)
+
+        if slot is None:
+            slot = self._free_slots.pop() if self._free_slots else len(self._records)
+            if slot == len(self._records):
+                self._records.append(None)
+            self._slots[dest_id] = slot
+        elif self._records[slot] == snap:
+            return dest_id, False
+        else:
+            self._clear_bits(slot, self._records[slot])
+
+        self._records[slot] = snap
+        self._set_bits(slot, snap)
+        return dest_id, True
+
+    def reload(self, records):
+        """Apply a new list of destinations, touching only changed records.
+
+        Returns the number of records added, changed or removed. The
+        snapshot version is bumped whenever that number is non-zero.
+        """
+        changes = 0
+        seen = set()
+
+        with self._lock:
+            for record in records:
+                dest_id, changed = self._apply(record)
+                seen.add(dest_id)
+                changes += changed
+
+            for dest_id in [d for d in self._slots if d not in seen]:
+                slot = self._slots.pop(dest_id)
+                self._clear_bits(slot, self._records[slot])
+                self._records[slot] = None
+                self._free_slots.append(slot)
+                changes += 1
+
+            if changes:
+                self.version += 1
+        return changes
+
+    def update(self, record):
+        """Apply one added or changed destination, leaving the others alone.
+        Returns True, and bumps the version, only if its facet values changed
+        (a new rating within the same band leaves cached pages valid).
+        """
+        with self._lock:
+            slot = self._slots.get(record['id'])
+            before = None if slot is None else list(self._facet_values(self._records[slot]))
+            dest_id, changed = self._apply(record)
+            if not changed or list(self._facet_values(self._records[self._slots[dest_id]])) == before:
+                return False
+            self.version += 1
+        return True
+
+    # ----- querying -----
+
+    def __len__(self):
+        with self._lock:
+            return len(self._slots)
+
+    def _scan_mask(self, predicate):
+        """Build a mask from a per-record predicate (for arbitrary thresholds)"""
+        mask = 0
+        for slot, snap in enumerate(self._records):
+            if snap is not None and predicate(snap):
+                mask |= 1 << slot
+        return mask
+
+    def filter_masks(self, category='all', search='', min_price=None, max_price=None, rating=None):
+        """Return a bitmask per active filter, keyed by the facet it restricts"""
+        masks = {}
+
+        if category and category != 'all':
+            masks['category'] = self._bits['category'].get(category, 0)
+
+        if min_price is not None or max_price is not None:
+            masks['price'] = self._scan_mask(
+                lambda s: (min_price is None or s['price'] >= min_price)
+                and (max_price is None or s['price'] <= max_price))
+
+        if rating is not None:
+            band = next((key for key, threshold in RATING_BANDS if threshold == rating), None)
+            if band is not None:
+                masks['rating'] = self._bits['rating'].get(band, 0)
+            else:
+                masks['rating'] = self._scan_mask(lambda s: s['rating'] >= rating)
+
+        if search:
+            needle = search.lower()
+            masks['search'] = self._scan_mask(
+                lambda s: needle in s['name'] or needle in s['location'] or needle in s['description'])
+
+        return masks
+
+    def facet_counts(self, **filters):
+        """Count every facet value over the filtered subset in one pass.
+
+        Each facet is counted against all filters except its own, so the
+        sidebar still shows how many results picking another value would give.
+        """
+        with self._lock:
+            masks = self.filter_masks(**filters)
+
+            matched = self._live
+            for mask in masks.values():
+                matched &= mask
+
+            facets = {}
+            for facet, values in self._bits.items():
+                base = self._live
+                for name, mask in masks.items():
+                    if name != facet:
+                        base &= mask
+                facets[facet] = {value: (bits & base).bit_count() for value, bits in values.items()}
+
+            return {
+                'facets': facets,
+                'total': matched.bit_count(),
+                'version': self.version,
+            }
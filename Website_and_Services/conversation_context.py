@@ -0,0 +1,165 @@
+"""
+Token-budgeted chat prompts with conversation history.
+
+The web client sends the last few turns as conversation_history
+([{user, bot, timestamp, context_docs?}, ...]). build_chat_messages() fits
+them into a fixed prompt budget: the system prompt with the retrieved
+documents and the new question always go in, then the newest turns as
+user/assistant messages, then a one-line-per-turn summary of older turns.
+Whatever still does not fit is dropped. Documents already used for a turn
+that is still in the prompt are not repeated.
+"""
+
+import hashlib
+import math
+import threading
+
+# Rough chars-per-token ratio for English text when tiktoken is unavailable
+CHARS_PER_TOKEN = 4
+
+# Per-message overhead of the chat template (role markers etc.)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# Longest single history message kept verbatim (older ones get summarized)
+MAX_TURN_CHARS = 1200
+SUMMARY_CHARS = 90
+
+_encoding = None             # None until loaded, False if tiktoken is unavailable
+_encoding_lock = threading.Lock()
+_warm_started = False
+
+
+def load_encoding():
+    """Load tiktoken's cl100k_base (may download its BPE file); returns it, or False"""
+    global _encoding
+    with _encoding_lock:
+        if _encoding is None:
+            try:
+                import tiktoken
+                _encoding = tiktoken.get_encoding("cl100k_base")
+            except Exception:
+                # Not installed, or the BPE file cannot be downloaded
+                _encoding = False
+    return _encoding
+
+
+def warm_encoding():
+    """Load the tokenizer on a daemon thread; returns immediately.
+    Token counts use the character estimate until it is ready.
+    """
+    global _warm_started
+    with _encoding_lock:
+        if _warm_started or _encoding is not None:
+            return False
+        _warm_started = True
+    threading.Thread(target=load_encoding, name='tokenizer-loader', daemon=True).start()
+    return True
+
+
+def count_tokens(text):
+    """Token count of `text` (estimate while tiktoken is loading or unavailable)"""
+    if not text:
+        return 0
+    encoding = _encoding
+    if encoding is None:
+        warm_encoding()   # lazy start if nothing warmed it at startup
+    if encoding:
+        return len(encoding.encode(text, disallowed_special=()))
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def document_id(doc):
+    """Short stable id of a travel document (echoed back by the client)"""
+    return hashlib.sha1(doc.encode('utf-8')).hexdigest()[:12]
+
+
+def normalize_history(history, max_turns=10):
+    """Keep well-formed {user, bot} turns, newest last"""
+    turns = []
+    for item in history or []:
+        if not isinstance(item, dict):
+            continue
+        user = item.get('user')
+        bot = item.get('bot')
+        if not isinstance(user, str) or not isinstance(bot, str) or not user.strip():
+            continue
+        context_docs = item.get('context_docs')
+        turns.append({
+            'user': user.strip()[:MAX_TURN_CHARS],
+            'bot': bot.strip()[:MAX_TURN_CHARS],
+            'context_docs': [d for d in context_docs if isinstance(d, str)] if isinstance(context_docs, list) else []
+        })
+    return turns[-max_turns:]
+
+
+def _summary_line(turn):
+    question = ' '.join(turn['user'].split())
+    if len(question) > SUMMARY_CHARS:
+        question = question[:SUMMARY_CHARS].rsplit(' ', 1)[0] + '…'
+    return f"- Traveller asked: {question}"
+
+
+def build_chat_messages(build_system_prompt, user_input, documents, history, budget=1536):
+    """Assemble Ollama chat messages under `budget` prompt tokens.
+
+    build_system_prompt(context) -> str renders the system prompt around the
+    document context. Returns (messages, info) where info records the prompt
+    token count and what was kept, summarized, dropped and deduplicated.
+    """
+    turns = normalize_history(history)
+
+    def turn_tokens(turn):
+        return count_tokens(turn['user']) + count_tokens(turn['bot']) + 2 * MESSAGE_OVERHEAD_TOKENS
+
+    # Newest turns first, as many as fit next to the question and documents
+    fixed = count_tokens(build_system_prompt("")) + count_tokens(user_input) + 2 * MESSAGE_OVERHEAD_TOKENS
+    unique_docs = list(dict.fromkeys(documents or []))
+    doc_tokens = sum(count_tokens(doc) + 1 for doc in unique_docs)
+
+    kept = []
+    used = fixed + doc_tokens
+    for turn in reversed(turns):
+        cost = turn_tokens(turn)
+        if used + cost > budget:
+            break
+        kept.insert(0, turn)
+        used += cost
+    older = turns[:len(turns) - len(kept)]
+
+    # The answers of kept turns already cover the documents they were built on
+    shown = {doc_id for turn in kept for doc_id in turn['context_docs']}
+    context_docs = [doc for doc in unique_docs if document_id(doc) not in shown]
+    deduped = len(unique_docs) - len(context_docs)
+    used -= sum(count_tokens(doc) + 1 for doc in unique_docs if document_id(doc) in shown)
+
+    # Older turns collapse to one line each, newest first, while they fit
+    summary = []
+    for turn in reversed(older):
+        line = _summary_line(turn)
+        cost = count_tokens(line) + 1
+        if used + cost > budget:
+            break
+        summary.insert(0, line)
+        used += cost
+
+    context = "\n".join(context_docs)
+    if summary:
+        context = (context + "\n\n" if context else "") + "EARLIER IN THIS CONVERSATION:\n" + "\n".join(summary)
+
+    messages = [{"role": "system", "content": build_system_prompt(context)}]
+    for turn in kept:
+        messages.append({"role": "user", "content": turn['user']})
+        messages.append({"role": "assistant", "content": turn['bot']})
+    messages.append({"role": "user", "content": user_input})
+
+    info = {
+        'prompt_tokens': sum(count_tokens(m['content']) + MESSAGE_OVERHEAD_TOKENS for m in messages),
+        'token_budget': budget,
+        'history_turns': len(kept),
+        'summarized_turns': len(summary),
+        'dropped_turns': len(older) - len(summary),
+        'documents': len(context_docs),
+        'deduplicated_documents': deduped,
+        'context_docs': [document_id(doc) for doc in unique_docs],
+    }
+    return messages, info
@@ -0,0 +1,73 @@
+"""
+Persisted document-embedding matrix for chat retrieval.
+
+Corpus embeddings are computed once, L2-normalized and saved as a float32
+.npy file named after a content hash of the corpus and the model. Later
+starts memory-map the file instead of re-encoding, and a query is scored
+with one matrix-vector product plus argpartition.
+"""
+
+import hashlib
+import os
+
+import numpy as np
+
+# Next to this module, not the working directory, so every launcher finds the same cache
+EMBEDDINGS_DIR = os.getenv('EMBEDDINGS_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'embeddings'))
+
+
+def corpus_fingerprint(documents, model_name):
+    """Content hash of the corpus text and the model that embeds it"""
+    digest = hashlib.sha256(model_name.encode('utf-8'))
+    for doc in documents:
+        digest.update(b'\0')
+        digest.update(doc.encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+def normalize_rows(vectors):
+    """L2-normalize each row so a dot product is a cosine similarity"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors.reshape(1, -1)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def load_document_matrix(documents, encode, model_name, cache_dir=EMBEDDINGS_DIR):
+    """Return the (n_docs, dim) normalized embedding matrix, memory-mapped from disk.
+
+    `encode` takes a list of strings and returns their embeddings; it is
+    only called when no matrix exists yet for this corpus + model.
+    """
+    path = os.path.join(cache_dir, f"{corpus_fingerprint(documents, model_name)}.npy")
+
+    if os.path.exists(path):
+        matrix = np.load(path, mmap_mode='r')
+        if matrix.shape[0] == len(documents):
+            return matrix
+
+    os.makedirs(cache_dir, exist_ok=True)
+    matrix = normalize_rows(encode(list(documents)))
+
+    # Write to a temp file first so concurrent workers never map a partial file
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        np.save(f, matrix)
+    os.replace(tmp_path, path)
+
+    return np.load(path, mmap_mode='r')
+
+
+def top_k_indices(matrix, query_vector, top_k=3):
+    """Indices of the top_k rows most similar to a normalized query, best first"""
+    scores = matrix @ np.asarray(query_vector, dtype=np.float32).ravel()
+    n = scores.shape[0]
+    if n == 0:
+        return []
+    if top_k >= n:
+        candidates = np.arange(n)
+    else:
+        candidates = np.argpartition(-scores, top_k)[:top_k]
+    return candidates[np.argsort(-scores[candidates])].tolist()
@@ -0,0 +1,84 @@
+"""
+End-to-end request deadlines for the chat call chain.
+
+A chat request gets one total time budget when it enters app.py. Every hop
+(retrieval, the travel_bot proxy call, the Ollama queue, generation) runs
+against what is left of it instead of its own fixed timeout, and the
+remaining budget travels to the next service in the X-Request-Deadline-Ms
+header. When the remainder can no longer cover a hop, the caller serves its
+fallback answer right away. Streaming answers must start within the budget;
+once tokens are flowing to the user they are not cut off.
+"""
+
+import os
+import time
+
+import requests
+
+DEADLINE_HEADER = 'X-Request-Deadline-Ms'
+
+# Total time for one chat answer when the caller forwards no budget, in every service
+DEFAULT_CHAT_DEADLINE_MS = 20000
+
+# Time kept back at each hop to return the fallback answer if the next hop runs out
+HOP_RESERVE_MS = 250
+
+# Less than this left and an Ollama generation is not worth starting
+MIN_GENERATION_MS = 1000
+
+
+def chat_deadline_ms():
+    """CHAT_DEADLINE_MS from the environment (call after load_dotenv), else the shared default"""
+    return float(os.getenv('CHAT_DEADLINE_MS', DEFAULT_CHAT_DEADLINE_MS))
+
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+    """Not enough of the request's budget left for the next hop (handled like a timeout)"""
+
+
+class Deadline:
+    """A point in time (time.monotonic()) by which the request must be answered"""
+
+    def __init__(self, budget_ms):
+        self.budget_ms = budget_ms
+        self.expires_at = time.monotonic() + budget_ms / 1000
+
+    @classmethod
+    def from_headers(cls, headers, default_ms, max_ms=None):
+        """The budget forwarded by the caller, else `default_ms`; capped at `max_ms`"""
+        budget_ms = default_ms
+        value = headers.get(DEADLINE_HEADER) if headers else None
+        if value:
+            try:
+                budget_ms = max(0.0, float(value))
+            except ValueError:
+                pass
+        if max_ms is not None:
+            budget_ms = min(budget_ms, max_ms)
+        return cls(budget_ms)
+
+    def remaining(self):
+        """Seconds left (never negative)"""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def remaining_ms(self):
+        return self.remaining() * 1000
+
+    def expired(self):
+        return self.remaining() <= 0
+
+    def can_afford(self, ms):
+        return self.remaining_ms() >= ms
+
+    def timeout(self, cap=None, reserve_ms=HOP_RESERVE_MS):
+        """Timeout (seconds) for the next hop, leaving `reserve_ms` for our own fallback"""
+        seconds = max(0.0, self.remaining() - reserve_ms / 1000)
+        return min(seconds, cap) if cap is not None else seconds
+
+    def child(self, reserve_ms=HOP_RESERVE_MS):
+        """Monotonic deadline for a local hop (e.g. the Ollama gateway), `reserve_ms` early"""
+        return self.expires_at - reserve_ms / 1000
+
+    def headers(self, reserve_ms=HOP_RESERVE_MS):
+        """Header forwarding the budget left for the next service"""
+        return {DEADLINE_HEADER: str(int(self.timeout(reserve_ms=reserve_ms) * 1000))}
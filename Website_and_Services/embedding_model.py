@@ -0,0 +1,109 @@
+"""
+Lazy, background loading of the SentenceTransformer model.
+
+Importing sentence_transformers (and torch) and constructing the model takes
+seconds and hundreds of MB, so it must not happen at module import. A
+LazyEmbeddingModel loads on a daemon thread (or on first use) and reports
+its readiness; callers use keyword retrieval until it is ready.
+"""
+
+import importlib.util
+import threading
+import time
+
+IDLE = 'idle'
+LOADING = 'loading'
+READY = 'ready'
+UNAVAILABLE = 'unavailable'   # sentence-transformers not installed
+FAILED = 'failed'
+
+
+def sentence_transformers_installed():
+    """Check for the package without paying for its import"""
+    return importlib.util.find_spec('sentence_transformers') is not None
+
+
+class LazyEmbeddingModel:
+    """SentenceTransformer wrapper that loads in the background and reports readiness"""
+
+    def __init__(self, model_name, device='cpu'):
+        self.model_name = model_name
+        self.device = device
+        self.model = None
+        self.state = IDLE if sentence_transformers_installed() else UNAVAILABLE
+        self.error = None
+        self.load_seconds = None
+        self._callbacks = []
+        self._lock = threading.Lock()
+        self._loaded = threading.Event()
+
+    @property
+    def is_ready(self):
+        return self.state == READY
+
+    def on_ready(self, callback):
+        """Register callback(model), run on the loader thread once the model is loaded"""
+        with self._lock:
+            self._callbacks.append(callback)
+            run_now = self.state == READY
+        if run_now:
+            callback(self.model)
+
+    def start(self):
+        """Begin loading on a daemon thread; returns immediately"""
+        with self._lock:
+            if self.state != IDLE:
+                return False
+            self.state = LOADING
+        threading.Thread(target=self._load, name='embedding-model-loader', daemon=True).start()
+        return True
+
+    def wait(self, timeout=None):
+        """Block until loading finished (successfully or not)"""
+        if self.state in (UNAVAILABLE, IDLE):
+            return self.is_ready
+        self._loaded.wait(timeout)
+        return self.is_ready
+
+    def _load(self):
+        started = time.perf_counter()
+        print(f"📥 Loading SentenceTransformer model in background: {self.model_name}")
+        try:
+            from sentence_transformers import SentenceTransformer
+            model = SentenceTransformer(self.model_name, device=self.device)
+        except Exception as e:
+            self.error = str(e)
+            self.state = FAILED
+            self._loaded.set()
+            print(f"❌ Error loading SentenceTransformer: {e}")
+            return
+
+        self.model = model
+        self.load_seconds = round(time.perf_counter() - started, 3)
+
+        # Callbacks (e.g. building the corpus matrix) run before we report ready,
+        # so search never sees a model without its document index
+        done = 0
+        while True:
+            with self._lock:
+                pending = self._callbacks[done:]
+                done = len(self._callbacks)
+                if not pending:
+                    self.state = READY
+                    break
+            for callback in pending:
+                try:
+                    callback(model)
+                except Exception as e:
+                    print(f"❌ Embedding ready callback failed: {e}")
+        self._loaded.set()
+        print(f"✅ SentenceTransformer ready in {self.load_seconds}s")
+
+    def status(self):
+        return {
+            'model': self.model_name,
+            'state': self.state,
+            'ready': self.is_ready,
+            'load_seconds': self.load_seconds,
+            'error': self.error,
+        }
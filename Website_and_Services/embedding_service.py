@@ -0,0 +1,101 @@
+"""
+Micro-batching embedding service.
+
+Concurrent chat requests each need one query embedding. Instead of calling
+model.encode() once per request (batch size 1, all threads fighting over the
+GIL), callers enqueue their text and a single worker thread collects queries
+for up to max_wait_ms, encodes them in one batch and resolves each caller's
+future.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+import numpy as np
+
+from metrics import Histogram
+
+BATCH_SIZE_BUCKETS = [1, 2, 4, 8, 16, 32, 64, 128]
+
+
+class BatchingEmbedder:
+    """Queue + worker thread that encodes queued texts in batches"""
+
+    def __init__(self, model, max_batch_size=32, max_wait_ms=5):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+        self.queue_ms = Histogram()
+        self.encode_ms = Histogram()
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name='embedding-batcher', daemon=True)
+        self._worker.start()
+
+    def submit(self, text):
+        """Queue a text for encoding; returns a Future resolving to a float32 vector"""
+        future = Future()
+        self._queue.put((text, future, time.perf_counter()))
+        return future
+
+    def encode(self, text, timeout=None):
+        """Blocking helper: embed one text through the batch queue"""
+        future = self.submit(text)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeout:
+            future.cancel()   # drop it from the next batch if it has not started yet
+            raise
+
+    def _collect(self):
+        """Block for the first item, then gather more until the batch is full or max_wait passes"""
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait_ms / 1000
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            # Skip callers that gave up (cancelled their future) while queued
+            batch = [item for item in batch if item[1].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            started = time.perf_counter()
+            for _, _, queued_at in batch:
+                self.queue_ms.observe((started - queued_at) * 1000)
+            self.batch_sizes.observe(len(batch))
+
+            try:
+                vectors = np.asarray(
+                    self.model.encode([text for text, _, _ in batch], convert_to_numpy=True),
+                    dtype=np.float32
+                )
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+
+            self.encode_ms.observe((time.perf_counter() - started) * 1000)
+            for (_, future, _), vector in zip(batch, vectors):
+                future.set_result(vector)
+
+    def stats(self):
+        return {
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait_ms,
+            'queue_depth': self._queue.qsize(),
+            'batch_size': self.batch_sizes.snapshot(),
+            'queue_ms': self.queue_ms.snapshot(),
+            'encode_ms': self.encode_ms.snapshot(),
+        }
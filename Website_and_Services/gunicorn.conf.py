@@ -0,0 +1,64 @@
+"""
+Production server settings (gunicorn) for app.py and travel_bot.py.
+
+    python serve.py app            # main website, http://0.0.0.0:5000
+    python serve.py travel_bot     # AI service, port 5001
+
+or directly: gunicorn -c gunicorn.conf.py app:app
+
+The app is imported once in the master (preload_app) and the workers are
+forked from it, so the catalog, intent tables, BM25 index, corpus and its
+memory-mapped embedding matrix are shared copy-on-write. Background
+threads (model loading, Ollama keep-alive, review reconciliation) start in
+each worker after the fork (see background_tasks.py). Per-worker state
+such as the Ollama gateway limit and the semantic cache is multiplied by
+the worker count.
+
+Signals: HUP re-spawns the workers gracefully (settings reload; with
+preload_app the application code stays as loaded), USR2 then TERM on the
+old master upgrades to new code without dropping connections, TERM shuts
+down after in-flight requests finish (graceful_timeout).
+"""
+
+import multiprocessing
+import os
+
+from background_tasks import PREFORK_ENV
+
+# Tell the application it is being preloaded for forking
+os.environ[PREFORK_ENV] = '1'
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5000')
+
+# Processes x threads: threads cover requests that wait on Ollama, processes
+# cover CPU (retrieval, templates). Each worker loads its own embedding model.
+workers = int(os.getenv('GUNICORN_WORKERS', str(min(4, multiprocessing.cpu_count()))))
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', '8'))
+
+preload_app = os.getenv('GUNICORN_PRELOAD', '1') != '0'
+
+# Recycle workers after this many requests (jittered so they don't all restart
+# together) to bound memory growth
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '2000'))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', '200'))
+
+# Streaming chats keep a request open while tokens arrive
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '90'))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', '5'))
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+
+
+def when_ready(server):
+    server.log.info(f"🚀 {workers} workers x {threads} threads on {', '.join(server.cfg.bind)}"
+                    f" (preload={'on' if preload_app else 'off'}, recycle after ~{max_requests} requests)")
+
+
+def post_worker_init(worker):
+    # Runs in the worker after the app is loaded (inherited or imported)
+    from background_tasks import start_worker_tasks
+    started = start_worker_tasks()
+    worker.log.info(f"👷 Worker {worker.pid} ready ({started} background tasks started)")
@@ -0,0 +1,49 @@
+"""
+Liveness and readiness probes for app.py and travel_bot.py.
+
+/healthz answers as soon as the process serves requests (the supervisor in
+start_services.py restarts a service that stops answering it). /readyz
+answers 200 only once startup work has settled: the background embedding
+model has finished loading and the Ollama chat model preload has returned.
+A component that finished unsuccessfully (sentence-transformers missing,
+Ollama down) still counts as settled and is reported as degraded, since
+waiting longer would not make chats any better.
+"""
+
+import os
+import time
+
+from embedding_model import LOADING, READY
+
+STARTED_AT = time.time()
+
+
+def liveness():
+    return {'status': 'ok', 'pid': os.getpid(), 'uptime_s': round(time.time() - STARTED_AT, 1)}
+
+
+def embedding_check(model):
+    """(settled, degraded, detail) for a LazyEmbeddingModel"""
+    return model.state != LOADING, model.state != READY, model.state
+
+
+def lifecycle_check(lifecycle):
+    """(settled, degraded, detail) for an Ollama ModelLifecycle"""
+    if lifecycle.warming:
+        return False, False, f"preloading {lifecycle.model}"
+    if lifecycle.preloaded:
+        return True, False, f"{lifecycle.model} warm"
+    return True, True, f"{lifecycle.model} not preloaded"
+
+
+def readiness(checks):
+    """Probe body and HTTP status from {name: (settled, degraded, detail)}"""
+    ready = all(settled for settled, _, _ in checks.values())
+    degraded = [name for name, (settled, bad, _) in checks.items() if settled and bad]
+    body = {
+        'status': 'starting' if not ready else 'degraded' if degraded else 'ready',
+        'uptime_s': round(time.time() - STARTED_AT, 1),
+        'checks': {name: {'ready': settled, 'degraded': bad, 'detail': detail}
+                   for name, (settled, bad, detail) in checks.items()},
+    }
+    return body, 200 if ready else 503
@@ -0,0 +1,156 @@
+"""
+Data-driven intent router for AtithiBot's rule-based replies.
+
+The fallback answers and quick-reply suggestions used when Ollama is not
+available are defined in data/config/chatbot_config.json under
+"intent_router":
+
+    "intents":  {name: [keyword, ...]}               shared keyword lists
+    "profiles": {profile: {"fallback": [rule, ...],
+                           "suggestions": [rule, ...]}}
+
+A rule matches when any of its keywords (default: its intent's list)
+occurs in the lowercased input as a substring, and all of its "all"
+keywords do. "source": "documents" matches against the retrieved travel
+documents instead, "requires_context" needs non-empty context, and a rule
+without keywords always matches. The first matching rule wins, so rules
+are listed most specific first and end with a default.
+
+The text is split into words once and the set of keywords it contains is
+assembled from a per-word memo (see KeywordMatcher). Rule resolution for a
+given set of matched keywords is memoized too, so routing a message costs
+a split, a few dict lookups and one more for the decision.
+"""
+
+import json
+from collections import namedtuple
+
+Route = namedtuple('Route', ['intent', 'response', 'suggestions'])
+
+# Retrieved context quoted in a fallback ("{context}" in the response text)
+CONTEXT_PREVIEW_CHARS = 400
+
+# Memoized rule decisions kept before the memo is reset
+MAX_DECISIONS = 4096
+
+# Memoized words (-> keywords they contain) kept before the memo is reset
+MAX_WORDS = 16384
+
+
+class KeywordMatcher:
+    """All keywords a text contains as substrings, found word by word.
+
+    A keyword without spaces can only occur inside one whitespace-separated
+    word, so the text is split once and each distinct word is looked up in a
+    memo of the keywords it contains. Chat messages reuse a small vocabulary,
+    so most words are a dict hit; keywords with spaces are checked directly.
+    """
+
+    def __init__(self, keywords):
+        self.keywords = sorted(set(k for k in keywords if k))
+        self._phrases = tuple(k for k in self.keywords if len(k.split()) != 1 or k != k.strip())
+        self._single = tuple(k for k in self.keywords if k not in self._phrases)
+        self._by_word = {}
+
+    def _learn(self, word):
+        found = frozenset(k for k in self._single if k in word)
+        if len(self._by_word) >= MAX_WORDS:
+            self._by_word.clear()
+        self._by_word[word] = found
+        return found
+
+    def find(self, text):
+        if not self.keywords or not text:
+            return frozenset()
+        words = set(text.split())
+        hits = list(map(self._by_word.get, words))
+        if None in hits:
+            hits = [self._learn(word) if found is None else found for word, found in zip(words, hits)]
+        found = frozenset().union(*hits)
+        phrases = [k for k in self._phrases if k in text]
+        return found.union(phrases) if phrases else found
+
+
+class IntentRouter:
+    """Compiled fallback/suggestion rules for every profile"""
+
+    def __init__(self, config):
+        intents = config.get('intents', {})
+        self.intents = {name: frozenset(k.lower() for k in words) for name, words in intents.items()}
+        self.profiles = {}
+        keywords = set().union(*self.intents.values())
+
+        for name, profile in config.get('profiles', {}).items():
+            compiled = {}
+            for kind in ('fallback', 'suggestions'):
+                rules = []
+                for rule in profile.get(kind, []):
+                    intent = rule.get('intent', 'default')
+                    any_of = [k.lower() for k in rule.get('keywords', intents.get(intent, []))]
+                    all_of = [k.lower() for k in rule.get('all', [])]
+                    keywords.update(any_of, all_of)
+                    rules.append({
+                        'intent': intent,
+                        'any': frozenset(any_of),
+                        'all': frozenset(all_of),
+                        'source': rule.get('source', 'input'),
+                        'requires_context': rule.get('requires_context', False),
+                        'value': rule.get('response') if kind == 'fallback' else rule.get('suggestions', []),
+                    })
+                compiled[kind] = rules
+            compiled['uses_documents'] = any(rule['source'] == 'documents'
+                                             for rule in compiled['fallback'] + compiled['suggestions'])
+            self.profiles[name] = compiled
+
+        self.matcher = KeywordMatcher(keywords)
+        self._decisions = {}
+
+    @classmethod
+    def from_file(cls, path="data/config/chatbot_config.json"):
+        with open(path, "r", encoding='utf-8') as f:
+            return cls(json.load(f).get('intent_router', {}))
+
+    @staticmethod
+    def _first(rules, found, context):
+        for rule in rules:
+            if rule['requires_context'] and not context:
+                continue
+            hits = found[rule['source']]
+            if rule['any'] and not (rule['any'] & hits):
+                continue
+            if rule['all'] and not (rule['all'] <= hits):
+                continue
+            return rule
+        return None
+
+    def intents_in(self, text):
+        """Names of the intents whose keywords occur in `text`"""
+        found = self.matcher.find(text.lower())
+        return {name for name, words in self.intents.items() if words & found}
+
+    def route(self, profile, user_input, context='', docs=None):
+        """Route(intent, response, suggestions) for this input"""
+        rules = self.profiles[profile]
+        found = {'input': self.matcher.find(user_input.lower())}
+        if docs and rules['uses_documents']:
+            found['documents'] = self.matcher.find("\n".join(docs).lower())
+        else:
+            found['documents'] = frozenset()
+
+        key = (profile, found['input'], found['documents'], bool(context))
+        decision = self._decisions.get(key)
+        if decision is None:
+            decision = (self._first(rules['fallback'], found, context),
+                        self._first(rules['suggestions'], found, context))
+            if len(self._decisions) >= MAX_DECISIONS:
+                self._decisions.clear()
+            self._decisions[key] = decision
+        fallback, suggestion = decision
+        response = fallback['value'] if fallback else None
+        if response and '{context}' in response:
+            response = response.replace('{context}', context[:CONTEXT_PREVIEW_CHARS])
+        return Route(
+            intent=(fallback or suggestion or {}).get('intent', 'default'),
+            response=response,
+            suggestions=list(suggestion['value']) if suggestion else []
+        )
@@ -0,0 +1,138 @@
+"""
+BM25 inverted index over the travel corpus.
+
+Built once; a query only walks the posting lists of its own terms, so
+documents that share no term with the query are never touched. Partial
+matches (query word contained in a document word, e.g. "beach" ->
+"beaches") are resolved through a sorted vocabulary (prefixes) and a
+trigram dictionary (infixes) instead of scanning every document word.
+"""
+
+import bisect
+import heapq
+import math
+import re
+
+TOKEN_RE = re.compile(r"\w+")
+
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'in', 'is',
+    'it', 'of', 'on', 'or', 'the', 'to', 'with', 'what', 'which', 'i', 'me', 'my',
+}
+
+# Partial matches count half as much as exact ones (as the old keyword_search did)
+PARTIAL_WEIGHT = 0.5
+
+
+def tokenize(text):
+    """Lowercase word tokens without stopwords"""
+    return [t for t in TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+def _trigrams(term):
+    return {term[i:i + 3] for i in range(len(term) - 2)}
+
+
+class BM25Index:
+    """Okapi BM25 over a fixed list of documents"""
+
+    def __init__(self, documents, k1=1.5, b=0.75):
+        self.documents = list(documents)
+        self.k1 = k1
+        self.b = b
+        self.postings = {}      # term -> [(doc_no, term frequency), ...]
+        self.doc_lengths = []
+
+        for doc_no, doc in enumerate(self.documents):
+            counts = {}
+            tokens = tokenize(doc)
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            for term, tf in counts.items():
+                self.postings.setdefault(term, []).append((doc_no, tf))
+            self.doc_lengths.append(len(tokens))
+
+        n_docs = len(self.documents)
+        self.avg_doc_length = (sum(self.doc_lengths) / n_docs) if n_docs else 0.0
+        self.idf = {
+            term: math.log(1 + (n_docs - len(posting) + 0.5) / (len(posting) + 0.5))
+            for term, posting in self.postings.items()
+        }
+
+        # Partial-match dictionaries
+        self.vocabulary = sorted(self.postings)
+        self.trigram_terms = {}
+        for term in self.vocabulary:
+            for gram in _trigrams(term):
+                self.trigram_terms.setdefault(gram, set()).add(term)
+
+        self._expansions = {}
+
+    def __len__(self):
+        return len(self.documents)
+
+    def _prefix_terms(self, prefix):
+        start = bisect.bisect_left(self.vocabulary, prefix)
+        terms = []
+        for term in self.vocabulary[start:]:
+            if not term.startswith(prefix):
+                break
+            terms.append(term)
+        return terms
+
+    def partial_terms(self, word):
+        """Vocabulary terms that contain `word` (excluding `word` itself)"""
+        cached = self._expansions.get(word)
+        if cached is not None:
+            return cached
+
+        if len(word) < 3:
+            # Too short for trigrams: only expand by prefix
+            terms = self._prefix_terms(word)
+        else:
+            grams = _trigrams(word)
+            candidates = None
+            for gram in grams:
+                matches = self.trigram_terms.get(gram)
+                if not matches:
+                    candidates = set()
+                    break
+                candidates = set(matches) if candidates is None else candidates & matches
+            terms = [t for t in candidates or () if word in t]
+
+        terms = [t for t in terms if t != word]
+        if len(self._expansions) < 10000:
+            self._expansions[word] = terms
+        return terms
+
+    def _term_scores(self, term, weight, scores):
+        idf = self.idf[term]
+        k1, b, avg = self.k1, self.b, self.avg_doc_length or 1.0
+        for doc_no, tf in self.postings[term]:
+            norm = k1 * (1 - b + b * self.doc_lengths[doc_no] / avg)
+            scores[doc_no] = scores.get(doc_no, 0.0) + weight * idf * tf * (k1 + 1) / (tf + norm)
+
+    def score(self, query, partial=True):
+        """doc_no -> BM25 score for every document matching the query"""
+        scores = {}
+        for word in set(tokenize(query)):
+            if word in self.postings:
+                self._term_scores(word, 1.0, scores)
+            if partial:
+                for term in self.partial_terms(word):
+                    self._term_scores(term, PARTIAL_WEIGHT, scores)
+        return scores
+
+    def search(self, query, top_k=3, partial=True):
+        """Top-k [(doc_no, score), ...], best first"""
+        scores = self.score(query, partial)
+        return heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+
+
+def reciprocal_rank_fusion(rankings, top_k=3, k=60):
+    """Merge several ranked lists of doc ids into one (RRF)"""
+    fused = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking):
+            fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (k + rank + 1)
+    return [doc_id for doc_id, _ in heapq.nlargest(top_k, fused.items(), key=lambda item: item[1])]
@@ -0,0 +1,175 @@
+"""
+Lightweight in-process metrics (counters, fixed-bucket histograms and
+per-request stage timings).
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+# Default latency buckets in milliseconds
+LATENCY_BUCKETS_MS = [1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000]
+
+
+class Histogram:
+    """Thread-safe histogram with fixed upper-bound buckets"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = list(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self._count = 0
+        self._sum = 0.0
+        self._max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        with self._lock:
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self._counts[i] += 1
+                    break
+            else:
+                self._counts[-1] += 1
+            self._count += 1
+            self._sum += value
+            self._max = max(self._max, value)
+
+    def _percentile(self, q):
+        """Upper bound of the bucket containing the q-th quantile"""
+        if not self._count:
+            return None
+        target = q * self._count
+        running = 0
+        for bound, count in zip(self.buckets + [self._max], self._counts):
+            running += count
+            if running >= target:
+                return bound
+        return self._max
+
+    def snapshot(self):
+        with self._lock:
+            labels = [f"le_{b}" for b in self.buckets] + ['le_inf']
+            return {
+                'count': self._count,
+                'sum': round(self._sum, 3),
+                'mean': round(self._sum / self._count, 3) if self._count else None,
+                'max': round(self._max, 3),
+                'p50': self._percentile(0.5),
+                'p95': self._percentile(0.95),
+                'p99': self._percentile(0.99),
+                'buckets': dict(zip(labels, self._counts)),
+            }
+
+
+class HistogramFamily:
+    """Histograms keyed by a label (e.g. per model or per search method)"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = buckets
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def labels(self, label):
+        with self._lock:
+            histogram = self._histograms.get(label)
+            if histogram is None:
+                histogram = self._histograms[label] = Histogram(self.buckets)
+            return histogram
+
+    def observe(self, label, value):
+        self.labels(label).observe(value)
+
+    def snapshot(self):
+        with self._lock:
+            items = list(self._histograms.items())
+        return {label: histogram.snapshot() for label, histogram in items}
+
+
+class Counter:
+    """Thread-safe counters keyed by name"""
+
+    def __init__(self):
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name, amount=1):
+        with self._lock:
+            self._values[name] = self._values.get(name, 0) + amount
+
+    def get(self, name):
+        with self._lock:
+            return self._values.get(name, 0)
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._values)
+
+
+class StageTimer:
+    """Stage durations (ms) and attributes of one request"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = {}
+        self.fields = {}
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, (time.perf_counter() - started) * 1000)
+
+    def add(self, name, ms):
+        self.stages[name] = self.stages.get(name, 0.0) + ms
+
+    def set(self, **fields):
+        self.fields.update(fields)
+
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.started) * 1000
+
+    def report(self):
+        return {
+            'stages_ms': {name: round(ms, 1) for name, ms in self.stages.items()},
+            'total_ms': round(self.elapsed_ms(), 1),
+            **self.fields,
+        }
+
+
+class StageMetrics:
+    """Stage timings aggregated into histograms by label (e.g. model, search method)"""
+
+    def __init__(self, dimensions, buckets=LATENCY_BUCKETS_MS):
+        self.dimensions = tuple(dimensions)
+        self.buckets = buckets
+        self.fallbacks = Counter()
+        self._families = {}
+        self._lock = threading.Lock()
+
+    def _family(self, stage, dimension):
+        with self._lock:
+            family = self._families.get((stage, dimension))
+            if family is None:
+                family = self._families[(stage, dimension)] = HistogramFamily(self.buckets)
+            return family
+
+    def observe(self, timer):
+        """Record a finished StageTimer; its fields supply the label values"""
+        stages = dict(timer.stages, total=timer.elapsed_ms())
+        for dimension in self.dimensions:
+            label = timer.fields.get(dimension) or 'none'
+            for stage, ms in stages.items():
+                self._family(stage, dimension).observe(label, ms)
+        reason = timer.fields.get('fallback_reason')
+        if reason:
+            self.fallbacks.inc(reason)
+
+    def snapshot(self):
+        with self._lock:
+            families = list(self._families.items())
+        stages = {}
+        for (stage, dimension), family in families:
+            stages.setdefault(stage, {})[f"by_{dimension}"] = family.snapshot()
+        return {'stages_ms': stages, 'fallback_reasons': self.fallbacks.snapshot()}
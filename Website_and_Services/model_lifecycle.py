@@ -0,0 +1,179 @@
+"""
+Ollama model warm-up and keep-alive management.
+
+Ollama unloads a model after its keep_alive expires (5 minutes by default),
+and the next chat pays the full load time. ModelLifecycle preloads the chat
+model when the service starts, supplies the keep_alive sent with every chat
+request, and during the configured business hours pins the model in memory
+(keep_alive=-1), refreshing the pin periodically and releasing it after
+hours. Every Ollama response's load_duration is observed so model loads and
+cold starts can be reported. A model Ollama does not have (HTTP 404 on
+preload) is reported through on_missing and no longer maintained.
+"""
+
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+import requests
+
+from metrics import Counter, Histogram
+
+# A response whose load_duration exceeds this had to load the model
+COLD_LOAD_MS = 500
+
+
+def parse_hours(spec):
+    """'9-21' -> (9, 21); empty/invalid -> None. The range may wrap midnight ('22-6')."""
+    if not spec:
+        return None
+    try:
+        start, end = (int(part) for part in spec.split('-', 1))
+    except ValueError:
+        print(f"⚠️ Ignoring invalid pin hours: {spec!r} (expected e.g. 9-21)")
+        return None
+    if not (0 <= start <= 23 and 0 <= end <= 24) or start == end:
+        print(f"⚠️ Ignoring invalid pin hours: {spec!r}")
+        return None
+    return start, end
+
+
+class ModelLifecycle:
+    """Preload, keep-alive and business-hours pinning for one Ollama model"""
+
+    def __init__(self, server, model, keep_alive='30m', pin_hours=None, refresh_interval=300, max_events=50,
+                 on_missing=None):
+        self.server = server.rstrip('/')
+        self.model = model
+        self.on_missing = on_missing    # on_missing(model) when Ollama does not have it
+        self.keep_alive = keep_alive
+        self.pin_hours = parse_hours(pin_hours) if isinstance(pin_hours, str) else pin_hours
+        self.refresh_interval = refresh_interval
+        self.counters = Counter()
+        self.load_ms = Histogram()
+        self.events = deque(maxlen=max_events)
+        self.preloaded = False
+        self.preload_finished = False
+        self.missing = False
+        self._was_pinned = False
+        self._started = False
+        self._lock = threading.Lock()
+
+    def pinned(self, now=None):
+        """Inside business hours?"""
+        if not self.pin_hours:
+            return False
+        hour = (now or datetime.now()).hour
+        start, end = self.pin_hours
+        return start <= hour < end if start < end else (hour >= start or hour < end)
+
+    def keep_alive_value(self, now=None):
+        """keep_alive for the next request: -1 (stay loaded) while pinned"""
+        return -1 if self.pinned(now) else self.keep_alive
+
+    def observe(self, response, source):
+        """Record Ollama's load_duration (nanoseconds) from a chat/generate response"""
+        load_ns = response.get('load_duration') if isinstance(response, dict) else None
+        if not load_ns:
+            return
+        load_ms = load_ns / 1e6
+        self.load_ms.observe(load_ms)
+        if load_ms < COLD_LOAD_MS:
+            self.counters.inc('warm')
+            return
+        self.counters.inc('cold_starts')
+        self.counters.inc(f'cold_starts_{source}')
+        self.events.append({
+            'time': datetime.now().isoformat(timespec='seconds'),
+            'model': self.model,
+            'source': source,
+            'load_ms': round(load_ms, 1),
+        })
+        print(f"🧊 Ollama loaded {self.model} for {source} in {load_ms / 1000:.1f}s")
+
+    def _load(self, keep_alive, source, timeout=120):
+        """Empty /api/generate: loads the model (if needed) and resets its keep_alive"""
+        response = requests.post(f"{self.server}/api/generate", json={
+            "model": self.model,
+            "prompt": "",
+            "stream": False,
+            "keep_alive": keep_alive
+        }, timeout=timeout)
+        response.raise_for_status()
+        self.observe(response.json(), source)
+
+    def preload(self):
+        """Load the model now; returns True on success"""
+        started = time.perf_counter()
+        try:
+            self._load(self.keep_alive_value(), 'preload')
+        except requests.exceptions.RequestException as e:
+            self.counters.inc('preload_failures')
+            if getattr(e.response, 'status_code', None) == 404:
+                self.missing = True
+                print(f"⚠️ Ollama model {self.model} is not pulled (ollama pull {self.model})")
+                if self.on_missing:
+                    self.on_missing(self.model)
+                return False
+            print(f"⚠️ Could not preload Ollama model {self.model}: {e}")
+            return False
+        self.preloaded = True
+        print(f"🔥 Ollama model {self.model} warm ({time.perf_counter() - started:.1f}s)")
+        return True
+
+    def refresh(self, now=None):
+        """Renew the pin during business hours; release it once they end"""
+        pinned = self.pinned(now)
+        try:
+            if pinned:
+                self._load(-1, 'pin')
+                self.counters.inc('pin_refreshes')
+            elif self._was_pinned:
+                self._load(self.keep_alive, 'unpin')
+                print(f"🕘 Business hours over, {self.model} keep_alive back to {self.keep_alive}")
+        except requests.exceptions.RequestException as e:
+            self.counters.inc('refresh_failures')
+            print(f"⚠️ Ollama keep-alive refresh failed: {e}")
+            return
+        self._was_pinned = pinned
+
+    @property
+    def warming(self):
+        """Started and still waiting for the first preload to finish"""
+        return self._started and not self.preload_finished
+
+    def _run(self):
+        self.preload()
+        self.preload_finished = True
+        if self.missing:
+            return
+        self._was_pinned = self.pinned()
+        while True:
+            time.sleep(self.refresh_interval)
+            self.refresh()
+
+    def start(self):
+        """Preload and maintain the model on a daemon thread; returns immediately"""
+        with self._lock:
+            if self._started:
+                return False
+            self._started = True
+        threading.Thread(target=self._run, name='ollama-model-lifecycle', daemon=True).start()
+        return True
+
+    def status(self):
+        counts = self.counters.snapshot()
+        return {
+            'model': self.model,
+            'preloaded': self.preloaded,
+            'missing': self.missing,
+            'warming': self.warming,
+            'keep_alive': self.keep_alive_value(),
+            'pinned': self.pinned(),
+            'pin_hours': '-'.join(map(str, self.pin_hours)) if self.pin_hours else None,
+            'cold_starts': counts.get('cold_starts', 0),
+            'counts': counts,
+            'load_ms': self.load_ms.snapshot(),
+            'recent_loads': list(self.events),
+        }
@@ -0,0 +1,172 @@
+"""
+Latency-aware routing between a small and a large Ollama chat model.
+
+Short factual questions ("best time to visit Goa?") go to the fast small
+model; planning-style requests (configured intents such as "planning") and
+long messages go to the large one. Each request carries a latency budget:
+when the large model's recent latency (a moving average per model) would
+blow the budget, the request is downgraded to the small model. A small
+model that Ollama reports as missing (HTTP 404) is taken out of rotation
+and the request that found out is retried on the large one.
+
+Configured in data/config/app_config.json under ai.ollama:
+
+    "models":  {"default": <large model>, "small": <small model>, ...}
+    "routing": {"enabled", "small_max_words", "large_intents", "latency_budget_ms"}
+
+Routing ships disabled (every request goes to the default model). Enabling
+it needs the small model pulled as well, e.g. `ollama pull gemma3:1b`.
+
+Per-model latency histograms and quality counters (answers, errors, empty
+and truncated answers, budget overruns, answer length) are kept for tuning
+and reported by stats().
+"""
+
+import threading
+from collections import namedtuple
+
+from metrics import Counter, HistogramFamily
+
+ModelChoice = namedtuple('ModelChoice', ['model', 'tier', 'reason', 'budget_ms', 'expected_ms'])
+
+# Requests may ask for a tighter or looser budget, within these bounds
+MIN_BUDGET_MS = 1000
+MAX_BUDGET_MS = 120000
+
+
+class ModelRouter:
+    """Pick the small or large chat model per request and track how each performs"""
+
+    # Weight of the newest sample in each model's moving-average latency
+    EWMA_ALPHA = 0.2
+
+    def __init__(self, small, large, small_max_words=25, large_intents=(), latency_budget_ms=15000):
+        self.tiers = {'small': small or large, 'large': large}
+        self.small_max_words = small_max_words
+        self.large_intents = frozenset(large_intents)
+        self.latency_budget_ms = latency_budget_ms
+        self.counters = Counter()
+        self.latency_ms = HistogramFamily()
+        self._avg_ms = {}
+        self._missing = set()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, ollama_config, large, small=None):
+        """Build from app_config.json's ai.ollama section (`small` overrides models.small)"""
+        routing = ollama_config.get('routing', {})
+        small = small or ollama_config.get('models', {}).get('small')
+        return cls(
+            small=small if routing.get('enabled', True) else large,
+            large=large,
+            small_max_words=routing.get('small_max_words', 25),
+            large_intents=routing.get('large_intents', ()),
+            latency_budget_ms=routing.get('latency_budget_ms', 15000),
+        )
+
+    @property
+    def enabled(self):
+        return self.tiers['small'] != self.tiers['large'] and self.tiers['small'] not in self._missing
+
+    def mark_missing(self, model):
+        """Ollama does not have `model` (not pulled); stop routing to it"""
+        if model != self.tiers['large'] and model not in self._missing:
+            self._missing.add(model)
+            print(f"⚠️ Ollama model {model} not found, routing everything to {self.tiers['large']}")
+
+    def fallback_choice(self, choice):
+        """Large-model ModelChoice to retry `choice` with once its model was
+        marked missing; None if it already was the large model"""
+        large = self.tiers['large']
+        if choice.model == large or choice.model not in self._missing:
+            return None
+        self.counters.inc('large:small_missing')
+        return ModelChoice(large, 'large', 'small_missing', choice.budget_ms, self.expected_ms(large))
+
+    def classify(self, user_input, intents=()):
+        """('small' | 'large', reason) from the request's intents and length"""
+        matched = self.large_intents.intersection(intents)
+        if matched:
+            return 'large', f"intent:{sorted(matched)[0]}"
+        if len(user_input.split()) > self.small_max_words:
+            return 'large', 'long_request'
+        return 'small', 'short_request'
+
+    def expected_ms(self, model):
+        """Recent average latency of `model`, or None before its first answer"""
+        with self._lock:
+            return self._avg_ms.get(model)
+
+    def budget(self, requested=None):
+        """The request's latency budget, clamped; the configured default if absent or invalid"""
+        try:
+            requested = float(requested)
+        except (TypeError, ValueError):
+            return self.latency_budget_ms
+        return min(MAX_BUDGET_MS, max(MIN_BUDGET_MS, requested))
+
+    def choose(self, user_input, intents=(), budget_ms=None, remaining_ms=None):
+        """ModelChoice for this request; `remaining_ms` (time left before the
+        request's deadline) tightens the budget further"""
+        budget_ms = self.budget(budget_ms)
+        if remaining_ms is not None:
+            budget_ms = min(budget_ms, remaining_ms)
+        if not self.enabled:
+            tier, reason = 'large', 'single_model'
+        else:
+            tier, reason = self.classify(user_input, intents)
+            if tier == 'large':
+                large_ms = self.expected_ms(self.tiers['large'])
+                small_ms = self.expected_ms(self.tiers['small'])
+                if large_ms is not None and large_ms > budget_ms and (small_ms is None or small_ms < large_ms):
+                    tier, reason = 'small', 'latency_budget'
+        model = self.tiers[tier]
+        self.counters.inc(f"{tier}:{reason}")
+        return ModelChoice(model, tier, reason, budget_ms, self.expected_ms(model))
+
+    def record(self, choice, latency_ms, response='', error=False, truncated=False):
+        """Outcome of one generation with the chosen model"""
+        model = choice.model
+        if error:
+            self.counters.inc(f"{model}:errors")
+            return
+        self.latency_ms.observe(model, latency_ms)
+        with self._lock:
+            avg = self._avg_ms.get(model)
+            self._avg_ms[model] = latency_ms if avg is None else avg + self.EWMA_ALPHA * (latency_ms - avg)
+        self.counters.inc(f"{model}:answers")
+        self.counters.inc(f"{model}:answer_chars", len(response))
+        if not response.strip():
+            self.counters.inc(f"{model}:empty")
+        if truncated:
+            self.counters.inc(f"{model}:truncated")
+        if latency_ms > choice.budget_ms:
+            self.counters.inc(f"{model}:over_budget")
+
+    def stats(self):
+        counts = self.counters.snapshot()
+        with self._lock:
+            averages = dict(self._avg_ms)
+        models = {}
+        for tier, model in self.tiers.items():
+            answers = counts.get(f"{model}:answers", 0)
+            models[model] = {
+                'tier': 'single' if not self.enabled else tier,
+                'answers': answers,
+                'errors': counts.get(f"{model}:errors", 0),
+                'empty': counts.get(f"{model}:empty", 0),
+                'truncated': counts.get(f"{model}:truncated", 0),
+                'over_budget': counts.get(f"{model}:over_budget", 0),
+                'avg_answer_chars': round(counts.get(f"{model}:answer_chars", 0) / answers, 1) if answers else None,
+                'avg_latency_ms': round(averages[model], 1) if model in averages else None,
+            }
+        return {
+            'enabled': self.enabled,
+            'missing_models': sorted(self._missing),
+            'small_max_words': self.small_max_words,
+            'large_intents': sorted(self.large_intents),
+            'latency_budget_ms': self.latency_budget_ms,
+            'routes': {name: count for name, count in counts.items() if name.startswith(('small:', 'large:'))},
+            'models': models,
+            'latency_ms': self.latency_ms.snapshot(),
+        }
@@ -4,6 +4,8 @@ from datetime import datetime
 from werkzeug.security import generate_password_hash, check_password_hash
 import uuid
 
+from review_aggregates import seeded_rating
+
 db = SQLAlchemy()
 
 # User Model
@@ -86,8 +88,15 @@ class Destination(db.Model):
     bookings = db.relationship('Booking', backref='destination', lazy=True)
     reviews = db.relationship('Review', backref='destination', lazy=True)
     wishlists = db.relationship('Wishlist', backref='destination', lazy=True)
+    aggregate = db.relationship('ReviewAggregate', backref='destination', uselist=False, lazy=True)
     
     def to_dict(self):
+        # Trigger-maintained aggregate averaged into the static columns, as in app.py
+        aggregate = self.aggregate
+        rating, total_reviews = seeded_rating(
+            self.rating, self.total_reviews,
+            aggregate.review_count if aggregate else 0, aggregate.rating_sum if aggregate else 0
+        )
         return {
             'id': self.id,
             'name': self.name,
@@ -108,8 +117,8 @@ class Destination(db.Model):
             'included_services': self.included_services,
             'excluded_services': self.excluded_services,
             'best_season': self.best_season,
-            'rating': round(self.rating, 1),
-            'reviews': self.total_reviews,
+            'rating': round(rating, 1),
+            'reviews': total_reviews,
             'is_featured': self.is_featured
         }
 
@@ -229,6 +238,54 @@ class Review(db.Model):
             'created_at': self.created_at.isoformat()
         }
 
+# Review Aggregate Model (maintained by SQLite triggers, see review_aggregates.py)
+class ReviewAggregate(db.Model):
+    __tablename__ = 'review_aggregates'
+    
+    destination_id = db.Column(db.Integer, db.ForeignKey('destinations.id'), primary_key=True)
+    review_count = db.Column(db.Integer, nullable=False, default=0)
+    rating_sum = db.Column(db.Integer, nullable=False, default=0)
+    
+    # Running sums/counts for the rating categories
+    service_sum = db.Column(db.Integer, nullable=False, default=0)
+    service_count = db.Column(db.Integer, nullable=False, default=0)
+    value_sum = db.Column(db.Integer, nullable=False, default=0)
+    value_count = db.Column(db.Integer, nullable=False, default=0)
+    location_sum = db.Column(db.Integer, nullable=False, default=0)
+    location_count = db.Column(db.Integer, nullable=False, default=0)
+    cleanliness_sum = db.Column(db.Integer, nullable=False, default=0)
+    cleanliness_count = db.Column(db.Integer, nullable=False, default=0)
+    
+    # Rating histogram
+    stars_1 = db.Column(db.Integer, nullable=False, default=0)
+    stars_2 = db.Column(db.Integer, nullable=False, default=0)
+    stars_3 = db.Column(db.Integer, nullable=False, default=0)
+    stars_4 = db.Column(db.Integer, nullable=False, default=0)
+    stars_5 = db.Column(db.Integer, nullable=False, default=0)
+    
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    @property
+    def average_rating(self):
+        return self.rating_sum / self.review_count if self.review_count else 0.0
+    
+    def to_dict(self):
+        def average(total, count):
+            return round(total / count, 1) if count else None
+        return {
+            'destination_id': self.destination_id,
+            'rating': round(self.average_rating, 1),
+            'reviews': self.review_count,
+            'service_rating': average(self.service_sum, self.service_count),
+            'value_rating': average(self.value_sum, self.value_count),
+            'location_rating': average(self.location_sum, self.location_count),
+            'cleanliness_rating': average(self.cleanliness_sum, self.cleanliness_count),
+            'histogram': {
+                '1': self.stars_1, '2': self.stars_2, '3': self.stars_3,
+                '4': self.stars_4, '5': self.stars_5
+            }
+        }
+
 # Wishlist Model
 class Wishlist(db.Model):
     __tablename__ = 'wishlists'
@@ -0,0 +1,265 @@
+"""
+Shared Ollama chat client used by app.py and travel_bot.py.
+
+OllamaGateway puts a concurrency limit in front of the Ollama server: at
+most max_concurrency generations run at once and the rest wait in a FIFO
+queue. Each request carries a deadline; if its estimated queue wait would
+run past it (or the deadline passes while queued) it gets OllamaBusy right
+away so the caller can answer with its local fallback.
+"""
+
+import json
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import requests
+
+from metrics import Counter, Histogram
+
+# Floor for the HTTP timeout of a call admitted just before its deadline
+MIN_CALL_TIMEOUT = 0.1
+
+
+def chat_payload(model, messages, stream=False, keep_alive=None):
+    payload = {
+        "model": model,
+        "messages": messages,
+        "stream": stream
+    }
+    if keep_alive is not None:
+        payload["keep_alive"] = keep_alive
+    return payload
+
+
+def chat_completion(server, model, messages, timeout=30, keep_alive=None):
+    """Non-streaming chat completion; returns Ollama's full response dict"""
+    response = requests.post(f"{server.rstrip('/')}/api/chat",
+                             json=chat_payload(model, messages, keep_alive=keep_alive), timeout=timeout)
+    response.raise_for_status()
+    return response.json()
+
+
+def chat(server, model, messages, timeout=30, keep_alive=None):
+    """Non-streaming chat completion; returns the reply text"""
+    completion = chat_completion(server, model, messages, timeout, keep_alive)
+    return completion.get("message", {}).get("content", "")
+
+
+def stream_chat(server, model, messages, timeout=30, keep_alive=None):
+    """Streaming chat completion; yields Ollama's JSON chunks as dicts.
+
+    Each chunk carries message.content (the next tokens); the last one has
+    done=True plus Ollama's timing fields. `timeout` applies to the connect
+    and to each gap between chunks, not to the whole generation.
+    """
+    with requests.post(f"{server.rstrip('/')}/api/chat", json=chat_payload(model, messages, True, keep_alive),
+                       timeout=timeout, stream=True) as response:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            if not line:
+                continue
+            chunk = json.loads(line)
+            if chunk.get("error"):
+                raise requests.exceptions.RequestException(chunk["error"])
+            yield chunk
+            if chunk.get("done"):
+                break
+
+
+class OllamaBusy(requests.exceptions.RequestException):
+    """No generation slot before the request's deadline (handled like a connection error)"""
+
+    def __init__(self, message, queue_position=None, estimated_wait_ms=None):
+        super().__init__(message)
+        self.queue_position = queue_position
+        self.estimated_wait_ms = estimated_wait_ms
+
+
+class OllamaGateway:
+    """Bounded-concurrency, FIFO-queued access to one Ollama server"""
+
+    # Weight of the newest sample in the moving average of generation time
+    EWMA_ALPHA = 0.2
+
+    def __init__(self, server, max_concurrency=2, max_queue=32, lifecycle=None):
+        self.server = server
+        self.lifecycle = lifecycle      # ModelLifecycle: keep_alive values + load tracking
+        self._lifecycles = {lifecycle.model: lifecycle} if lifecycle else {}
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max_queue
+        self.counters = Counter()
+        self.queue_ms = Histogram()
+        self.service_ms = Histogram()
+        self._active = 0
+        self._waiting = deque()
+        self._avg_service_ms = None
+        self._cond = threading.Condition()
+
+    def _estimate_wait_ms(self, position):
+        """Expected queue wait for the request at 1-based `position`"""
+        if not self._avg_service_ms:
+            return 0.0
+        return math.ceil(position / self.max_concurrency) * self._avg_service_ms
+
+    def _enqueue(self, deadline):
+        """Take a slot or a place in line; returns (ticket, position, estimated_wait_ms)"""
+        with self._cond:
+            if self._active < self.max_concurrency and not self._waiting:
+                self._active += 1
+                self.counters.inc('admitted')
+                return None, 0, 0.0
+
+            position = len(self._waiting) + 1
+            estimated = self._estimate_wait_ms(position)
+            if len(self._waiting) >= self.max_queue:
+                self.counters.inc('rejected_queue_full')
+                raise OllamaBusy(f"Ollama queue full ({self.max_queue} waiting)", position, estimated)
+            # Projected finish = wait in line + one generation
+            finish_ms = estimated + (self._avg_service_ms or 0.0)
+            if deadline is not None and time.monotonic() + finish_ms / 1000 > deadline:
+                self.counters.inc('rejected_deadline')
+                raise OllamaBusy(f"Ollama busy: ~{estimated:.0f}ms wait at position {position}", position, estimated)
+
+            ticket = object()
+            self._waiting.append(ticket)
+            self.counters.inc('queued')
+            return ticket, position, estimated
+
+    def _wait(self, ticket, position, deadline):
+        """Block until `ticket` reaches the head of the line and a slot frees up"""
+        queued_at = time.monotonic()
+        with self._cond:
+            while self._waiting[0] is not ticket or self._active >= self.max_concurrency:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    self._waiting.remove(ticket)
+                    self._cond.notify_all()
+                    self.counters.inc('expired_in_queue')
+                    raise OllamaBusy(f"Deadline passed in Ollama queue (position {position})", position)
+                self._cond.wait(remaining)
+            self._waiting.popleft()
+            self._active += 1
+            self.counters.inc('admitted')
+            self._cond.notify_all()
+        self.queue_ms.observe((time.monotonic() - queued_at) * 1000)
+
+    def _release(self, held_ms):
+        with self._cond:
+            self._active -= 1
+            if self._avg_service_ms is None:
+                self._avg_service_ms = held_ms
+            else:
+                self._avg_service_ms += self.EWMA_ALPHA * (held_ms - self._avg_service_ms)
+            self._cond.notify_all()
+        self.service_ms.observe(held_ms)
+
+    @contextmanager
+    def slot(self, deadline=None):
+        """Hold one generation slot; `deadline` is a time.monotonic() value"""
+        ticket, position, _ = self._enqueue(deadline)
+        if ticket is not None:
+            self._wait(ticket, position, deadline)
+        started = time.monotonic()
+        try:
+            yield position
+        finally:
+            self._release((time.monotonic() - started) * 1000)
+
+    def add_lifecycle(self, lifecycle):
+        """Track another model (e.g. the routed small model) with its own lifecycle"""
+        self._lifecycles[lifecycle.model] = lifecycle
+
+    def _keep_alive(self, model):
+        lifecycle = self._lifecycles.get(model, self.lifecycle)
+        return lifecycle.keep_alive_value() if lifecycle else None
+
+    def _observe(self, model, completion, source):
+        # Each lifecycle counts loads of its own model only
+        lifecycle = self._lifecycles.get(model)
+        if lifecycle:
+            lifecycle.observe(completion, source)
+
+    def chat(self, model, messages, timeout=30, deadline=None, timer=None):
+        """Queued non-streaming chat; `timeout` also bounds the time spent in line.
+        `timer` (metrics.StageTimer) receives the 'queue' and 'generation' times.
+        """
+        if deadline is None:
+            deadline = time.monotonic() + timeout
+        queued_at = time.monotonic()
+        with self.slot(deadline):
+            started = time.monotonic()
+            if timer:
+                timer.add('queue', (started - queued_at) * 1000)
+            remaining = max(MIN_CALL_TIMEOUT, deadline - time.monotonic())
+            try:
+                completion = chat_completion(self.server, model, messages, remaining, self._keep_alive(model))
+            finally:
+                if timer:
+                    timer.add('generation', (time.monotonic() - started) * 1000)
+        self._observe(model, completion, 'chat')
+        return completion.get("message", {}).get("content", "")
+
+    def stream_chat(self, model, messages, timeout=30, deadline=None, timer=None):
+        """Queued streaming chat. When the request has to wait, first yields
+        {"queued": True, "queue_position": n, "estimated_wait_ms": ms}; then
+        Ollama's chunks as in stream_chat(). The slot is held until the
+        generator finishes or is closed. `timer` receives 'queue' and
+        'generation' times.
+        """
+        if deadline is None:
+            deadline = time.monotonic() + timeout
+        queued_at = time.monotonic()
+        ticket, position, estimated = self._enqueue(deadline)
+        try:
+            if ticket is not None:
+                yield {"queued": True, "queue_position": position, "estimated_wait_ms": round(estimated, 1)}
+                self._wait(ticket, position, deadline)
+        except GeneratorExit:
+            with self._cond:
+                if ticket in self._waiting:
+                    self._waiting.remove(ticket)
+                    self._cond.notify_all()
+            raise
+        started = time.monotonic()
+        if timer:
+            timer.add('queue', (started - queued_at) * 1000)
+        remaining = max(MIN_CALL_TIMEOUT, deadline - time.monotonic())
+        try:
+            for chunk in stream_chat(self.server, model, messages, remaining, self._keep_alive(model)):
+                if chunk.get("done"):
+                    self._observe(model, chunk, 'stream')
+                yield chunk
+        finally:
+            held_ms = (time.monotonic() - started) * 1000
+            if timer:
+                timer.add('generation', held_ms)
+            self._release(held_ms)
+
+    def stats(self):
+        with self._cond:
+            active, waiting, avg = self._active, len(self._waiting), self._avg_service_ms
+        return {
+            'max_concurrency': self.max_concurrency,
+            'max_queue': self.max_queue,
+            'active': active,
+            'queue_depth': waiting,
+            'avg_generation_ms': round(avg, 1) if avg is not None else None,
+            'counts': self.counters.snapshot(),
+            'queue_ms': self.queue_ms.snapshot(),
+            'generation_ms': self.service_ms.snapshot(),
+        }
+
+
+def sse_event(event, data):
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+# Headers for SSE responses (also stops nginx from buffering the stream)
+SSE_HEADERS = {
+    'Cache-Control': 'no-cache',
+    'X-Accel-Buffering': 'no'
+}
@@ -0,0 +1,305 @@
+"""
+Per-client rate limiting (token buckets) for the API routes.
+
+Configured by api.rate_limiting in data/config/app_config.json:
+
+    "rate_limiting": {
+      "enabled": true,
+      "requests_per_minute": 60,          # default for every /api/ route
+      "burst": 20,                        # bucket size (default: requests_per_minute)
+      "backend": "sqlite",                # or "memory" (default: sqlite under the pre-fork server)
+      "routes": {                         # longest matching path prefix wins
+        "/api/google-search": {"requests_per_minute": 10, "burst": 5},
+        "/api/chat": {"requests_per_minute": 20, "burst": 5}
+      }
+    }
+
+RATE_LIMIT_ENABLED=1/0 and RATE_LIMIT_BACKEND override "enabled" and
+"backend". RATE_LIMIT_TRUST_PROXY is the number of proxies in front of the
+app; the client is then the Nth X-Forwarded-For entry from the right, as
+werkzeug's ProxyFix reads it, since entries further left are whatever the
+client sent. A peer on this host counts as one proxy (async_app.py
+forwards with the client address it resolved). Each client (the logged-in
+user, else the IP address) gets one bucket per policy that refills at
+requests_per_minute and holds at most `burst` tokens; a request takes a
+token or is answered 429 with Retry-After. The memory backend keeps up to
+max_keys buckets in an LRU and drops buckets idle long enough to be full
+again (a full bucket is the same as no bucket), so each check is O(1) and
+memory stays bounded. Its buckets are per process: under the pre-fork
+server each of N workers has its own, so a client gets up to N times the
+limit. The SQLite backend keeps buckets in a small database file so every
+worker process of the pre-fork server shares one limit; it is the default
+there (serve.py, gunicorn.conf.py).
+"""
+
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from background_tasks import prefork
+from metrics import Counter
+
+API_PREFIX = '/api/'
+
+
+class RatePolicy:
+    """Token bucket parameters for one group of routes"""
+
+    def __init__(self, name, requests_per_minute, burst=None):
+        self.name = name
+        self.requests_per_minute = float(requests_per_minute)
+        self.rate = self.requests_per_minute / 60.0
+        self.burst = float(burst if burst is not None else max(1.0, self.requests_per_minute))
+
+    @property
+    def refill_seconds(self):
+        """Time for an empty bucket to fill up"""
+        return self.burst / self.rate if self.rate > 0 else math.inf
+
+    def describe(self):
+        return {'requests_per_minute': self.requests_per_minute, 'burst': self.burst}
+
+
+def refill(tokens, updated, now, policy):
+    return min(policy.burst, tokens + (now - updated) * policy.rate)
+
+
+def decide(tokens, policy, cost):
+    """(allowed, tokens left, seconds until `cost` tokens are available)"""
+    if tokens >= cost:
+        return True, tokens - cost, 0.0
+    wait = (cost - tokens) / policy.rate if policy.rate > 0 else math.inf
+    return False, tokens, wait
+
+
+class MemoryBackend:
+    """Buckets in an LRU dict; idle (refilled) buckets are evicted as we go"""
+
+    name = 'memory'
+
+    def __init__(self, max_keys=50000, evict_per_call=4):
+        self.max_keys = max_keys
+        self.evict_per_call = evict_per_call
+        self._buckets = OrderedDict()   # key -> [tokens, updated, refill_seconds]
+        self._lock = threading.Lock()
+
+    def take(self, key, policy, cost=1.0, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            bucket = self._buckets.get(key)
+            tokens = policy.burst if bucket is None else refill(bucket[0], bucket[1], now, policy)
+            allowed, tokens, wait = decide(tokens, policy, cost)
+            if bucket is None:
+                self._buckets[key] = [tokens, now, policy.refill_seconds]
+            else:
+                bucket[0], bucket[1] = tokens, now
+                self._buckets.move_to_end(key)
+            self._evict(now)
+        return allowed, tokens, wait
+
+    def _evict(self, now):
+        # Oldest entries first: stop at the first one still refilling
+        for _ in range(self.evict_per_call):
+            if not self._buckets:
+                break
+            key, (_, updated, refill_seconds) = next(iter(self._buckets.items()))
+            if now - updated < refill_seconds and len(self._buckets) <= self.max_keys:
+                break
+            del self._buckets[key]
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {'backend': self.name, 'buckets': len(self._buckets), 'max_keys': self.max_keys}
+
+
+class SQLiteBackend:
+    """Buckets in a SQLite table, shared by every process using the same file"""
+
+    name = 'sqlite'
+
+    def __init__(self, path, cleanup_every=1000, busy_timeout=2.0):
+        self.path = path
+        self.cleanup_every = cleanup_every
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        self._calls = 0
+        conn = sqlite3.connect(path, timeout=busy_timeout)
+        with conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS rate_buckets (
+                    key TEXT PRIMARY KEY,
+                    tokens REAL NOT NULL,
+                    updated REAL NOT NULL,
+                    expires REAL NOT NULL
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_rate_buckets_expires ON rate_buckets (expires)')
+        conn.close()
+
+    def _connect(self):
+        """This thread's connection (a new one after fork: connections must not cross processes)"""
+        conn, pid = getattr(self._local, 'conn', None), getattr(self._local, 'pid', None)
+        if conn is None or pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=OFF')   # losing a few bucket updates on a crash is fine
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def take(self, key, policy, cost=1.0, now=None):
+        now = time.time() if now is None else now   # wall clock: shared across processes
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT tokens, updated FROM rate_buckets WHERE key = ?', (key,)).fetchone()
+            tokens = policy.burst if row is None else refill(row[0], row[1], now, policy)
+            allowed, tokens, wait = decide(tokens, policy, cost)
+            conn.execute('INSERT OR REPLACE INTO rate_buckets (key, tokens, updated, expires) VALUES (?, ?, ?, ?)',
+                         (key, tokens, now, now + min(policy.refill_seconds, 86400)))
+            self._calls += 1
+            if self._calls % self.cleanup_every == 0:
+                conn.execute('DELETE FROM rate_buckets WHERE expires < ?', (now,))
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return allowed, tokens, wait
+
+    def stats(self):
+        try:
+            count = self._connect().execute('SELECT COUNT(*) FROM rate_buckets').fetchone()[0]
+        except sqlite3.Error:
+            count = None
+        return {'backend': self.name, 'buckets': count, 'path': self.path}
+
+
+class RateLimiter:
+    """Pick the policy for a path and charge the client's bucket"""
+
+    def __init__(self, default, routes=None, backend=None, enabled=True, prefix=API_PREFIX):
+        self.default = default
+        # Longest prefix first so /api/chat/stream matches /api/chat before /api/
+        self.routes = sorted((routes or {}).items(), key=lambda item: len(item[0]), reverse=True)
+        self.backend = backend or MemoryBackend()
+        self.enabled = enabled
+        self.prefix = prefix
+        self.counters = Counter()
+
+    @classmethod
+    def from_config(cls, config, db_path='rate_limits.db'):
+        """From api.rate_limiting in app_config.json (see the module docstring)"""
+        config = config or {}
+        enabled = bool(config.get('enabled', False))
+        override = os.getenv('RATE_LIMIT_ENABLED')
+        if override is not None:
+            enabled = override != '0'
+        default = RatePolicy('default', config.get('requests_per_minute', 60), config.get('burst'))
+        routes = {
+            path: RatePolicy(path, spec.get('requests_per_minute', default.requests_per_minute), spec.get('burst'))
+            for path, spec in (config.get('routes') or {}).items()
+        }
+        # Memory buckets are per worker, so the pre-fork server shares them in SQLite
+        backend_name = os.getenv('RATE_LIMIT_BACKEND', config.get('backend') or ('sqlite' if prefork() else 'memory'))
+        if backend_name == 'sqlite':
+            backend = SQLiteBackend(os.getenv('RATE_LIMIT_DB', config.get('db_path', db_path)))
+        else:
+            backend = MemoryBackend(int(config.get('max_clients', 50000)))
+        return cls(default, routes, backend, enabled)
+
+    def policy_for(self, path):
+        """The route's policy, the default for other API paths, None if not limited"""
+        for prefix, policy in self.routes:
+            if path == prefix or path.startswith(prefix.rstrip('/') + '/'):
+                return policy
+        return self.default if path.startswith(self.prefix) else None
+
+    def check(self, path, client, cost=1.0):
+        """(allowed, policy, remaining tokens, retry_after seconds); policy None = not limited"""
+        policy = self.policy_for(path) if self.enabled else None
+        if policy is None:
+            return True, None, None, 0
+        try:
+            allowed, tokens, wait = self.backend.take(f"{policy.name}|{client}", policy, cost)
+        except sqlite3.Error as e:
+            # Fail open: a broken limiter must not take the API down
+            self.counters.inc('backend_errors')
+            print(f"⚠️ Rate limiter backend failed: {e}")
+            return True, None, None, 0
+        self.counters.inc(f"{'allowed' if allowed else 'limited'}:{policy.name}")
+        return allowed, policy, int(tokens), 0 if allowed else max(1, math.ceil(wait))
+
+    def stats(self):
+        return {
+            'enabled': self.enabled,
+            'default': self.default.describe(),
+            'routes': {prefix: policy.describe() for prefix, policy in self.routes},
+            'counts': self.counters.snapshot(),
+            **self.backend.stats()
+        }
+
+
+# Peers that count as one trusted proxy: a proxy on this host
+# (async_app.py's forwarding)
+LOCAL_PROXIES = frozenset({'127.0.0.1', '::1'})
+
+
+def client_address(remote_addr, forwarded_for=None, trusted_proxies=0):
+    """Caller's IP: behind `trusted_proxies` proxies, the Nth X-Forwarded-For
+    entry from the right (the peer address if the header has fewer)"""
+    if remote_addr in LOCAL_PROXIES:
+        trusted_proxies = max(trusted_proxies, 1)
+    if forwarded_for and trusted_proxies > 0:
+        hops = [hop.strip() for hop in forwarded_for.split(',')]
+        if len(hops) >= trusted_proxies and hops[-trusted_proxies]:
+            return hops[-trusted_proxies]
+    return remote_addr or 'unknown'
+
+
+def limit_headers(policy, remaining, retry_after=0):
+    headers = {
+        'X-RateLimit-Limit': str(int(policy.requests_per_minute)),
+        'X-RateLimit-Remaining': str(max(0, remaining)),
+    }
+    if retry_after:
+        headers['Retry-After'] = str(retry_after)
+    return headers
+
+
+def too_many_requests_body(retry_after):
+    return {
+        'success': False,
+        'error': 'Too many requests, please slow down',
+        'retry_after': retry_after
+    }
+
+
+def init_rate_limiting(app, limiter, client_key):
+    """Check every request against `limiter`; client_key() names the caller"""
+    from flask import g, jsonify, request
+
+    @app.before_request
+    def enforce_rate_limit():
+        if request.method == 'OPTIONS':
+            return None
+        allowed, policy, remaining, retry_after = limiter.check(request.path, client_key())
+        if policy is None:
+            return None
+        if not allowed:
+            response = jsonify(too_many_requests_body(retry_after))
+            response.status_code = 429
+            response.headers.update(limit_headers(policy, remaining, retry_after))
+            return response
+        g.rate_limit_headers = limit_headers(policy, remaining)
+        return None
+
+    @app.after_request
+    def add_rate_limit_headers(response):
+        headers = g.pop('rate_limit_headers', None)
+        if headers:
+            response.headers.update(headers)
+        return response
@@ -0,0 +1,211 @@
+"""
+Materialized review aggregates.
+
+review_aggregates holds running sums/counts per destination (overall rating,
+the four sub-ratings and a 1-5 star histogram). SQLite triggers keep it in
+step with every insert/update/delete on reviews, so catalog reads never run
+AVG/COUNT over the reviews table. reconcile_review_aggregates() recomputes
+everything from scratch and repairs any drift.
+"""
+
+import threading
+import time
+
+SUB_RATINGS = ['service', 'value', 'location', 'cleanliness']
+STARS = [1, 2, 3, 4, 5]
+
+AGGREGATE_COLUMNS = (
+    ['review_count', 'rating_sum']
+    + [f'{name}_{kind}' for name in SUB_RATINGS for kind in ('sum', 'count')]
+    + [f'stars_{star}' for star in STARS]
+)
+
+
+def _create_table_sql():
+    columns = ',\n'.join(f'            {column} INTEGER NOT NULL DEFAULT 0' for column in AGGREGATE_COLUMNS)
+    return f'''
+        CREATE TABLE IF NOT EXISTS review_aggregates (
+            destination_id INTEGER PRIMARY KEY,
+{columns},
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    '''
+
+
+def _delta_expressions(row, sign):
+    """Column -> expression adding (sign='+') or removing (sign='-') one review row"""
+    expressions = {
+        'review_count': '1',
+        'rating_sum': f'{row}.rating',
+    }
+    for name in SUB_RATINGS:
+        expressions[f'{name}_sum'] = f'COALESCE({row}.{name}_rating, 0)'
+        expressions[f'{name}_count'] = f'({row}.{name}_rating IS NOT NULL)'
+    for star in STARS:
+        expressions[f'stars_{star}'] = f'({row}.rating = {star})'
+    return ', '.join(f'{column} = {column} {sign} {expr}' for column, expr in expressions.items())
+
+
+def _apply_sql(row, sign):
+    return f'''
+            INSERT OR IGNORE INTO review_aggregates (destination_id) VALUES ({row}.destination_id);
+            UPDATE review_aggregates
+               SET {_delta_expressions(row, sign)}, updated_at = CURRENT_TIMESTAMP
+             WHERE destination_id = {row}.destination_id;'''
+
+
+def _trigger_sql():
+    return [
+        f'''
+        CREATE TRIGGER IF NOT EXISTS reviews_aggregate_insert AFTER INSERT ON reviews
+        BEGIN{_apply_sql('NEW', '+')}
+        END
+        ''',
+        f'''
+        CREATE TRIGGER IF NOT EXISTS reviews_aggregate_delete AFTER DELETE ON reviews
+        BEGIN{_apply_sql('OLD', '-')}
+        END
+        ''',
+        f'''
+        CREATE TRIGGER IF NOT EXISTS reviews_aggregate_update AFTER UPDATE ON reviews
+        BEGIN{_apply_sql('OLD', '-')}{_apply_sql('NEW', '+')}
+        END
+        ''',
+    ]
+
+
+def init_review_aggregates(conn):
+    """Create the aggregate table and triggers, adding sub-rating columns to older databases"""
+    existing = {row[1] for row in conn.execute('PRAGMA table_info(reviews)')}
+    for name in SUB_RATINGS:
+        column = f'{name}_rating'
+        if column not in existing:
+            conn.execute(f'ALTER TABLE reviews ADD COLUMN {column} INTEGER')
+
+    conn.execute(_create_table_sql())
+    for statement in _trigger_sql():
+        conn.execute(statement)
+
+    # Databases created before the triggers existed start out with an empty table
+    has_reviews = conn.execute('SELECT 1 FROM reviews LIMIT 1').fetchone()
+    has_aggregates = conn.execute('SELECT 1 FROM review_aggregates LIMIT 1').fetchone()
+    if has_reviews and not has_aggregates:
+        reconcile_review_aggregates(conn)
+
+
+def _recompute_sql():
+    expressions = ['COUNT(*)', 'SUM(rating)']
+    for name in SUB_RATINGS:
+        expressions += [f'COALESCE(SUM({name}_rating), 0)', f'COUNT({name}_rating)']
+    expressions += [f'SUM(rating = {star})' for star in STARS]
+    return f'''
+        SELECT destination_id, {', '.join(expressions)}
+        FROM reviews
+        GROUP BY destination_id
+    '''
+
+
+def reconcile_review_aggregates(conn):
+    """Recompute aggregates from the reviews table and fix rows that drifted.
+    Returns the number of destinations whose aggregate row was corrected.
+    """
+    fresh = {row[0]: tuple(row[1:]) for row in conn.execute(_recompute_sql())}
+    current = {
+        row[0]: tuple(row[1:])
+        for row in conn.execute(f'SELECT destination_id, {", ".join(AGGREGATE_COLUMNS)} FROM review_aggregates')
+    }
+
+    drifted = 0
+    placeholders = ', '.join('?' for _ in AGGREGATE_COLUMNS)
+    for dest_id, values in fresh.items():
+        if current.get(dest_id) != values:
+            conn.execute(
+                f'INSERT OR REPLACE INTO review_aggregates (destination_id, {", ".join(AGGREGATE_COLUMNS)}) '
+                f'VALUES (?, {placeholders})',
+                (dest_id, *values)
+            )
+            drifted += 1
+
+    for dest_id in current.keys() - fresh.keys():
+        conn.execute('DELETE FROM review_aggregates WHERE destination_id = ?', (dest_id,))
+        drifted += 1
+
+    conn.commit()
+    return drifted
+
+
+def fetch_review_aggregates(conn, destination_ids=None):
+    """Load aggregate rows keyed by destination id (primary-key lookups only)"""
+    if destination_ids is None:
+        rows = conn.execute('SELECT * FROM review_aggregates').fetchall()
+    else:
+        destination_ids = list(destination_ids)
+        if not destination_ids:
+            return {}
+        placeholders = ', '.join('?' for _ in destination_ids)
+        rows = conn.execute(
+            f'SELECT * FROM review_aggregates WHERE destination_id IN ({placeholders})',
+            destination_ids
+        ).fetchall()
+    return {row['destination_id']: dict(row) for row in rows}
+
+
+def seeded_rating(seed_rating, seed_reviews, review_count, rating_sum):
+    """(rating, reviews) with live reviews averaged into a seeded rating/count.
+
+    The static rating/review count act as a seed, so a destination doesn't
+    drop from thousands of reviews to one when the first real review arrives.
+    """
+    seed_rating = seed_rating or 0
+    seed_reviews = seed_reviews or 0
+    if not review_count:
+        return seed_rating, seed_reviews
+    total_reviews = seed_reviews + review_count
+    return round((seed_rating * seed_reviews + rating_sum) / total_reviews, 1), total_reviews
+
+
+def apply_review_aggregate(destination, aggregate, breakdown=False):
+    """Return a copy of a catalog destination with live review stats folded in,
+    the hardcoded rating/reviews acting as the seed (see seeded_rating)
+    """
+    dest = destination.copy()
+    if not aggregate or not aggregate['review_count']:
+        return dest
+
+    dest['rating'], dest['reviews'] = seeded_rating(
+        destination.get('rating'), destination.get('reviews'),
+        aggregate['review_count'], aggregate['rating_sum']
+    )
+
+    if breakdown:
+        dest['rating_breakdown'] = {
+            name: round(aggregate[f'{name}_sum'] / aggregate[f'{name}_count'], 1)
+            for name in SUB_RATINGS
+            if aggregate[f'{name}_count']
+        }
+        dest['rating_histogram'] = {str(star): aggregate[f'stars_{star}'] for star in STARS}
+
+    return dest
+
+
+def start_reconciliation_job(connect, interval, on_reconciled=None):
+    """Run reconcile_review_aggregates every `interval` seconds on a daemon thread"""
+    def run():
+        while True:
+            time.sleep(interval)
+            try:
+                conn = connect()
+                try:
+                    drifted = reconcile_review_aggregates(conn)
+                finally:
+                    conn.close()
+                if drifted:
+                    print(f"🔧 Review aggregates reconciled: {drifted} destinations corrected")
+                if on_reconciled:
+                    on_reconciled()
+            except Exception as e:
+                print(f"❌ Review aggregate reconciliation failed: {e}")
+
+    thread = threading.Thread(target=run, name='review-reconcile', daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,165 @@
+"""
+Semantic response cache for AtithiBot.
+
+Near-duplicate questions ("best time to visit Goa" / "when should I go to
+Goa?") that retrieve the same travel context get the stored answer instead
+of a fresh Ollama generation. Entries are bucketed by a fingerprint of the
+retrieved documents, so answers from an older corpus simply stop matching;
+within a bucket questions are compared by cosine similarity of the query
+embedding the caller already computed for retrieval (or by exact
+normalized text when there is none). Entries expire after a TTL and the
+cache is LRU-bounded.
+"""
+
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+_PUNCTUATION_RE = re.compile(r"[^\w\s₹]")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_input(text):
+    """Lowercase, strip punctuation and collapse whitespace"""
+    text = _PUNCTUATION_RE.sub(' ', text.lower())
+    return _SPACE_RE.sub(' ', text).strip()
+
+
+def context_fingerprint(documents):
+    """Order-independent hash of the retrieved documents"""
+    digest = hashlib.sha1()
+    for doc in sorted(documents or []):
+        digest.update(doc.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()[:16]
+
+
+class SemanticCache:
+    """LRU + TTL cache of chat answers keyed by (context fingerprint, question meaning)"""
+
+    def __init__(self, threshold=0.92, ttl=3600, max_entries=512):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()   # (fingerprint, normalized text) -> entry
+        self._buckets = {}              # fingerprint -> set of keys
+        self._lock = threading.Lock()
+        self._stats = {
+            'hits': 0, 'exact_hits': 0, 'semantic_hits': 0, 'misses': 0,
+            'stores': 0, 'evictions': 0, 'expirations': 0, 'invalidations': 0,
+            'latency_saved_ms': 0.0,
+        }
+
+    # ----- helpers -----
+
+    @staticmethod
+    def _vector(vector):
+        if vector is None:
+            return None
+        vector = np.asarray(vector, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    def _remove(self, key):
+        self._entries.pop(key, None)
+        bucket = self._buckets.get(key[0])
+        if bucket is not None:
+            bucket.discard(key)
+            if not bucket:
+                del self._buckets[key[0]]
+
+    def _expired(self, entry, now):
+        return self.ttl and now - entry['created'] > self.ttl
+
+    # ----- public API -----
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+            self._stats['invalidations'] += 1
+
+    def lookup(self, user_input, documents, vector=None):
+        """Return the cached entry dict for a matching question, or None.
+        `vector` is the question's embedding (None: exact matches only)."""
+        text = normalize_input(user_input)
+        fingerprint = context_fingerprint(documents)
+        key = (fingerprint, text)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry, now):
+                self._remove(key)
+                self._stats['expirations'] += 1
+                entry = None
+            if entry is not None:
+                return self._hit(key, entry, 'exact_hits')
+            candidates = list(self._buckets.get(fingerprint, ()))
+
+        vector = self._vector(vector) if candidates else None
+        if vector is None:
+            with self._lock:
+                self._stats['misses'] += 1
+            return None
+
+        with self._lock:
+            best_key, best_score = None, self.threshold
+            for candidate in candidates:
+                entry = self._entries.get(candidate)
+                if entry is None or entry['vector'] is None:
+                    continue
+                if self._expired(entry, now):
+                    self._remove(candidate)
+                    self._stats['expirations'] += 1
+                    continue
+                score = float(entry['vector'] @ vector)
+                if score >= best_score:
+                    best_key, best_score = candidate, score
+            if best_key is None:
+                self._stats['misses'] += 1
+                return None
+            return self._hit(best_key, self._entries[best_key], 'semantic_hits')
+
+    def _hit(self, key, entry, kind):
+        self._entries.move_to_end(key)
+        self._stats['hits'] += 1
+        self._stats[kind] += 1
+        self._stats['latency_saved_ms'] += entry['generation_ms']
+        return entry
+
+    def store(self, user_input, documents, response, generation_ms, vector=None, **extra):
+        """Cache an AI-generated answer for this question + context"""
+        text = normalize_input(user_input)
+        fingerprint = context_fingerprint(documents)
+        key = (fingerprint, text)
+        vector = self._vector(vector)
+
+        with self._lock:
+            self._entries[key] = {
+                'response': response,
+                'vector': vector,
+                'generation_ms': generation_ms,
+                'created': time.time(),
+                **extra
+            }
+            self._entries.move_to_end(key)
+            self._buckets.setdefault(fingerprint, set()).add(key)
+            self._stats['stores'] += 1
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._stats['evictions'] += 1
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 3) if lookups else None
+        stats['latency_saved_ms'] = round(stats['latency_saved_ms'], 1)
+        return stats
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Run a service under the production pre-fork server (gunicorn.conf.py)
+
+    python serve.py app          # main website on port 5000
+    python serve.py travel_bot   # AI service on port 5001 (+ BOT_SOCKET if set)
+    python serve.py async_app    # async weather/search/chat endpoints on port 8000 (aiohttp workers)
+
+Extra arguments are passed to gunicorn, e.g. `python serve.py app -w 8`.
+Use run.py / travel_bot.py for development (debug mode, auto-reload).
+"""
+
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+SERVICES = {
+    'app': ['0.0.0.0:5000'],
+    'travel_bot': ['0.0.0.0:5001'],
+    'async_app': ['0.0.0.0:8000'],
+}
+
+# Services that are not WSGI apps
+WORKER_CLASSES = {
+    'async_app': 'aiohttp.GunicornWebWorker',
+}
+
+
+def gunicorn_command(service, extra_args=()):
+    binds = list(SERVICES[service])
+    bot_socket = os.getenv('BOT_SOCKET')
+    if service == 'travel_bot' and bot_socket:
+        binds.append(f"unix:{bot_socket}")
+    command = [sys.executable, '-m', 'gunicorn', '-c', os.path.join(HERE, 'gunicorn.conf.py'),
+               '--chdir', HERE]
+    for bind in binds:
+        command += ['--bind', bind]
+    if service in WORKER_CLASSES:
+        command += ['--worker-class', WORKER_CLASSES[service]]
+    return command + list(extra_args) + [f"{service}:app"]
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in SERVICES:
+        print(f"Usage: python serve.py {{{'|'.join(SERVICES)}}} [gunicorn options]")
+        sys.exit(2)
+    if sys.platform == 'win32':
+        print("❌ The pre-fork server needs a POSIX system; use start_services.py on Windows")
+        sys.exit(1)
+
+    command = gunicorn_command(sys.argv[1], sys.argv[2:])
+    print(f"🚀 {' '.join(command[1:])}")
+    os.chdir(HERE)
+    os.execv(sys.executable, command)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,54 +1,279 @@
 #!/usr/bin/env python3
 """
 AtithiVerse Service Starter
-This script helps you start both the main website and AI service
+Starts and supervises the AI service (travel_bot.py) and the main website (app.py)
+
+    python start_services.py                # development servers
+    python start_services.py --production   # pre-fork servers (serve.py / gunicorn)
+
+The website is started once the AI service reports ready on /readyz (its
+models have finished loading), or after READY_TIMEOUT if it never does.
+A service that exits, stops answering /healthz, or is still not ready
+after START_TIMEOUT is restarted with exponential backoff. Ctrl+C / SIGTERM stops the services in reverse order,
+giving each GRACE_SECONDS to finish in-flight requests.
 """
 
+import argparse
+import json
+import os
+import signal
 import subprocess
 import sys
 import time
-import os
-from threading import Thread
+import urllib.error
+import urllib.request
 
-def start_ai_service():
-    """Start the AI service (travel_bot.py) on port 5001"""
-    print("🤖 Starting AI Service on port 5001...")
-    try:
-        # travel_bot.py is in the root directory
-        subprocess.run([sys.executable, 'travel_bot.py'], check=True)
-    except subprocess.CalledProcessError as e:
-        print(f"❌ AI Service failed to start: {e}")
-    except KeyboardInterrupt:
-        print("🛑 AI Service stopped")
-
-def start_main_website():
-    """Start the main website (app.py) on port 5000"""
-    print("🌐 Starting Main Website on port 5000...")
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+READY_TIMEOUT = float(os.getenv('SUPERVISOR_READY_TIMEOUT', '120'))
+START_TIMEOUT = float(os.getenv('SUPERVISOR_START_TIMEOUT', '300'))   # never ready -> kill, restart
+GRACE_SECONDS = float(os.getenv('SUPERVISOR_GRACE_SECONDS', '15'))
+BACKOFF_INITIAL = 1.0
+BACKOFF_MAX = 30.0
+STABLE_AFTER = 60.0           # ready and up this long -> the next crash starts the backoff over
+HEALTH_INTERVAL = 5.0
+HEALTH_FAILURES = 3           # consecutive failed /healthz probes before a restart
+TICK = 0.25
+
+STOPPED, STARTING, READY, BACKOFF = 'stopped', 'starting', 'ready', 'backoff'
+
+
+def probe(url, timeout=1.0):
+    """(HTTP status, JSON body) of a probe endpoint, (None, None) if unreachable"""
     try:
-        # app.py is in the Website directory
-        subprocess.run([sys.executable, 'app.py'], check=True)
-    except subprocess.CalledProcessError as e:
-        print(f"❌ Main Website failed to start: {e}")
-    except KeyboardInterrupt:
-        print("🛑 Main Website stopped")
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            return response.status, json.loads(response.read() or b'{}')
+    except urllib.error.HTTPError as e:
+        try:
+            return e.code, json.loads(e.read() or b'{}')
+        except ValueError:
+            return e.code, None
+    except (OSError, ValueError):
+        return None, None
+
+
+class Service:
+    """One supervised child process and its probe/restart bookkeeping"""
+
+    def __init__(self, name, script, port, depends_on=()):
+        self.name = name
+        self.script = script
+        self.port = port
+        self.depends_on = list(depends_on)
+        self.base_url = f"http://127.0.0.1:{port}"
+        self.process = None
+        self.state = STOPPED
+        self.restarts = 0
+        self.backoff = BACKOFF_INITIAL
+        self.restart_at = None
+        self.started_at = None
+        self.listening_s = None
+        self.ready_s = None
+        self.ready_status = None
+        self.health_failures = 0
+        self.next_health_check = 0.0
+
+    def command(self, production):
+        if production:
+            return [sys.executable, 'serve.py', os.path.splitext(self.script)[0]]
+        return [sys.executable, self.script]
+
+    def start(self, production):
+        kwargs = {}
+        if os.name == 'nt':
+            kwargs['creationflags'] = subprocess.CREATE_NEW_PROCESS_GROUP
+        else:
+            kwargs['start_new_session'] = True  # own process group: reaches the reloader's child too
+        env = dict(os.environ, PYTHONUNBUFFERED='1')
+        self.process = subprocess.Popen(self.command(production), cwd=HERE, env=env, **kwargs)
+        self.state = STARTING
+        self.started_at = time.monotonic()
+        self.listening_s = self.ready_s = self.ready_status = None
+        self.health_failures = 0
+        print(f"▶️  {self.name} started (pid {self.process.pid}, port {self.port})")
+
+    def signal(self, sig):
+        if self.process is None or self.process.poll() is not None:
+            return
+        try:
+            if os.name == 'nt':
+                self.process.send_signal(signal.CTRL_BREAK_EVENT if sig == signal.SIGTERM else sig)
+            else:
+                os.killpg(self.process.pid, sig)
+        except (OSError, ValueError):
+            pass
+
+    def stop(self, grace):
+        """SIGTERM, then SIGKILL whatever is left after `grace` seconds"""
+        if self.process is None or self.process.poll() is not None:
+            self.state = STOPPED
+            return
+        self.signal(signal.SIGTERM)
+        try:
+            self.process.wait(grace)
+        except subprocess.TimeoutExpired:
+            print(f"⚠️ {self.name} did not stop within {grace:.0f}s, killing it")
+            self.signal(signal.SIGKILL if os.name != 'nt' else signal.SIGTERM)
+            self.process.kill()
+            self.process.wait()
+        self.state = STOPPED
+
+    def uptime(self):
+        return time.monotonic() - self.started_at if self.started_at else 0.0
+
+
+class Supervisor:
+    """Start services in dependency order, gated on readiness; restart them when they die"""
+
+    def __init__(self, services, production=False, ready_timeout=READY_TIMEOUT,
+                 start_timeout=START_TIMEOUT, grace=GRACE_SECONDS):
+        self.services = services
+        self.by_name = {service.name: service for service in services}
+        self.production = production
+        self.ready_timeout = ready_timeout
+        self.start_timeout = start_timeout
+        self.grace = grace
+        self.stopping = False
+        self.launched_at = None
+        self.reported = False
+
+    def handle_signal(self, signum, frame):
+        self.stopping = True
+
+    def dependencies_met(self, service, now):
+        """Dependencies ready, or we have waited ready_timeout for them"""
+        pending = [self.by_name[name] for name in service.depends_on if self.by_name[name].state != READY]
+        if not pending:
+            return True
+        waited = max(now - (dep.started_at or now) for dep in pending)
+        if waited >= self.ready_timeout and all(dep.process for dep in pending):
+            if service.state == STOPPED and service.process is None:
+                print(f"⚠️ {', '.join(dep.name for dep in pending)} not ready after "
+                      f"{self.ready_timeout:.0f}s, starting {service.name} anyway")
+            return True
+        return False
+
+    def check_readiness(self, service, now):
+        if service.listening_s is None:
+            status, _ = probe(f"{service.base_url}/healthz")
+            if status == 200:
+                service.listening_s = now - service.started_at
+        if service.listening_s is None:
+            return
+        status, body = probe(f"{service.base_url}/readyz")
+        if status == 200:
+            service.ready_s = now - service.started_at
+            service.ready_status = (body or {}).get('status', 'ready')
+            service.state = READY
+            service.next_health_check = now + HEALTH_INTERVAL
+            degraded = [name for name, check in (body or {}).get('checks', {}).items() if check.get('degraded')]
+            note = f", degraded: {', '.join(degraded)}" if degraded else ''
+            print(f"✅ {service.name} ready in {service.ready_s:.1f}s "
+                  f"(listening after {service.listening_s:.1f}s{note})")
+
+    def check_health(self, service, now):
+        if now < service.next_health_check:
+            return
+        service.next_health_check = now + HEALTH_INTERVAL
+        status, _ = probe(f"{service.base_url}/healthz", timeout=2.0)
+        if status == 200:
+            service.health_failures = 0
+            return
+        service.health_failures += 1
+        if service.health_failures >= HEALTH_FAILURES:
+            print(f"💔 {service.name} failed {service.health_failures} health checks, restarting it")
+            service.stop(self.grace)
+            self.schedule_restart(service, now)
+
+    def check_start_timeout(self, service, now):
+        """Kill a service that has not become ready within start_timeout; True if it was"""
+        if now - service.started_at < self.start_timeout:
+            return False
+        stage = 'not ready' if service.listening_s is not None else 'not listening'
+        print(f"⌛ {service.name} still {stage} after {self.start_timeout:.0f}s, restarting it")
+        service.stop(self.grace)
+        self.schedule_restart(service, now)
+        return True
+
+    def schedule_restart(self, service, now):
+        # A service that never became ready keeps backing off however long it ran
+        if service.ready_s is not None and service.uptime() >= STABLE_AFTER:
+            service.backoff = BACKOFF_INITIAL
+        service.restart_at = now + service.backoff
+        print(f"🔁 Restarting {service.name} in {service.backoff:.0f}s")
+        service.backoff = min(BACKOFF_MAX, service.backoff * 2)
+        service.state = BACKOFF
+
+    def tick(self):
+        now = time.monotonic()
+        for service in self.services:
+            if service.state == STOPPED:
+                if self.dependencies_met(service, now):
+                    service.start(self.production)
+                continue
+            if service.state == BACKOFF:
+                if now >= service.restart_at:
+                    service.restarts += 1
+                    service.start(self.production)
+                continue
+            code = service.process.poll()
+            if code is not None:
+                print(f"💥 {service.name} exited with code {code} after {service.uptime():.1f}s")
+                self.schedule_restart(service, now)
+            elif service.state == STARTING:
+                if not self.check_start_timeout(service, now):
+                    self.check_readiness(service, now)
+            else:
+                self.check_health(service, now)
+        if not self.reported and all(service.state == READY for service in self.services):
+            self.reported = True
+            self.report(now)
+
+    def report(self, now):
+        print("=" * 50)
+        print(f"🚀 All services ready in {now - self.launched_at:.1f}s")
+        for service in self.services:
+            print(f"   {service.name:<14} :{service.port}  listening {service.listening_s:5.1f}s  "
+                  f"ready {service.ready_s:5.1f}s  {service.ready_status}")
+        print("=" * 50)
+
+    def shutdown(self):
+        print("\n🛑 Shutting down services...")
+        for service in reversed(self.services):
+            if service.process is not None and service.process.poll() is None:
+                started = time.monotonic()
+                service.stop(self.grace)
+                print(f"   {service.name} stopped in {time.monotonic() - started:.1f}s "
+                      f"(up {service.uptime():.0f}s, {service.restarts} restarts)")
+            service.state = STOPPED
+        print("✅ Services stopped successfully!")
+
+    def run(self):
+        signal.signal(signal.SIGINT, self.handle_signal)
+        signal.signal(signal.SIGTERM, self.handle_signal)
+        self.launched_at = time.monotonic()
+        try:
+            while not self.stopping:
+                self.tick()
+                time.sleep(TICK)
+        finally:
+            self.shutdown()
+
 
 def main():
+    parser = argparse.ArgumentParser(description="Start and supervise the AtithiVerse services")
+    parser.add_argument('--production', action='store_true',
+                        help="run under the pre-fork server (serve.py) instead of the dev servers")
+    args = parser.parse_args()
+
     print("🚀 Starting AtithiVerse Services...")
     print("=" * 50)
-    
-    # Start AI service in a separate thread
-    ai_thread = Thread(target=start_ai_service, daemon=True)
-    ai_thread.start()
-    
-    # Give AI service time to start
-    time.sleep(3)
-    
-    # Start main website (this will block)
-    try:
-        start_main_website()
-    except KeyboardInterrupt:
-        print("\n🛑 Shutting down services...")
-        print("✅ Services stopped successfully!")
+    services = [
+        Service('AI Service', 'travel_bot.py', 5001),
+        Service('Main Website', 'app.py', 5000, depends_on=['AI Service']),
+    ]
+    Supervisor(services, production=args.production).run()
+
 
 if __name__ == "__main__":
     main()
@@ -783,7 +783,7 @@ function initializeAIChatbot() {
             hideTypingIndicator();
             if (data.success) {
                 addMessage(data.response, 'bot');
-                conversationHistory.push({ user: message, bot: data.response, timestamp: new Date().toISOString() });
+                conversationHistory.push({ user: message, bot: data.response, context_docs: data.context_docs || [], timestamp: new Date().toISOString() });
                 if (conversationHistory.length > 10) conversationHistory.shift();
                 if (data.suggestions) updateQuickActions(data.suggestions);
                 isConnected = data.ai_powered || false;
@@ -0,0 +1,163 @@
+"""
+Fingerprinted, pre-compressed static assets.
+
+build_assets() copies every file under static/ to static/dist/ with a
+content hash in its name (css/style.css -> css/style.3f2a9c1b7d4e.css),
+writes gzip and (when the optional `brotli` package is installed) brotli
+variants next to it, and records the mapping in static/dist/manifest.json.
+Because the name changes whenever the content does, the files are served
+from /assets/ with `Cache-Control: public, max-age=31536000, immutable`:
+browsers never revalidate them, and a deploy with new content simply
+references new names. Templates call asset_url('css/style.css'), which
+falls back to the plain /static/ URL for files missing from the manifest.
+
+Files from earlier builds are kept (pages cached by browsers or a CDN may
+still reference them); build_assets.py --prune removes them.
+"""
+
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import tempfile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+DIST_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+ASSETS_URL_PATH = '/assets'
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+HASH_LENGTH = 12
+
+# Below this size compression costs more than it saves
+MIN_COMPRESS_BYTES = 1024
+
+# Already compressed formats
+SKIP_COMPRESSION = {'.png', '.jpg', '.jpeg', '.gif', '.webp', '.avif', '.woff', '.woff2', '.gz', '.br', '.zip'}
+
+# Encodings by preference: (Accept-Encoding token, file suffix)
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def hashed_name(filename, data):
+    stem, ext = os.path.splitext(filename)
+    return f"{stem}.{hashlib.sha256(data).hexdigest()[:HASH_LENGTH]}{ext}"
+
+
+def iter_static_files(static_dir):
+    """Relative paths (with '/') of the source assets, dist/ and dotfiles excluded"""
+    for root, dirs, files in os.walk(static_dir):
+        rel_root = os.path.relpath(root, static_dir)
+        if rel_root == '.':
+            dirs[:] = [d for d in dirs if d != DIST_DIR]
+        dirs[:] = [d for d in dirs if not d.startswith('.')]
+        for name in sorted(files):
+            if not name.startswith('.'):
+                yield os.path.normpath(os.path.join(rel_root, name)).replace(os.sep, '/')
+
+
+def build_assets(static_dir):
+    """Fingerprint and compress everything under static_dir; returns the manifest"""
+    dist_dir = os.path.join(static_dir, DIST_DIR)
+    manifest = {}
+    for filename in iter_static_files(static_dir):
+        with open(os.path.join(static_dir, filename), 'rb') as f:
+            data = f.read()
+        target = hashed_name(filename, data)
+        manifest[filename] = target
+        target_path = os.path.join(dist_dir, target)
+        if os.path.exists(target_path):
+            continue   # content-addressed: already built
+        if len(data) >= MIN_COMPRESS_BYTES and os.path.splitext(filename)[1].lower() not in SKIP_COMPRESSION:
+            _write_atomic(target_path + '.gz', gzip.compress(data, compresslevel=9, mtime=0))
+            if brotli is not None:
+                _write_atomic(target_path + '.br', brotli.compress(data, quality=11))
+        _write_atomic(target_path, data)
+
+    _write_atomic(os.path.join(dist_dir, MANIFEST_NAME),
+                  json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+    return manifest
+
+
+def load_manifest(static_dir):
+    try:
+        with open(os.path.join(static_dir, DIST_DIR, MANIFEST_NAME), encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def prune_assets(static_dir, manifest):
+    """Delete built files the manifest no longer references; returns how many"""
+    dist_dir = os.path.join(static_dir, DIST_DIR)
+    keep = {MANIFEST_NAME}
+    for target in manifest.values():
+        keep.update({target, target + '.gz', target + '.br'})
+    removed = 0
+    for filename in list(iter_static_files(dist_dir)):
+        if filename not in keep:
+            os.remove(os.path.join(dist_dir, filename))
+            removed += 1
+    return removed
+
+
+def negotiate(accept_encodings, path):
+    """(encoding, file path) of the best pre-compressed variant the client accepts"""
+    for encoding, suffix in ENCODINGS:
+        if accept_encodings[encoding] > 0 and os.path.exists(path + suffix):
+            return encoding, path + suffix
+    return None, path
+
+
+def init_static_assets(app, build=True):
+    """Build (or load) the manifest and register /assets/ and the asset_url() template helper"""
+    from flask import abort, request, send_file, url_for
+
+    static_dir = app.static_folder
+    dist_dir = os.path.realpath(os.path.join(static_dir, DIST_DIR))
+    try:
+        manifest = build_assets(static_dir) if build else load_manifest(static_dir)
+    except OSError as e:
+        print(f"⚠️ Could not build static assets: {e}")
+        manifest = load_manifest(static_dir)
+    if manifest:
+        print(f"🗜️ Static assets fingerprinted: {len(manifest)} files"
+              f"{'' if brotli else ' (install brotli for .br variants)'}")
+
+    def asset_url(filename):
+        """Immutable fingerprinted URL for a static file, plain /static/ URL if it was not built"""
+        target = manifest.get(filename)
+        if target is None:
+            return url_for('static', filename=filename)
+        return url_for('fingerprinted_asset', filename=target)
+
+    @app.route(f'{ASSETS_URL_PATH}/<path:filename>', endpoint='fingerprinted_asset')
+    def fingerprinted_asset(filename):
+        path = os.path.realpath(os.path.join(dist_dir, filename))
+        if not path.startswith(dist_dir + os.sep) or not os.path.isfile(path):
+            abort(404)
+        encoding, served_path = negotiate(request.accept_encodings, path)
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        response = send_file(served_path, mimetype=mimetype, max_age=IMMUTABLE_MAX_AGE, conditional=True)
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        response.vary.add('Accept-Encoding')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        return response
+
+    app.add_template_global(asset_url)
+    app.extensions['static_assets'] = manifest
+    return manifest
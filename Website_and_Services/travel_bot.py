@@ -1,40 +1,150 @@
 import json
 import os
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeout
 import requests
 import numpy as np
 from dotenv import load_dotenv
-from flask import Flask, jsonify, request
+from flask import Flask, jsonify, request, Response, stream_with_context
 from flask_cors import CORS
+from werkzeug.serving import WSGIRequestHandler, make_server
+from embedding_model import LazyEmbeddingModel, UNAVAILABLE
+from embedding_service import BatchingEmbedder
+from ollama_client import OllamaGateway, sse_event, SSE_HEADERS
+from model_lifecycle import ModelLifecycle
+from semantic_cache import SemanticCache
+from conversation_context import build_chat_messages, warm_encoding
+from intent_router import IntentRouter
+from travel_corpus import load_corpus
+from lexical_index import BM25Index, reciprocal_rank_fusion
+from corpus_embeddings import normalize_rows, top_k_indices
+from background_tasks import at_worker_start
+from bot_transport import SHARED_RESOURCES
+from deadlines import Deadline, DeadlineExceeded, MIN_GENERATION_MS, chat_deadline_ms
+from health import embedding_check, lifecycle_check, liveness, readiness
 
 # ------------------- Load Environment -------------------
 load_dotenv()
 PORT = 5001  # Different port from main website
 
+# When app.py runs this module in-process (BOT_TRANSPORT=inprocess) it passes
+# its own embedding model and Ollama lifecycle/gateway through SHARED_RESOURCES,
+# so one process loads the embedder once and keeps a single Ollama concurrency cap
+
 # ------------------- Embedding Setup -------------------
-try:
-    from sentence_transformers import SentenceTransformer
-    embedder = SentenceTransformer("all-MiniLM-L6-v2")
-    print("✅ Embedding model loaded successfully.")
-except ImportError:
-    print("⚠️ sentence-transformers not installed. Falling back to keyword search.")
-    embedder = None
-except Exception as e:
-    print(f"⚠️ Could not initialize embedder: {e}. Falling back to keyword search.")
-    embedder = None
-
-# ------------------- Dummy Document Loading -------------------
-# Replace this with actual loading logic from your data source
-try:
-    # Example: load from a local JSON or text file
-    with open("data/documents.json", "r", encoding="utf-8") as f:
-        documents = json.load(f)
-except FileNotFoundError:
-    print("⚠️ No documents found. Using empty list.")
+# Loaded on a background thread so the service starts serving immediately
+embedding_model = SHARED_RESOURCES.get('embedding_model')
+if embedding_model is None:
+    embedding_model = LazyEmbeddingModel("all-MiniLM-L6-v2")
+    if embedding_model.state == UNAVAILABLE:
+        print("⚠️ sentence-transformers not installed. Falling back to keyword search.")
+    elif os.getenv('EMBEDDINGS_PRELOAD', '1') != '0':
+        at_worker_start(embedding_model.start)
+EMBEDDING_MODEL_NAME = embedding_model.model_name
+
+# Query embeddings go through a batching queue, so a chat waits for one no
+# longer than its deadline allows (the encode itself cannot be interrupted)
+embedding_service = None
+
+def start_embedding_service(model):
+    global embedding_service
+    embedding_service = BatchingEmbedder(model, int(os.getenv('EMBED_MAX_BATCH_SIZE', '32')),
+                                         float(os.getenv('EMBED_MAX_WAIT_MS', '5')))
+
+embedding_model.on_ready(start_embedding_service)
+
+# Prompt token counting: load tiktoken in the background instead of on the first chat
+at_worker_start(warm_encoding)
+
+# ------------------- Document Loading -------------------
+# Retrieval passages prebuilt by build_corpus.py (texts + memory-mapped embeddings)
+travel_corpus = load_corpus()
+if travel_corpus is None:
+    print("⚠️ No prebuilt corpus found (run build_corpus.py). Answering without retrieval.")
     documents = []
+else:
+    documents = travel_corpus.texts
+    print(f"📚 Loaded corpus {travel_corpus.version}: {len(documents)} passages")
+lexical_index = BM25Index(documents)
+RETRIEVAL_TOP_K = int(os.getenv('RETRIEVAL_TOP_K', '3'))
 
 # ------------------- Ollama Setup -------------------
-OLLAMA_SERVER = os.getenv("OLLAMA_SERVER", "http://localhost:11434")
-OLLAMA_CHAT_MODEL = os.getenv("OLLAMA_CHAT_MODEL", "llama3")  # default model
+# Preload the chat model at start, keep it resident between chats
+# (OLLAMA_KEEP_ALIVE) and pin it during OLLAMA_PIN_HOURS, e.g. "9-21"
+ollama_model = SHARED_RESOURCES.get('ollama_model')
+if ollama_model is None:
+    ollama_model = ModelLifecycle(
+        os.getenv("OLLAMA_SERVER", "http://localhost:11434"),
+        os.getenv("OLLAMA_CHAT_MODEL", "llama3"),  # default model
+        keep_alive=os.getenv('OLLAMA_KEEP_ALIVE', '30m'),
+        pin_hours=os.getenv('OLLAMA_PIN_HOURS', ''),
+        refresh_interval=int(os.getenv('OLLAMA_KEEPALIVE_REFRESH', '300'))
+    )
+    if os.getenv('OLLAMA_PRELOAD', '1') != '0':
+        at_worker_start(ollama_model.start)
+OLLAMA_SERVER = ollama_model.server
+OLLAMA_CHAT_MODEL = ollama_model.model
+
+# Bounded concurrency + FIFO queue in front of Ollama; requests that cannot
+# get a slot before their deadline are answered with the local fallback
+ollama_gateway = SHARED_RESOURCES.get('ollama_gateway')
+if ollama_gateway is None:
+    ollama_gateway = OllamaGateway(
+        OLLAMA_SERVER,
+        max_concurrency=int(os.getenv('OLLAMA_MAX_CONCURRENCY', '2')),
+        max_queue=int(os.getenv('OLLAMA_MAX_QUEUE', '32')),
+        lifecycle=ollama_model
+    )
+
+# ------------------- Response Cache -------------------
+def embed_query(text, deadline=None):
+    """Query embedding once the background model is ready, else None
+    (also None if it does not arrive within `deadline`)"""
+    # Lazy mode (EMBEDDINGS_PRELOAD=0): kick off loading on first use (no-op if already started)
+    embedding_model.start()
+    timeout = deadline.timeout(cap=10) if deadline else 10
+    if embedding_service is None or timeout <= 0:
+        return None
+    try:
+        return embedding_service.encode(text, timeout=timeout)
+    except FutureTimeout:
+        print(f"⏰ Query embedding took over {timeout:.1f}s, retrieving by keywords")
+        return None
+    except Exception as e:
+        print(f"⚠️ Query embedding failed: {e}")
+        return None
+
+def retrieve(query, query_emb=None, top_k=RETRIEVAL_TOP_K):
+    """Corpus passages for a question: BM25, fused with the prebuilt embeddings
+    when there is a query embedding (see embed_query)"""
+    if not documents:
+        return []
+    ranked = [doc_no for doc_no, _ in lexical_index.search(query, top_k * 3)]
+    matrix = travel_corpus.embeddings_for(EMBEDDING_MODEL_NAME)
+    if matrix is not None and query_emb is not None:
+        semantic = top_k_indices(matrix, normalize_rows(query_emb)[0], top_k * 3)
+        ranked = reciprocal_rank_fusion([semantic, ranked], top_k)
+    return [documents[doc_no] for doc_no in ranked[:top_k]]
+
+def load_chatbot_config():
+    """Load data/config/chatbot_config.json (empty dict if missing)"""
+    try:
+        with open("data/config/chatbot_config.json", "r", encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError) as e:
+        print(f"⚠️ Could not load chatbot config: {e}")
+        return {}
+
+# TTL from performance.cache_duration in chatbot_config.json, as in app.py
+chatbot_config = load_chatbot_config()
+
+# Keyed by the retrieved passages; questions are compared by their retrieval embedding
+semantic_cache = SemanticCache(
+    threshold=float(os.getenv('SEMANTIC_CACHE_THRESHOLD', '0.92')),
+    ttl=chatbot_config.get('performance', {}).get('cache_duration', 3600),
+    max_entries=int(os.getenv('SEMANTIC_CACHE_SIZE', '512'))
+)
 
 # ------------------- Flask App -------------------
 app = Flask(__name__)
@@ -50,17 +160,8 @@ CORS(app, resources={
     ]}
 })
 
-# ------------------- Routes -------------------
-@app.route('/travel-chat', methods=['POST'])
-def enhanced_travel_chat():
-    try:
-        if not request.json or 'user_input' not in request.json:
-            return jsonify({'error': 'Missing user_input in request'}), 400
-            
-        user_input = request.json['user_input']
-        user_context = request.json.get('context', {})
-
-        system_prompt = """You are AtithiBot, an expert Indian travel assistant for AtithiVerse tourism platform. 
+# ------------------- Prompt -------------------
+SYSTEM_PROMPT = """You are AtithiBot, an expert Indian travel assistant for AtithiVerse tourism platform. 
 
 IMPORTANT GUIDELINES:
 - Provide specific, actionable travel advice for India
@@ -82,99 +183,221 @@ Available destinations on our platform:
 
 If users show interest in any destination, mention they can book directly through our website."""
 
-        payload = {
-            "model": OLLAMA_CHAT_MODEL,
-            "messages": [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_input}
-            ],
-            "stream": False
+# Rule-based fallback answers and suggestions ("intent_router" in chatbot_config.json)
+intent_router = IntentRouter(chatbot_config.get('intent_router', {}))
+
+# Total time for one chat answer unless the caller forwards a smaller budget
+# (X-Request-Deadline-Ms, see deadlines.py); the same default as app.py
+CHAT_DEADLINE_MS = chat_deadline_ms()
+
+# Prompt size cap (system prompt + documents + history + question), in tokens
+CHAT_PROMPT_TOKEN_BUDGET = int(os.getenv('CHAT_PROMPT_TOKEN_BUDGET', '1536'))
+
+def build_system_prompt(context):
+    """SYSTEM_PROMPT plus retrieved travel information and any conversation summary"""
+    return f"{SYSTEM_PROMPT}\n\nRELEVANT TRAVEL INFORMATION:\n{context}" if context else SYSTEM_PROMPT
+
+# ------------------- Chat Handlers -------------------
+# Used by the routes below; travel_chat_events also, in-process, by app.py's bot transport
+
+def travel_chat_reply(user_input, user_context=None, deadline=None):
+    """One complete chat answer as a dict"""
+    user_context = user_context or {}
+    deadline = deadline or Deadline(CHAT_DEADLINE_MS)
+    query_emb = embed_query(user_input, deadline)
+    relevant_docs = retrieve(user_input, query_emb)
+    route = intent_router.route('travel_bot', user_input)
+
+    messages, prompt_info = build_chat_messages(
+        build_system_prompt, user_input, relevant_docs,
+        user_context.get('conversation_history', []), CHAT_PROMPT_TOKEN_BUDGET
+    )
+    # Follow-up questions depend on the conversation, so only standalone ones are cached
+    use_cache = not (prompt_info['history_turns'] or prompt_info['summarized_turns'])
+
+    cached = semantic_cache.lookup(user_input, relevant_docs, query_emb) if use_cache else None
+    if cached:
+        return {
+            "response": cached['response'],
+            "ai_powered": True,
+            "cached": True,
+            "context_docs": prompt_info['context_docs'],
+            "suggestions": route.suggestions
         }
 
+    try:
+        if not deadline.can_afford(MIN_GENERATION_MS):
+            raise DeadlineExceeded(f"{deadline.remaining_ms():.0f}ms left, answering locally")
+        generation_started = time.perf_counter()
+        chatbot_reply = ollama_gateway.chat(OLLAMA_CHAT_MODEL, messages,
+                                            timeout=deadline.timeout(), deadline=deadline.child())
+        if chatbot_reply and use_cache:
+            semantic_cache.store(user_input, relevant_docs, chatbot_reply,
+                                 (time.perf_counter() - generation_started) * 1000, query_emb)
+        elif not chatbot_reply:
+            chatbot_reply = "Sorry, no response generated."
+    except requests.exceptions.RequestException as e:
+        print(f"⚠️ Ollama API error: {e}")
+        chatbot_reply = route.response
+
+    return {
+        "response": chatbot_reply,
+        "ai_powered": True,
+        "cached": False,
+        "prompt_tokens": prompt_info['prompt_tokens'],
+        "context_docs": prompt_info['context_docs'],
+        "suggestions": route.suggestions
+    }
+
+def travel_chat_events(user_input, user_context=None, deadline=None):
+    """Streaming chat answer: a generator of Server-Sent Event strings"""
+    user_context = user_context or {}
+    deadline = deadline or Deadline(CHAT_DEADLINE_MS)
+    query_emb = embed_query(user_input, deadline)
+    relevant_docs = retrieve(user_input, query_emb)
+    route = intent_router.route('travel_bot', user_input)
+    messages, prompt_info = build_chat_messages(
+        build_system_prompt, user_input, relevant_docs,
+        user_context.get('conversation_history', []), CHAT_PROMPT_TOKEN_BUDGET
+    )
+    use_cache = not (prompt_info['history_turns'] or prompt_info['summarized_turns'])
+    started = time.perf_counter()
+    cached = semantic_cache.lookup(user_input, relevant_docs, query_emb) if use_cache else None
+
+    def generate():
+        parts = []
+        ttft_ms = None
+        ai_powered = True
+        truncated = False
         try:
-            response = requests.post(f"{OLLAMA_SERVER}/api/chat", json=payload, timeout=30)
-            response.raise_for_status()
-            completion = response.json()
-            chatbot_reply = completion.get("message", {}).get("content", "Sorry, no response generated.")
-        except requests.exceptions.RequestException as e:
-            print(f"⚠️ Ollama API error: {e}")
-            chatbot_reply = get_travel_fallback(user_input)
-
-        return jsonify({
-            "response": chatbot_reply,
-            "ai_powered": True,
-            "suggestions": get_quick_suggestions(user_input)
+            if cached:
+                parts.append(cached['response'])
+                ttft_ms = round((time.perf_counter() - started) * 1000, 1)
+                yield sse_event('token', {'content': cached['response']})
+                chunks = []
+            elif not deadline.can_afford(MIN_GENERATION_MS):
+                raise DeadlineExceeded(f"{deadline.remaining_ms():.0f}ms left, answering locally")
+            else:
+                chunks = ollama_gateway.stream_chat(OLLAMA_CHAT_MODEL, messages,
+                                                    timeout=deadline.timeout(), deadline=deadline.child())
+            for chunk in chunks:
+                if chunk.get("queued"):
+                    yield sse_event('queued', {
+                        "queue_position": chunk["queue_position"],
+                        "estimated_wait_ms": chunk["estimated_wait_ms"]
+                    })
+                    continue
+                content = chunk.get("message", {}).get("content", "")
+                if not content:
+                    continue
+                if ttft_ms is None:
+                    ttft_ms = round((time.perf_counter() - started) * 1000, 1)
+                parts.append(content)
+                yield sse_event('token', {'content': content})
+        except Exception as e:
+            print(f"⚠️ Ollama stream error: {e}")
+            if parts:
+                truncated = True
+            else:
+                ai_powered = False
+                fallback = route.response
+                parts.append(fallback)
+                yield sse_event('token', {'content': fallback})
+
+        if use_cache and ai_powered and not truncated and not cached and parts:
+            semantic_cache.store(user_input, relevant_docs, "".join(parts),
+                                 (time.perf_counter() - started) * 1000, query_emb)
+
+        yield sse_event('done', {
+            "success": True,
+            "response": "".join(parts),
+            "ai_powered": ai_powered,
+            "truncated": truncated,
+            "cached": bool(cached),
+            "prompt_tokens": prompt_info['prompt_tokens'],
+            "context_docs": prompt_info['context_docs'],
+            "suggestions": route.suggestions,
+            "ttft_ms": ttft_ms,
+            "total_ms": round((time.perf_counter() - started) * 1000, 1)
         })
+
+    return generate()
+
+# ------------------- Routes -------------------
+@app.route('/travel-chat', methods=['POST'])
+def enhanced_travel_chat():
+    try:
+        if not request.json or 'user_input' not in request.json:
+            return jsonify({'error': 'Missing user_input in request'}), 400
+
+        deadline = Deadline.from_headers(request.headers, CHAT_DEADLINE_MS, CHAT_DEADLINE_MS)
+        return jsonify(travel_chat_reply(request.json['user_input'], request.json.get('context'), deadline))
         
     except Exception as e:
         print(f"❌ Error in /travel-chat endpoint: {e}")
         return jsonify({'error': f'Internal server error: {str(e)}'}), 500
 
-# ------------------- Helper Functions -------------------
-def get_travel_fallback(user_input):
-    """Enhanced travel-specific fallback responses"""
-    input_lower = user_input.lower()
-    
-    if any(word in input_lower for word in ['taj mahal', 'agra']):
-        return "🏛️ The Taj Mahal is absolutely breathtaking! Visit early morning (6 AM) for the best experience and fewer crowds. Entry is ₹500 for Indians, ₹1100 for foreigners. Best photographed during sunrise or sunset. The monument is closed on Fridays. Would you like help planning your Agra itinerary?"
-    
-    elif any(word in input_lower for word in ['goa', 'beach']):
-        return "🏖️ Goa is perfect year-round, but November-March offers the best weather! Popular beaches: Baga & Calangute (lively), Palolem & Arambol (peaceful). Budget: ₹2,000-4,000/day, Luxury: ₹8,000+/day. Try water sports, beach shacks, and vibrant nightlife! Which type of Goa experience interests you?"
-    
-    elif any(word in input_lower for word in ['kerala', 'backwaters']):
-        return "🌴 Kerala's backwaters are magical! Alleppey & Kumarakom offer the best houseboat experiences. Costs: ₹3,000-12,000/night depending on luxury level. Best time: October-March. Don't miss: Ayurvedic spa treatments, toddy tapping, and traditional Kerala meals. Planning a romantic getaway or family trip?"
-    
-    elif any(word in input_lower for word in ['rajasthan', 'jaipur', 'palace']):
-        return "🏰 Rajasthan is a royal treat! Jaipur (Pink City), Udaipur (City of Lakes), Jodhpur (Blue City) form the Golden Triangle. Palace hotels from ₹5,000-50,000/night. Best time: October-March. Must-do: Camel safari, folk performances, heritage walks. Interested in luxury palace stays or budget heritage tours?"
-    
-    elif any(word in input_lower for word in ['budget', 'cheap', 'affordable']):
-        return "💰 India is incredibly budget-friendly! Daily costs:\n• Hostels: ₹500-1,500\n• Local food: ₹200-800\n• Local transport: ₹100-500\n• Attractions: ₹50-500\n\nTotal: ₹1,500-3,000/day for comfortable budget travel. Street food, local trains, and budget hotels offer authentic experiences! What's your daily budget range?"
-    
-    elif any(word in input_lower for word in ['best time', 'when', 'weather']):
-        return "🌤️ India's diverse climate offers year-round travel! \n• **Oct-Mar**: Pleasant weather, peak season\n• **Apr-Jun**: Hot, perfect for hill stations\n• **Jul-Sep**: Monsoon, lush landscapes in Kerala/Western Ghats\n\nEach season has its charm! Which region interests you most?"
-    
-    else:
-        return "🇮🇳 Welcome to AtithiVerse! I'm here to help you discover Incredible India. Whether you're interested in iconic monuments, pristine beaches, royal palaces, or spiritual journeys - I can create the perfect itinerary for you! What type of experience are you looking for?"
+@app.route('/status')
+def service_status():
+    """Readiness of the background-loaded components"""
+    return jsonify({
+        'embedding_model': embedding_model.status(),
+        'documents': len(documents),
+        'model': OLLAMA_CHAT_MODEL,
+        'semantic_cache': semantic_cache.stats(),
+        'ollama_gateway': ollama_gateway.stats(),
+        'ollama_model': ollama_model.status()
+    })
 
-def get_quick_suggestions(user_input):
-    """Generate contextual quick action buttons"""
-    input_lower = user_input.lower()
-    
-    if any(word in input_lower for word in ['taj mahal', 'agra']):
-        return [
-            "Best time to visit Taj Mahal",
-            "Agra itinerary for 2 days", 
-            "Hotels near Taj Mahal",
-            "Book Taj Mahal tour"
-        ]
-    elif any(word in input_lower for word in ['goa', 'beach']):
-        return [
-            "Best beaches in Goa",
-            "Goa nightlife guide",
-            "Water sports in Goa", 
-            "Book Goa package"
-        ]
-    elif any(word in input_lower for word in ['budget']):
-        return [
-            "Budget India itinerary",
-            "Cheap places to stay",
-            "Free attractions in India",
-            "Budget food options"
-        ]
-    else:
-        return [
-            "Popular destinations",
-            "Best time to visit India",
-            "Budget travel tips",
-            "Plan my trip"
-        ]
+@app.route('/healthz')
+def healthz():
+    """Liveness: the process is serving requests"""
+    return jsonify(liveness())
+
+@app.route('/readyz')
+def readyz():
+    """Readiness: background model loading has settled (503 while starting)"""
+    body, status = readiness({
+        'embedding_model': embedding_check(embedding_model),
+        'ollama_model': lifecycle_check(ollama_model),
+        'corpus': (True, not documents, f"{len(documents)} passages"),
+    })
+    return jsonify(body), status
+
+@app.route('/travel-chat/stream', methods=['POST'])
+def stream_travel_chat():
+    """Streaming /travel-chat: Ollama tokens as Server-Sent Events, then a 'done' event"""
+    if not request.json or 'user_input' not in request.json:
+        return jsonify({'error': 'Missing user_input in request'}), 400
+
+    deadline = Deadline.from_headers(request.headers, CHAT_DEADLINE_MS, CHAT_DEADLINE_MS)
+    events = travel_chat_events(request.json['user_input'], request.json.get('context'), deadline)
+    return Response(stream_with_context(events), mimetype='text/event-stream', headers=SSE_HEADERS)
+
+# ------------------- Listeners -------------------
+def start_unix_listener(path):
+    """Serve the app on a Unix domain socket too (BOT_TRANSPORT=unix in app.py)"""
+    if os.path.exists(path):
+        os.unlink(path)  # stale socket from a previous run
+    server = make_server(f"unix://{path}", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, name='unix-listener', daemon=True).start()
+    print(f"🔌 Unix socket: {path}")
+    return server
 
 # ------------------- Entry Point -------------------
 if __name__ == '__main__':
+    # HTTP/1.1 so app.py's keep-alive session can reuse its connections
+    WSGIRequestHandler.protocol_version = "HTTP/1.1"
+    
+    # Under the debug reloader each serving child binds the path again, replacing this one
+    bot_socket = os.getenv('BOT_SOCKET')
+    if bot_socket:
+        start_unix_listener(bot_socket)
+    
     print("=" * 50)
     print(f"🤖 Starting Enhanced AtithiVerse AI Travel Assistant")
     print(f"📍 Port: {PORT}")
-    print(f"🔍 Search Method: {'Embeddings' if embedder else 'Keyword Search'}")
+    print(f"🔍 Search Method: {'Embeddings (loading in background)' if embedding_model.state != UNAVAILABLE else 'Keyword Search'}")
     print(f"📚 Documents Loaded: {len(documents)}")
     print(f"🤖 Ollama Server: {OLLAMA_SERVER}")
     print(f"🧠 Model: {OLLAMA_CHAT_MODEL}")
@@ -0,0 +1,313 @@
+"""
+Prebuilt retrieval corpus for the chat services.
+
+build_corpus.py turns the travel data files (data/json/destinations.json,
+data/json/travel_packages.json and data.json) into retrieval passages with
+metadata, embeds them in batches and writes a versioned artifact:
+
+    corpus/<version>/manifest.json     version, model, counts, source hashes
+    corpus/<version>/passages.json     [{"text": ..., "meta": {...}}, ...]
+    corpus/<version>/embeddings.npy    float32 (n, dim), L2-normalized
+    corpus/CURRENT                     name of the active version
+
+load_corpus() reads the manifest and passages and memory-maps the
+embeddings, so services start in milliseconds without touching the model.
+"""
+
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+
+from corpus_embeddings import normalize_rows
+
+# Paths are anchored to this module, not the working directory
+HERE = os.path.dirname(os.path.abspath(__file__))
+CORPUS_DIR = os.getenv('CORPUS_DIR', os.path.join(HERE, 'corpus'))
+
+SOURCES = {
+    'destinations': os.path.join(HERE, "data", "json", "destinations.json"),
+    'packages': os.path.join(HERE, "data", "json", "travel_packages.json"),
+    'highlights': os.path.join(HERE, "data.json"),
+}
+
+# Passage size, in words, and the overlap between consecutive windows
+MAX_WORDS = 120
+OVERLAP_WORDS = 20
+
+# Destination fields that carry no retrieval value
+_SKIP_FIELDS = {'id', 'slug', 'images', 'reviews_count', 'name', 'location', 'category',
+                'description', 'travel_info', 'timings', 'pricing', 'rating', 'tags'}
+
+
+# ----- source records -----
+
+def iter_source_records(sources=SOURCES):
+    """Yield (source, record) file by file. Each file is parsed whole with
+    json.load (they are a few KB), only one file's records are held at a time.
+    """
+    for source, path in sources.items():
+        try:
+            with open(path, "r", encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            print(f"⚠️ Corpus source not found, skipping: {path}")
+            continue
+        if isinstance(data, dict):
+            # {"destinations": [...], "metadata": {...}} style files
+            data = next((v for k, v in data.items() if isinstance(v, list)), [])
+        for record in data:
+            if isinstance(record, dict):
+                yield source, record
+
+
+# ----- chunking -----
+
+def _label(key):
+    return key.replace('_', ' ').title()
+
+
+def _render(value):
+    """Flatten nested JSON into readable text"""
+    if isinstance(value, dict):
+        return "; ".join(f"{_label(k)}: {_render(v)}" for k, v in value.items() if k != 'coordinates')
+    if isinstance(value, list):
+        sep = "; " if any(isinstance(v, dict) for v in value) else ", "
+        return sep.join(_render(v) for v in value)
+    return str(value)
+
+
+def _windows(header, lines, max_words=MAX_WORDS, overlap=OVERLAP_WORDS):
+    """Split body lines into passages of at most max_words, each starting with the header"""
+    if not lines:
+        return []
+    words = " \n ".join(lines).split(" ")
+    budget = max(20, max_words - len(header.split()))
+    if len(words) <= budget:
+        return [f"{header}\n" + "\n".join(lines)]
+    passages = []
+    step = budget - overlap
+    for start in range(0, len(words), step):
+        body = " ".join(words[start:start + budget]).replace(" \n ", "\n").strip()
+        passages.append(f"{header}\n{body}")
+        if start + budget >= len(words):
+            break
+    return passages
+
+
+def _destination_passages(record):
+    location = record.get('location', {})
+    place = ", ".join(p for p in (location.get('city'), location.get('state')) if p) if isinstance(location, dict) else str(location)
+    header = f"Name: {record.get('name', '')}\nLocation: {place}"
+    meta = {'id': record.get('id'), 'name': record.get('name'), 'location': place,
+            'category': record.get('category')}
+
+    description = record.get('description', {})
+    if isinstance(description, dict):
+        description = " ".join(v for k, v in description.items() if k in ('short', 'long') and v)
+    overview = [f"Category: {record.get('category', '')}", f"Description: {description}"]
+    for key in ('travel_info', 'timings'):
+        if record.get(key):
+            overview.append(f"{_label(key)}: {_render(record[key])}")
+    if record.get('rating'):
+        overview.append(f"Rating: {record['rating']}/5")
+    if record.get('tags'):
+        overview.append(f"Tags: {_render(record['tags'])}")
+
+    sections = [('overview', overview)]
+    if record.get('pricing'):
+        sections.append(('pricing', [f"Price: {_render(record['pricing'])}"]))
+    for key, value in record.items():
+        if key not in _SKIP_FIELDS and value:
+            sections.append((key, [f"{_label(key)}: {_render(value)}"]))
+
+    for section, lines in sections:
+        for text in _windows(header, lines):
+            yield text, dict(meta, section=section)
+
+
+def _package_passages(record):
+    name = record.get('name', '')
+    header = f"Package: {name} ({record.get('duration', '?')} days)"
+    meta = {'id': record.get('id'), 'name': name, 'duration': record.get('duration')}
+
+    overview = [f"Destinations: {_render(record.get('destinations', []))}"]
+    if record.get('price_range'):
+        overview.append(f"Price: {_render(record['price_range'])}")
+    if record.get('inclusions'):
+        overview.append(f"Inclusions: {_render(record['inclusions'])}")
+    for text in _windows(header, overview):
+        yield text, dict(meta, section='overview')
+
+    days = [
+        f"Day {day.get('day')} ({day.get('location', '')}): {_render(day.get('activities', []))}"
+        + (f". Stay: {day['accommodation']}" if day.get('accommodation') else "")
+        for day in record.get('itinerary', [])
+    ]
+    for text in _windows(header, days):
+        yield text, dict(meta, section='itinerary')
+
+
+def _highlight_passages(record):
+    # Same text the services built from data.json before the corpus existed
+    text = (f"Name: {record.get('name', '')}\nLocation: {record.get('location', '')}\n"
+            f"Description: {record.get('description', '')}\nPrice: {record.get('price', '')}\n"
+            f"Best Time: {record.get('best_time', '')}\nTips: {record.get('tips', '')}")
+    yield text, {'name': record.get('name'), 'location': record.get('location'), 'section': 'overview'}
+
+
+_CHUNKERS = {
+    'destinations': _destination_passages,
+    'packages': _package_passages,
+    'highlights': _highlight_passages,
+}
+
+
+def iter_passages(sources=SOURCES):
+    """Yield {"text", "meta"} retrieval passages from every source record"""
+    seen = set()   # digests, not texts, of the passages yielded so far
+    for source, record in iter_source_records(sources):
+        for text, meta in _CHUNKERS[source](record):
+            key = hashlib.sha1(text.encode('utf-8')).digest()
+            if key in seen:
+                continue
+            seen.add(key)
+            yield {'text': text, 'meta': dict(meta, source=source)}
+
+
+# ----- build -----
+
+def _file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 16), b''):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+def build_corpus(encode=None, model_name=None, out_dir=CORPUS_DIR, batch_size=64, sources=SOURCES):
+    """Chunk, embed (if `encode` is given) and write a new corpus version; returns its manifest.
+
+    Passages are streamed twice from the sources and never held all at once:
+    the first pass counts them and computes the version, the second writes
+    passages.json one passage at a time and calls encode(list_of_texts) ->
+    array of embeddings batch by batch, writing the vectors into a
+    memory-mapped .npy file.
+    """
+    started = time.perf_counter()
+
+    count = 0
+    digest = hashlib.sha256((model_name or 'lexical').encode('utf-8'))
+    for passage in iter_passages(sources):
+        digest.update(b'\0')
+        digest.update(passage['text'].encode('utf-8'))
+        count += 1
+    version = digest.hexdigest()[:16]
+
+    version_dir = os.path.join(out_dir, version)
+    tmp_dir = f"{version_dir}.{os.getpid()}.tmp"
+    os.makedirs(tmp_dir, exist_ok=True)
+
+    dim = None
+    matrix = None
+    batch = []
+    written = 0
+
+    def flush_batch():
+        nonlocal dim, matrix
+        vectors = normalize_rows(encode([p['text'] for p in batch]))
+        if matrix is None:
+            dim = vectors.shape[1]
+            matrix = np.lib.format.open_memmap(os.path.join(tmp_dir, "embeddings.npy"), mode='w+',
+                                               dtype=np.float32, shape=(count, dim))
+        matrix[written - len(batch):written] = vectors
+        print(f"🧮 Embedded {written}/{count} passages")
+        batch.clear()
+
+    with open(os.path.join(tmp_dir, "passages.json"), "w", encoding='utf-8') as f:
+        f.write('[')
+        for passage in iter_passages(sources):
+            f.write(', ' if written else '')
+            json.dump(passage, f, ensure_ascii=False)
+            written += 1
+            if encode is not None:
+                batch.append(passage)
+                if len(batch) == batch_size:
+                    flush_batch()
+        f.write(']')
+    if written != count:
+        raise RuntimeError(f"Corpus sources changed during the build ({count} -> {written} passages)")
+    if batch:
+        flush_batch()
+    if matrix is not None:
+        matrix.flush()
+        del matrix
+
+    manifest = {
+        'version': version,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'model': model_name if dim else None,
+        'dim': dim,
+        'passages': count,
+        'sources': {name: _file_hash(path) for name, path in sources.items() if os.path.exists(path)},
+        'build_seconds': round(time.perf_counter() - started, 3),
+    }
+    with open(os.path.join(tmp_dir, "manifest.json"), "w", encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+
+    # Publish: move the finished version into place, then flip CURRENT atomically
+    if os.path.exists(version_dir):
+        import shutil
+        shutil.rmtree(tmp_dir)
+    else:
+        os.replace(tmp_dir, version_dir)
+    pointer_tmp = os.path.join(out_dir, f"CURRENT.{os.getpid()}.tmp")
+    with open(pointer_tmp, "w") as f:
+        f.write(version)
+    os.replace(pointer_tmp, os.path.join(out_dir, "CURRENT"))
+    return manifest
+
+
+# ----- load -----
+
+class Corpus:
+    """A loaded corpus version: passage texts, metadata and (optionally) embeddings"""
+
+    def __init__(self, manifest, passages, embeddings=None):
+        self.manifest = manifest
+        self.version = manifest['version']
+        self.model = manifest.get('model')
+        self.texts = [p['text'] for p in passages]
+        self.metadata = [p['meta'] for p in passages]
+        self.embeddings = embeddings
+
+    def __len__(self):
+        return len(self.texts)
+
+    def embeddings_for(self, model_name):
+        """The prebuilt matrix if it was made with `model_name`, else None"""
+        return self.embeddings if self.embeddings is not None and self.model == model_name else None
+
+
+def load_corpus(corpus_dir=CORPUS_DIR):
+    """Load the CURRENT corpus version, or None if none has been built"""
+    try:
+        with open(os.path.join(corpus_dir, "CURRENT"), "r") as f:
+            version_dir = os.path.join(corpus_dir, f.read().strip())
+        with open(os.path.join(version_dir, "manifest.json"), "r", encoding='utf-8') as f:
+            manifest = json.load(f)
+        with open(os.path.join(version_dir, "passages.json"), "r", encoding='utf-8') as f:
+            passages = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+    embeddings = None
+    embeddings_path = os.path.join(version_dir, "embeddings.npy")
+    if manifest.get('dim') and os.path.exists(embeddings_path):
+        embeddings = np.load(embeddings_path, mmap_mode='r')
+        if embeddings.shape[0] != len(passages):
+            print(f"⚠️ Corpus {manifest['version']}: embedding count mismatch, ignoring embeddings")
+            embeddings = None
+    return Corpus(manifest, passages, embeddings)
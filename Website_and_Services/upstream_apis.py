@@ -0,0 +1,150 @@
+"""
+Third-party APIs behind the website's proxy endpoints (OpenWeatherMap,
+Google Custom Search): request parameters and response shaping.
+
+Shared by the Flask routes in app.py and the async server in async_app.py,
+so both serving modes return the same JSON for the same upstream answer.
+Nothing here does I/O.
+"""
+
+import os
+from datetime import datetime
+
+WEATHER_API_KEY = "f3892078c6b88350c7dca2235e640010"  # Your actual API key
+# Overridable to point both servers at a mock (see bench_async_proxy.py)
+WEATHER_API_BASE = os.getenv('WEATHER_API_BASE', "http://api.openweathermap.org/data/2.5").rstrip('/')
+WEATHER_URL = f"{WEATHER_API_BASE}/weather"
+FORECAST_URL = f"{WEATHER_API_BASE}/forecast"
+GOOGLE_SEARCH_URL = 'https://www.googleapis.com/customsearch/v1'
+
+# Seconds to wait for any of these APIs
+UPSTREAM_TIMEOUT = 10
+
+
+def weather_params(city):
+    return {
+        'q': city,
+        'appid': WEATHER_API_KEY,
+        'units': 'metric'  # for Celsius
+    }
+
+
+def shape_weather(data):
+    """Current weather response from OpenWeatherMap's /weather payload"""
+    return {
+        'success': True,
+        'city': data['name'],
+        'country': data['sys']['country'],
+        'temperature': round(data['main']['temp']),
+        'feels_like': round(data['main']['feels_like']),
+        'humidity': data['main']['humidity'],
+        'pressure': data['main']['pressure'],
+        'visibility': data.get('visibility', 0) // 1000,  # Convert to km
+        'wind_speed': data['wind']['speed'],
+        'wind_direction': data['wind'].get('deg', 0),
+        'weather_main': data['weather'][0]['main'],
+        'weather_description': data['weather'][0]['description'].title(),
+        'weather_icon': data['weather'][0]['icon'],
+        'sunrise': datetime.fromtimestamp(data['sys']['sunrise']).strftime('%H:%M'),
+        'sunset': datetime.fromtimestamp(data['sys']['sunset']).strftime('%H:%M'),
+        'timestamp': datetime.now().strftime('%H:%M, %B %d')
+    }
+
+
+def shape_forecast(data):
+    """5-day forecast response from OpenWeatherMap's 3-hourly /forecast payload"""
+    # Group by day and get daily summaries
+    daily_forecasts = {}
+
+    for item in data['list']:
+        date = datetime.fromtimestamp(item['dt']).strftime('%Y-%m-%d')
+        time = datetime.fromtimestamp(item['dt']).strftime('%H:%M')
+
+        if date not in daily_forecasts:
+            daily_forecasts[date] = {
+                'date': date,
+                'day_name': datetime.fromtimestamp(item['dt']).strftime('%A'),
+                'temps': [],
+                'weather_conditions': [],
+                'humidity': [],
+                'wind_speed': [],
+                'times': []
+            }
+
+        daily_forecasts[date]['temps'].append(item['main']['temp'])
+        daily_forecasts[date]['weather_conditions'].append({
+            'main': item['weather'][0]['main'],
+            'description': item['weather'][0]['description'],
+            'icon': item['weather'][0]['icon']
+        })
+        daily_forecasts[date]['humidity'].append(item['main']['humidity'])
+        daily_forecasts[date]['wind_speed'].append(item['wind']['speed'])
+        daily_forecasts[date]['times'].append(time)
+
+    # Convert to list and calculate daily summaries
+    forecast_list = []
+    for date, day_data in list(daily_forecasts.items())[:5]:  # Limit to 5 days
+        # Calculate min/max temperatures
+        min_temp = round(min(day_data['temps']))
+        max_temp = round(max(day_data['temps']))
+
+        # Get most common weather condition for the day
+        weather_counts = {}
+        for condition in day_data['weather_conditions']:
+            key = condition['main']
+            if key not in weather_counts:
+                weather_counts[key] = {'count': 0, 'data': condition}
+            weather_counts[key]['count'] += 1
+
+        most_common_weather = max(weather_counts.items(), key=lambda x: x[1]['count'])[1]['data']
+
+        # Calculate averages
+        avg_humidity = round(sum(day_data['humidity']) / len(day_data['humidity']))
+        avg_wind_speed = round(sum(day_data['wind_speed']) / len(day_data['wind_speed']), 1)
+
+        forecast_list.append({
+            'date': date,
+            'day_name': day_data['day_name'],
+            'min_temp': min_temp,
+            'max_temp': max_temp,
+            'weather_main': most_common_weather['main'],
+            'weather_description': most_common_weather['description'].title(),
+            'weather_icon': most_common_weather['icon'],
+            'humidity': avg_humidity,
+            'wind_speed': avg_wind_speed
+        })
+
+    return {
+        'success': True,
+        'city': data['city']['name'],
+        'country': data['city']['country'],
+        'forecast': forecast_list
+    }
+
+
+def search_params(api_key, cx, query, num):
+    return {
+        'key': api_key,
+        'cx': cx,
+        'q': query,
+        'num': max(1, min(num, 10))
+    }
+
+
+def shape_search(data, query, num):
+    """Search response from a Custom Search JSON API payload"""
+    results = []
+    for item in data.get('items', [])[:num]:
+        img = None
+        try:
+            img = item.get('pagemap', {}).get('cse_image', [{}])[0].get('src')
+        except Exception:
+            img = None
+        results.append({
+            'title': item.get('title'),
+            'link': item.get('link'),
+            'snippet': item.get('snippet'),
+            'displayLink': item.get('displayLink'),
+            'image': img
+        })
+    return {'success': True, 'query': query, 'results': results}
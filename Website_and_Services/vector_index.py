@@ -0,0 +1,434 @@
+"""
+Pluggable vector index for chat retrieval.
+
+Two backends share one interface (add / delete / search / save / load):
+
+- ExactIndex: brute-force cosine search, best for small corpora
+- IVFIndex:   inverted-file ANN index in pure NumPy. Vectors are clustered
+              with spherical k-means; a query only scores the members of
+              the n_probe closest clusters.
+
+Vectors are expected to be L2-normalized (see corpus_embeddings.normalize_rows),
+so scores are cosine similarities.
+
+An index built from a float32 matrix (such as the memory-mapped corpus
+embeddings) keeps a reference to it instead of copying it; rows are only
+copied to the heap once the index is changed. save_index() writes only ids,
+centroids and list assignments (plus the vectors when they do not come
+from such an external matrix), after compacting deleted rows away.
+"""
+
+import os
+
+import numpy as np
+
+
+class _VectorStore:
+    """Growable float32 row buffer with external ids and tombstones"""
+
+    def __init__(self, dim=None, capacity=0):
+        self.dim = dim
+        self.size = 0
+        self.vectors = np.zeros((capacity, dim or 0), dtype=np.float32)
+        self.ids = [None] * capacity
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.rows = {}  # id -> row
+        self.external = False   # vectors is the caller's matrix (e.g. a memory map), never written
+
+    def attach(self, ids, vectors, external=True):
+        """Use `vectors` (float32, one row per id) as the buffer without copying it"""
+        if len(ids) != len(vectors):
+            raise ValueError('ids and vectors must have the same length')
+        self.dim = vectors.shape[1]
+        self.vectors = vectors
+        self.ids = list(ids)
+        self.alive = np.ones(len(ids), dtype=bool)
+        self.rows = {item_id: row for row, item_id in enumerate(self.ids)}
+        self.size = len(ids)
+        self.external = external
+
+    def _grow(self, needed):
+        capacity = max(needed, 2 * len(self.alive), 64)
+        vectors = np.zeros((capacity, self.dim), dtype=np.float32)
+        vectors[:self.size] = self.vectors[:self.size]
+        alive = np.zeros(capacity, dtype=bool)
+        alive[:self.size] = self.alive[:self.size]
+        self.vectors, self.alive = vectors, alive
+        self.ids.extend([None] * (capacity - len(self.ids)))
+        self.external = False
+
+    def add(self, ids, vectors):
+        given = vectors
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim == 1:
+            vectors = vectors.reshape(1, -1)
+        if len(ids) != len(vectors):
+            raise ValueError('ids and vectors must have the same length')
+        if self.size == 0 and not self.rows and vectors.flags.c_contiguous and len(set(ids)) == len(ids) \
+                and (self.dim is None or vectors.shape[1] == self.dim):
+            # First bulk add: reference the matrix (a memory map stays shared between processes)
+            self.attach(ids, vectors, external=isinstance(given, np.ndarray) and np.shares_memory(vectors, given))
+            return np.arange(len(ids))
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+            self.vectors = np.zeros((0, self.dim), dtype=np.float32)
+        elif vectors.shape[1] != self.dim:
+            raise ValueError(f'expected vectors of dimension {self.dim}, got {vectors.shape[1]}')
+
+        # Re-adding an id replaces its vector
+        self.delete([i for i in ids if i in self.rows])
+
+        start = self.size
+        end = start + len(ids)
+        if end > len(self.alive):
+            self._grow(end)
+        self.vectors[start:end] = vectors
+        self.alive[start:end] = True
+        for offset, item_id in enumerate(ids):
+            self.ids[start + offset] = item_id
+            self.rows[item_id] = start + offset
+        self.size = end
+        return np.arange(start, end)
+
+    def delete(self, ids):
+        removed = []
+        for item_id in ids:
+            row = self.rows.pop(item_id, None)
+            if row is not None:
+                self.alive[row] = False
+                removed.append(row)
+        return removed
+
+    def __len__(self):
+        return len(self.rows)
+
+    def live_rows(self):
+        return np.flatnonzero(self.alive[:self.size])
+
+    def compact(self):
+        """Drop deleted rows. Returns an old row -> new row array (-1 = dropped),
+        or None when there was nothing to drop."""
+        live = self.live_rows()
+        if len(live) == self.size:
+            return None
+        mapping = np.full(self.size, -1, dtype=np.int64)
+        mapping[live] = np.arange(len(live))
+        self.vectors = np.ascontiguousarray(self.vectors[live])
+        self.ids = [self.ids[row] for row in live]
+        self.alive = np.ones(len(live), dtype=bool)
+        self.rows = {item_id: row for row, item_id in enumerate(self.ids)}
+        self.size = len(live)
+        self.external = False
+        return mapping
+
+
+def _top_k(scores, rows, top_k):
+    """Best top_k (row, score) pairs from parallel arrays, best first"""
+    if len(rows) == 0:
+        return []
+    if top_k < len(rows):
+        best = np.argpartition(-scores, top_k)[:top_k]
+    else:
+        best = np.arange(len(rows))
+    best = best[np.argsort(-scores[best])]
+    return [(int(rows[i]), float(scores[i])) for i in best]
+
+
+class ExactIndex:
+    """Brute-force cosine search over every live vector"""
+
+    backend = 'exact'
+
+    def __init__(self, dim=None):
+        self._store = _VectorStore(dim)
+
+    def __len__(self):
+        return len(self._store)
+
+    def add(self, ids, vectors):
+        self._store.add(list(ids), vectors)
+
+    def delete(self, ids):
+        return len(self._store.delete(ids))
+
+    def search(self, query, top_k=3):
+        """Return [(id, score), ...] for the top_k most similar vectors"""
+        store = self._store
+        rows = store.live_rows()
+        if len(rows) == 0:
+            return []
+        query = np.asarray(query, dtype=np.float32).ravel()
+        scores = store.vectors[rows] @ query if len(rows) < store.size else store.vectors[:store.size] @ query
+        return [(store.ids[row], score) for row, score in _top_k(scores, rows, top_k)]
+
+    def compact(self):
+        self._store.compact()
+
+    def _arrays(self):
+        return {'ids': np.array(self._store.ids[:self._store.size])}
+
+    def save(self, path):
+        save_index(self, path)
+
+    @classmethod
+    def _from_arrays(cls, arrays, params, vectors):
+        index = cls(dim=vectors.shape[1])
+        index._store.attach(arrays['ids'].tolist(), vectors)
+        return index
+
+
+class IVFIndex:
+    """Inverted-file index: k-means clusters + probing the closest n_probe lists"""
+
+    backend = 'ivf'
+
+    def __init__(self, dim=None, n_lists=None, n_probe=8, min_train_size=1000,
+                 train_iterations=10, seed=0):
+        self._store = _VectorStore(dim)
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.min_train_size = min_train_size
+        self.train_iterations = train_iterations
+        self.seed = seed
+        self.centroids = None
+        self._members = []        # list no -> python list of rows
+        self._member_arrays = []  # cached np arrays, rebuilt when a list changes
+        self._dirty = set()
+
+    def __len__(self):
+        return len(self._store)
+
+    @property
+    def is_trained(self):
+        return self.centroids is not None
+
+    # ----- training -----
+
+    def train(self, vectors=None):
+        """Cluster the vectors (default: everything stored) and assign all rows to lists"""
+        store = self._store
+        rows = store.live_rows()
+        if vectors is None:
+            vectors = store.vectors[rows]
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if len(vectors) == 0:
+            raise ValueError('cannot train an IVF index without vectors')
+
+        n_lists = self.n_lists or max(1, int(np.sqrt(len(vectors))))
+        n_lists = min(n_lists, len(vectors))
+        rng = np.random.default_rng(self.seed)
+        centroids = vectors[rng.choice(len(vectors), n_lists, replace=False)].copy()
+
+        for _ in range(self.train_iterations):
+            labels = np.argmax(vectors @ centroids.T, axis=1)
+            for c in range(n_lists):
+                members = vectors[labels == c]
+                if len(members):
+                    centroid = members.sum(axis=0)
+                else:
+                    centroid = vectors[rng.integers(len(vectors))]
+                norm = np.linalg.norm(centroid)
+                centroids[c] = centroid / norm if norm else centroid
+
+        self.n_lists = n_lists
+        self.centroids = centroids
+        self._members = [[] for _ in range(n_lists)]
+        self._member_arrays = [np.empty(0, dtype=np.int64) for _ in range(n_lists)]
+        self._dirty = set(range(n_lists))
+        self._assign(rows)
+
+    def _assign(self, rows):
+        if len(rows) == 0:
+            return
+        labels = np.argmax(self._store.vectors[rows] @ self.centroids.T, axis=1)
+        for row, label in zip(rows.tolist(), labels.tolist()):
+            self._members[label].append(row)
+            self._dirty.add(label)
+
+    # ----- updates -----
+
+    def add(self, ids, vectors):
+        rows = self._store.add(list(ids), vectors)
+        if self.is_trained:
+            self._assign(rows)
+        elif len(self._store) >= self.min_train_size:
+            self.train()
+
+    def delete(self, ids):
+        # Deleted rows stay in their lists as tombstones, skipped at search time until compact()
+        removed = self._store.delete(ids)
+        if self.is_trained:
+            self._dirty.update(range(self.n_lists))
+        return len(removed)
+
+    def compact(self):
+        """Drop deleted rows from the store and the lists"""
+        mapping = self._store.compact()
+        if mapping is None or not self.is_trained:
+            return
+        for label, rows in enumerate(self._members):
+            rows = mapping[np.asarray(rows, dtype=np.int64)] if rows else np.empty(0, dtype=np.int64)
+            self._members[label] = rows[rows >= 0].tolist()
+        self._dirty = set(range(self.n_lists))
+
+    def _list_rows(self, label):
+        if label in self._dirty:
+            rows = np.array(self._members[label], dtype=np.int64)
+            rows = rows[self._store.alive[rows]] if len(rows) else rows
+            self._members[label] = rows.tolist()
+            self._member_arrays[label] = rows
+            self._dirty.discard(label)
+        return self._member_arrays[label]
+
+    # ----- search -----
+
+    def search(self, query, top_k=3, n_probe=None):
+        """Return [(id, score), ...] from the n_probe closest lists"""
+        store = self._store
+        query = np.asarray(query, dtype=np.float32).ravel()
+
+        if not self.is_trained:
+            rows = store.live_rows()
+        else:
+            n_probe = min(n_probe or self.n_probe, self.n_lists)
+            centroid_scores = self.centroids @ query
+            if n_probe < self.n_lists:
+                probe = np.argpartition(-centroid_scores, n_probe)[:n_probe]
+            else:
+                probe = np.arange(self.n_lists)
+            lists = [self._list_rows(int(label)) for label in probe]
+            rows = np.concatenate(lists) if lists else np.empty(0, dtype=np.int64)
+
+        if len(rows) == 0:
+            return []
+        scores = store.vectors[rows] @ query
+        return [(store.ids[row], score) for row, score in _top_k(scores, rows, top_k)]
+
+    # ----- persistence -----
+
+    def _arrays(self):
+        arrays = {'ids': np.array(self._store.ids[:self._store.size])}
+        if self.is_trained:
+            labels = np.full(self._store.size, -1, dtype=np.int32)
+            for label in range(self.n_lists):
+                labels[self._list_rows(label)] = label
+            arrays['centroids'] = self.centroids
+            arrays['labels'] = labels
+        return arrays
+
+    def _params(self):
+        return {'n_lists': self.n_lists or 0, 'n_probe': self.n_probe,
+                'min_train_size': self.min_train_size}
+
+    def save(self, path):
+        save_index(self, path)
+
+    @classmethod
+    def _from_arrays(cls, arrays, params, vectors):
+        index = cls(dim=vectors.shape[1],
+                    n_lists=int(params['n_lists']) or None,
+                    n_probe=int(params['n_probe']),
+                    min_train_size=int(params['min_train_size']))
+        index._store.attach(arrays['ids'].tolist(), vectors)
+        if 'centroids' in arrays:
+            # Reuse the saved clustering and list assignments instead of re-running k-means
+            index.centroids = arrays['centroids'].astype(np.float32)
+            index.n_lists = len(index.centroids)
+            labels = arrays['labels']
+            order = np.argsort(labels, kind='stable')
+            bounds = np.searchsorted(labels[order], np.arange(index.n_lists + 1))
+            index._member_arrays = [order[bounds[l]:bounds[l + 1]].astype(np.int64) for l in range(index.n_lists)]
+            index._members = [rows.tolist() for rows in index._member_arrays]
+            index._dirty = set()
+        return index
+
+
+BACKENDS = {
+    ExactIndex.backend: ExactIndex,
+    IVFIndex.backend: IVFIndex,
+}
+
+
+def create_index(backend='exact', **kwargs):
+    """Create an empty index for the given backend name"""
+    try:
+        return BACKENDS[backend](**kwargs)
+    except KeyError:
+        raise ValueError(f"Unknown vector index backend: {backend}")
+
+
+def _write_atomic(path, save, data):
+    tmp_path = f"{path}.{os.getpid()}.tmp{os.path.splitext(path)[1]}"
+    save(tmp_path, data)
+    os.replace(tmp_path, path)
+
+
+def vectors_path(path):
+    """Where save_index keeps vectors that have no external source"""
+    return f"{path[:-len('.npz')] if path.endswith('.npz') else path}.vectors.npy"
+
+
+def save_index(index, path):
+    """Compact the index and write it to a .npz file (atomically).
+
+    Vectors referenced from an external matrix are not written: pass the
+    same matrix to load_index(). Otherwise they go to a .vectors.npy file
+    next to it, which load_index() memory-maps.
+    """
+    index.compact()
+    store = index._store
+    arrays = index._arrays()
+    params = index._params() if hasattr(index, '_params') else {}
+    if not store.external:
+        _write_atomic(vectors_path(path), np.save, np.ascontiguousarray(store.vectors[:store.size]))
+    _write_atomic(path, lambda p, kw: np.savez(p, **kw), dict(
+        backend=np.array(index.backend), external=np.array(store.external),
+        shape=np.array([store.size, store.dim or 0]),
+        **arrays, **{f'param_{k}': np.array(v) for k, v in params.items()}
+    ))
+
+
+def load_index(path, vectors=None):
+    """Load an index written by save_index; `vectors` is the external matrix
+    it was built from (required when it was saved without its vectors)"""
+    with np.load(path, allow_pickle=False) as data:
+        backend = str(data['backend'])
+        external = bool(data['external'])
+        shape = tuple(int(n) for n in data['shape'])
+        arrays = {k: data[k] for k in data.files
+                  if k not in ('backend', 'external', 'shape') and not k.startswith('param_')}
+        params = {k[len('param_'):]: data[k] for k in data.files if k.startswith('param_')}
+    if not external:
+        vectors = np.load(vectors_path(path), mmap_mode='r')
+    elif vectors is None:
+        raise ValueError(f"{path} was saved without its vectors; pass the matrix it was built from")
+    if tuple(vectors.shape) != shape:
+        raise ValueError(f"{path} indexes a {shape} matrix, got {tuple(vectors.shape)}")
+    return BACKENDS[backend]._from_arrays(arrays, params, np.asarray(vectors, dtype=np.float32))
+
+
+def build_index(vectors, ids=None, backend='auto', ivf_threshold=5000, **kwargs):
+    """Index a matrix of normalized vectors. 'auto' switches to IVF for large corpora."""
+    if backend == 'auto':
+        backend = 'ivf' if len(vectors) >= ivf_threshold else 'exact'
+    index = create_index(backend, **kwargs)
+    if ids is None:
+        ids = range(len(vectors))
+    if len(vectors):
+        index.add(list(ids), vectors)
+    if backend == 'ivf' and not index.is_trained and len(vectors):
+        index.train()
+    return index
+
+
+def load_or_build_index(vectors, path, backend='auto', **kwargs):
+    """Load a saved index from path, or build it from vectors and save it there"""
+    if os.path.exists(path):
+        try:
+            return load_index(path, vectors)
+        except Exception as e:
+            print(f"⚠️ Could not load vector index {path}: {e}")
+    index = build_index(vectors, backend=backend, **kwargs)
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    save_index(index, path)
+    return index